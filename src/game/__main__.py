@@ -1,16 +1,41 @@
+# Startup phases are timed from here to the first frame (see startup.py)
+from startup import startup
+
 # Do not remove these lines
 from setup_ursina_android import setup_ursina_android
 setup_ursina_android()
+startup.mark('setup_ursina_android')
 
 from ursina import *
-from ursina.prefabs.draggable import Draggable
-from ursina.prefabs.health_bar import HealthBar
+startup.mark('import ursina')
 from ursina.sequence import Sequence
-from ursina.ursinamath import lerp, distance
+from ursina.ursinamath import lerp, distance, distance_2d
+from spatial_index import SpatialIndex
+from nav_grid import NavGrid
+from pathfinding import PathService
+from heightfield import HeightField
+from projectiles import ProjectilePool
+from ai_manager import AIManager
+from health_bars import HealthBarLayer
+from effects import EffectManager
+from touch_input import TouchLayer
+from headless import HEADLESS, game_time
+from ray_stats import ray_stats
+from profiler import profiler
+from registry import EntityRegistry
+from static_world import flatten_static
+from level import load_level, build_level
+from model_cache import model_cache
+from level_loader import level_loader
+from sim_clock import SimClock, sim_clock
 import random
+startup.mark('import game modules')
 
-app = Ursina()
+app = Ursina(window_type='none') if HEADLESS else Ursina()
 window.vsync = False
+# glTF models load from their converted .bam (see model_cache.py)
+model_cache.install()
+startup.mark('Ursina()')
 
 main_menu = None
 pause_menu = None
@@ -21,33 +46,78 @@ game_started = False
 player_alive = True
 menu_background = None
 
-ai_bots = []
-bot_tasks = []
+# Set to True to tick all bots in one NumPy struct-of-arrays pass (falls back if NumPy is missing)
+vectorized_ai = False
+
+ai_manager = AIManager(vectorized=vectorized_ai)
+ai_bots = ai_manager.bots
+projectiles = ProjectilePool(capacity=64)
+health_bars = HealthBarLayer()
+# Hit flashes, the damage overlay and crosshair easing, stepped only while running
+effects = EffectManager()
+# Joysticks and buttons: laid out on resize, driven by every touch pointer
+touch_layer = TouchLayer()
+world_index = None
+nav_grid = None
+path_service = None
+height_field = None
+# Placements, spawns and bot patrols, read once by load_gameplay() and rebuilt every round
+arena_level = None
 sequences  = []
 
+# Live entities by kind ('player', 'bots', 'world', 'hud', 'menus'), for round teardown
+registry = EntityRegistry()
+
 joystick_move = None
 joystick_look = None
 button_jump = None
 button_shoot = None
 
-gunshot = Audio('assets/gunshot.wav', loop=False, autoplay=False, volume=0.2)
+gunshot = None
+HealthBar = None
+
+def load_gameplay():
+    """
+    Everything only a round needs, done once: the arena level, the gunshot
+    sound and the HealthBar prefab. With lazy init (the default) this runs
+    when Singleplayer is first pressed instead of before the main menu.
+    """
+    global arena_level, gunshot, HealthBar
+    if arena_level is not None:
+        return
+    start = time.perf_counter()
+    from ursina.prefabs.health_bar import HealthBar
+    arena_level = load_level('arena')
+    gunshot = Audio('assets/gunshot.wav', loop=False, autoplay=False, volume=0.2)
+    print(f"load_gameplay: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+if not startup.lazy:
+    load_gameplay()
+    startup.mark('load_gameplay')
+
+def prefetch_round():
+    """Get the next round's level data and models loading (in the background) ahead of setup_game()."""
+    load_gameplay()
+    level_loader.prefetch([p['model'] for p in arena_level.pieces] + ['assets/pistol.gltf'])
 
 class VirtualJoystick(Entity):
     """
     An on-screen joystick control that:
-      1. Scales its base and knob dynamically based on window size.
-      2. Allows dragging within its circular radius.
+      1. Scales its base and knob with the window (laid out by touch_layer on resize).
+      2. Follows the touch pointer captured on it, within its circular radius.
       3. Reports a Vec2 value in the range [-1, +1].
     """
     def __init__(
         self,
         radius: float = 50,
         knob_factor: float = 2.5,
+        grab_slop: float = .03,
         position: tuple = (-.7, -.4),
         **kwargs
     ):
         super().__init__(parent=camera.ui, position=position, **kwargs)
         self.knob_factor = knob_factor
+        self.grab_slop   = grab_slop   # ui units around the base that still grab it
 
         # 1) Store pixel dimensions for base and knob
         self.diameter_px = radius * 2
@@ -68,23 +138,21 @@ class VirtualJoystick(Entity):
             color=color.rgba32(64, 64, 64, 150),
             name='joystick_bg'
         )
-        self.knob = Draggable(
+        self.knob = Entity(
             parent=self,
             model='circle',
             color=color.white,
             name='joystick_knob'
         )
-        self.knob.always_on_top   = True
-        self.knob.start_position  = Vec2(0, 0)
-        self.knob.lock = Vec3(0, 0, 1)
+        self.knob.always_on_top = True
 
         # 6) Current input value (Vec2)
         self.value = Vec2(0, 0)
 
         # 7) Initialize with no width-ratio scaling (ratio=1.0)
-        self._apply_scale(1.0)
+        self.layout(1.0)
 
-    def _apply_scale(self, ratio: float) -> None:
+    def layout(self, ratio: float) -> None:
         """
         Apply dynamic scaling to:
           - self.scale    (joystick base diameter)
@@ -99,37 +167,35 @@ class VirtualJoystick(Entity):
         self.bg.scale   = Vec2(1, 1)  # base circle fills parent Entity
         self.knob.scale = Vec2(ui_r * self.knob_factor,
                                ui_r * self.knob_factor)
-        
+
         # update max_offset and logical radius here, once ui_r is known
         self.max_offset = (ui_r * self.knob_factor) / 2
         self.radius     = self.max_offset
 
-    def update(self) -> None:
-        # Recompute width-ratio if window width changed
-        cur_w, _ = window.size
-        ratio    = cur_w / (self._init_w or cur_w)
-        self._apply_scale(ratio)
-
-        # Begin dragging if mouse is held over the knob
-        if held_keys['left mouse'] and mouse.hovered_entity == self.knob:
-            self.knob.dragging = True
-
-        # While dragging, clamp knob to circle and compute value
-        if self.knob.dragging:
-            offset = Vec2(self.knob.x, self.knob.y)
-            if offset.length() > self.radius:
-                offset = offset.normalized() * self.radius
-            self.knob.position = Vec3(offset.x, offset.y, 0)  # ensure z=0
-            self.value = offset / self.radius
-        else:
-            self.knob.position = Vec3(0, 0, 0)
-            self.value = Vec2(0, 0)
+    def contains(self, point) -> bool:
+        # the whole visible base, plus a little slop for a thumb landing just off its edge
+        return distance_2d(point, self.position) <= self.scale_x / 2 + self.grab_slop
+
+    def press(self, point) -> None:
+        self.drag(point)
 
-class VirtualButton(Button):
+    def drag(self, point) -> None:
+        # Clamp the knob to the circle (in the joystick's local units) and compute value
+        offset = Vec2(point[0] - self.x, point[1] - self.y) / self.scale_x
+        if offset.length() > self.radius:
+            offset = offset.normalized() * self.radius
+        self.knob.position = Vec3(offset.x, offset.y, 0)  # ensure z=0
+        self.value = offset / self.radius
+
+    def release(self) -> None:
+        self.knob.position = Vec3(0, 0, 0)
+        self.value = Vec2(0, 0)
+
+class VirtualButton(Entity):
     """
     An on-screen button that:
-      1. Scales dynamically with window width.
-      2. Sets held_keys[key_name] on click and release.
+      1. Scales with window width (laid out by touch_layer on resize).
+      2. Holds held_keys[key_name] and calls on_click while a touch pointer presses it.
     """
     def __init__(
         self,
@@ -142,7 +208,6 @@ class VirtualButton(Button):
         super().__init__(
             parent=camera.ui,
             model='circle',
-            collider='box',
             position=position,
             color=color,
             **kwargs
@@ -158,23 +223,52 @@ class VirtualButton(Button):
         self._base_ui_size = (self.size_px / h) * 2
 
         # 3) Apply initial scale with no width-ratio change
-        self.scale = self._base_ui_size
+        self.layout(1.0)
 
-    def update(self) -> None:
-        # Recompute width ratio and apply to scale
-        cur_w, _ = window.size
-        ratio    = cur_w / (self._init_w or cur_w)
+    def layout(self, ratio: float) -> None:
         self.scale = self._base_ui_size * ratio
 
-    def on_click(self) -> None:
-        """Called when the user clicks the button."""
+    def contains(self, point) -> bool:
+        return distance_2d(point, self.position) <= self.scale_x / 2
+
+    def press(self, point) -> None:
         held_keys[self.key_name] = 1
-        input(self.key_name)
+        if self.on_click:
+            self.on_click()
 
-    def input(self, key: str) -> None:
-        """Called on input events—used here to reset held_keys."""
-        if key == f'{self.key_name} up':
-            held_keys[self.key_name] = 0
+    def drag(self, point) -> None:
+        pass
+
+    def release(self) -> None:
+        held_keys[self.key_name] = 0
+
+class CornerButton(Entity):
+    """
+    A HUD button that:
+      1. Stays pinned to the window's top-left corner (laid out by touch_layer on resize).
+      2. Calls on_click when any touch pointer (or the mouse) presses it, so
+         it works while other fingers are on the joysticks.
+    """
+    def __init__(self, margin: Vec2 = Vec2(.04, .05), **kwargs):
+        super().__init__(parent=camera.ui, model=Quad(radius=.1), origin=(-0.5, 0.5), **kwargs)
+        self.margin = margin
+
+    def layout(self, ratio: float) -> None:
+        self.position = (-window.aspect_ratio / 2 + self.margin.x, .5 - self.margin.y)
+
+    def contains(self, point) -> bool:
+        # the origin is the top-left corner
+        return 0 <= point[0] - self.x <= self.scale_x and 0 <= self.y - point[1] <= self.scale_y
+
+    def press(self, point) -> None:
+        if self.on_click:
+            self.on_click()
+
+    def drag(self, point) -> None:
+        pass
+
+    def release(self) -> None:
+        pass
 
 class HealthMixin:
     def __init__(self, health=100, **kwargs):
@@ -200,9 +294,6 @@ class DynamicCrosshair(Entity):
         self.reticle_speed = reticle_speed
         self.reticle_distance = reticle_distance
 
-        # Shooting offset
-        self.shoot_offset = 0
-
         # Center dot
         self.dot = Entity(parent=self, model='circle', color=color.white, scale=dot_scale, position=(0,0), name='crosshair_dot')
 
@@ -217,32 +308,34 @@ class DynamicCrosshair(Entity):
         self.lines['right'] = Entity(parent=self, model='quad', color=color.white,
                                      scale=(line_length, line_thickness), position=(line_length/2 + 0.01, 0), name='crosshair_right')
         
-        # Store original positions for interpolation
+        # Store original positions, and the direction each line moves out in, for interpolation
         self.original_positions = {k: v.position for k,v in self.lines.items()}
-
-    def update(self):
-        # Player speed
-        speed = getattr(self.player, 'velocity', Vec3(0,0,0)).length() if self.player else 1
-
-        # Total offset = movement + shooting
-        total_offset = speed * self.reticle_distance + self.shoot_offset
-
-        for direction, line in self.lines.items():
-            x, y = 0, 0
-            if direction == 'top':
-                y = self.original_positions['top'].y + total_offset
-            elif direction == 'bottom':
-                y = self.original_positions['bottom'].y - total_offset
-            elif direction == 'left':
-                x = self.original_positions['left'].x - total_offset
-            elif direction == 'right':
-                x = self.original_positions['right'].x + total_offset
-
-            # Smoothly interpolate
-            line.position = lerp(line.position, Vec3(x, y, 0), time.dt * self.reticle_speed)
-
-        # Gradually decay shooting offset
-        self.shoot_offset = lerp(self.shoot_offset, 0, time.dt * 10)
+        self._spread_lines = [
+            (self.lines['top'],    self.original_positions['top'],    Vec3(0, 1, 0)),
+            (self.lines['bottom'], self.original_positions['bottom'], Vec3(0, -1, 0)),
+            (self.lines['left'],   self.original_positions['left'],   Vec3(-1, 0, 0)),
+            (self.lines['right'],  self.original_positions['right'],  Vec3(1, 0, 0)),
+        ]
+        self.spread        = 0   # current offset of the lines
+        self.target_spread = 0   # offset they are easing towards
+
+    def set_spread(self, spread: float) -> None:
+        """Ease the lines towards a new offset; the crosshair is an effect only until they arrive."""
+        if abs(spread - self.target_spread) < 1e-4:
+            return
+        self.target_spread = spread
+        effects.start(self)
+
+    def step(self, dt: float) -> bool:
+        """One frame of easing, run by the effect manager; False once the lines are in place."""
+        if self.is_empty():
+            return False
+        self.spread = lerp(self.spread, self.target_spread, min(dt * self.reticle_speed, 1))
+        if abs(self.spread - self.target_spread) < 1e-4:
+            self.spread = self.target_spread
+        for line, origin, direction in self._spread_lines:
+            line.position = origin + direction * self.spread
+        return self.spread != self.target_spread
 
 class FirstPersonController(Entity, HealthMixin):
     """
@@ -259,6 +352,7 @@ class FirstPersonController(Entity, HealthMixin):
         # Movement parameters
         self.speed            = 5
         self.height           = 2
+        self.velocity         = Vec3(0, 0, 0)  # set by each fixed_update()
         self.camera_pivot     = Entity(parent=self, y=self.height, name='camera_pivot')
         camera.parent        = self.camera_pivot
         camera.position      = (0, 0, 0)
@@ -278,11 +372,17 @@ class FirstPersonController(Entity, HealthMixin):
         self.jump_up_duration = .5
         self.fall_after       = .35
         self.air_time         = 0
+        self.jump_timer       = None  # seconds into the current jump's rise
+        self.jump_base_y      = None  # y the rise started from, taken on its first tick
         self.max_step_height  = 0.5
 
         # Collision setup
         self.traverse_target = scene
+        self.collision_index = None  # SpatialIndex of the static world, set by setup_game()
+        self.height_field    = None  # HeightField baked from it, for gravity/landing
         self.ignore_list     = [self]
+        self.hit_capsule     = (0, self.height)  # feet to head, for projectile sweeps
+        self.aim_distance    = 30                # where shots from the gun cross the crosshair
         self.gun             = None
 
         self._next_fire_time = 0
@@ -299,7 +399,7 @@ class FirstPersonController(Entity, HealthMixin):
         self.recoil_amount = Vec2(0.5, 0.1)  # (pitch, yaw) per shot
 
         # Create dynamic crosshair, passing self as the player reference
-        self.crosshair = DynamicCrosshair(player=self)
+        self.crosshair = registry.add(DynamicCrosshair(player=self), 'hud')
 
         self.damage_overlay = Entity(
             parent=camera.ui,
@@ -308,6 +408,7 @@ class FirstPersonController(Entity, HealthMixin):
             scale=(2, 2),
             z=-1
 )
+        registry.add(self.damage_overlay, 'hud')
 
         # Apply any overrides passed in
         for key, value in kwargs.items():
@@ -315,34 +416,18 @@ class FirstPersonController(Entity, HealthMixin):
 
         # Snap to ground on spawn
         if self.gravity:
-            ray = raycast(
-                self.world_position + (0, self.height, 0),
-                self.down,
-                traverse_target=self.traverse_target,
-                ignore=self.ignore_list
-            )
+            with ray_stats.measure('controller.spawn_snap'):
+                ray = raycast(
+                    self.world_position + (0, self.height, 0),
+                    self.down,
+                    traverse_target=self.traverse_target,
+                    ignore=self.ignore_list
+                )
             if ray.hit:
                 self.y = ray.world_point.y
 
-    def update(self) -> None:
-        # Look via right joystick
-        if self.use_touch:
-            rot = joystick_look.value
-            yaw_gain   = 100
-            pitch_gain = 100
-            self.rotation_y += rot.x * time.dt * yaw_gain
-            self.camera_pivot.rotation_x = clamp(
-                self.camera_pivot.rotation_x - rot.y * time.dt * pitch_gain,
-                -90,
-                90
-            )
-        else:
-            # Mouse look (only when locked)
-            if mouse.locked:
-                self.rotation_y += mouse.velocity[0] * self.mouse_sensitivity[1]
-                self.camera_pivot.rotation_x -= mouse.velocity[1] * self.mouse_sensitivity[0]
-                self.camera_pivot.rotation_x = clamp(self.camera_pivot.rotation_x, -90, 90)
-
+    def fixed_update(self) -> None:
+        """One simulation tick (see sim_clock.py): movement, jumping, gravity and landing."""
         # Move via left joystick
         if self.use_touch:
             move_x = joystick_move.value.x
@@ -355,20 +440,18 @@ class FirstPersonController(Entity, HealthMixin):
 
         if direction:
             # Prevent walking through walls
-            feet = raycast(
-                self.position + Vec3(0, .5, 0),
-                direction,
-                traverse_target=self.traverse_target,
-                ignore=self.ignore_list,
-                distance=.5
-            )
-            head = raycast(
-                self.position + Vec3(0, self.height - .1, 0),
-                direction,
-                traverse_target=self.traverse_target,
-                ignore=self.ignore_list,
-                distance=.5
-            )
+            with ray_stats.measure('controller.feet'):
+                feet = self._raycast(
+                    self.position + Vec3(0, .5, 0),
+                    direction,
+                    distance=.5
+                )
+            with ray_stats.measure('controller.head'):
+                head = self._raycast(
+                    self.position + Vec3(0, self.height - .1, 0),
+                    direction,
+                    distance=.5
+                )
 
             if feet.hit and not head.hit:
                 step_height = min(self.max_step_height, feet.world_point.y - self.y)
@@ -377,14 +460,22 @@ class FirstPersonController(Entity, HealthMixin):
             if not (feet.hit or head.hit):
                 self.position += direction * self.speed * time.dt
 
+        # Jump: rise along the curve for jump_up_duration, falling from fall_after
+        if self.jump_timer is not None:
+            if self.jump_base_y is None:
+                self.jump_base_y = self.y
+            self.jump_timer += time.dt
+            if self.jump_timer - time.dt < self.fall_after <= self.jump_timer:
+                self.start_fall()
+            t = min(self.jump_timer / self.jump_up_duration, 1)
+            self.y = self.jump_base_y + self.jump_height * curve.out_expo(t)
+            if t >= 1:
+                self.jump_timer = None
+
         # Gravity & landing
         if self.gravity:
-            down_ray = raycast(
-                self.world_position + (0, self.height, 0),
-                self.down,
-                traverse_target=self.traverse_target,
-                ignore=self.ignore_list
-            )
+            with ray_stats.measure('controller.down'):
+                down_ray = self._ground_ray(self.world_position + (0, self.height, 0))
             if down_ray.distance <= self.height + .1 and down_ray.world_normal.y > .7:
                 if not self.grounded:
                     self.land()
@@ -397,7 +488,27 @@ class FirstPersonController(Entity, HealthMixin):
                     down_ray.distance - .05
                 ) * time.dt * 100
                 self.air_time += time.dt * .25 * self.gravity
-        
+        self._prev_position = self.position
+
+    def update(self) -> None:
+        # Look via right joystick
+        if self.use_touch:
+            rot = joystick_look.value
+            yaw_gain   = 100
+            pitch_gain = 100
+            self.rotation_y += rot.x * time.dt * yaw_gain
+            self.camera_pivot.rotation_x = clamp(
+                self.camera_pivot.rotation_x - rot.y * time.dt * pitch_gain,
+                -90,
+                90
+            )
+        else:
+            # Mouse look (only when locked)
+            if mouse.locked:
+                self.rotation_y += mouse.velocity[0] * self.mouse_sensitivity[1]
+                self.camera_pivot.rotation_x -= mouse.velocity[1] * self.mouse_sensitivity[0]
+                self.camera_pivot.rotation_x = clamp(self.camera_pivot.rotation_x, -90, 90)
+
         displacement = self.velocity.length()  # speed player is trying to move
 
         if self.grounded and displacement > 0.01:  # only bob if actually moved
@@ -412,7 +523,6 @@ class FirstPersonController(Entity, HealthMixin):
         else:
             # Smoothly return camera to original position
             camera.position = lerp(camera.position, self.camera_original_pos, time.dt * 8)
-        self._prev_position = self.position
 
         # Apply recoil recovery
         if self.recoil_pitch != 0 or self.recoil_yaw != 0:
@@ -424,12 +534,32 @@ class FirstPersonController(Entity, HealthMixin):
             self.camera_pivot.rotation_x -= self.recoil_pitch
             self.rotation_y       += self.recoil_yaw
         
-        # Smoothly adjust crosshair spread based on recoil
-        self.crosshair.shoot_offset = self.recoil_pitch * 0.05
+        # Crosshair spreads with movement and recoil (it only animates while this changes)
+        self.crosshair.set_spread(displacement * self.crosshair.reticle_distance + self.recoil_pitch * 0.05)
+
+    def _raycast(self, origin, direction, distance=9999):
+        """Collision ray against the static world index (and bots), or the whole scene if no index is set."""
+        if self.collision_index:
+            return self.collision_index.raycast(
+                origin,
+                direction,
+                distance=distance,
+                ignore=self.ignore_list,
+                bodies=True
+            )
+        return raycast(
+            origin,
+            direction,
+            distance=distance,
+            traverse_target=self.traverse_target,
+            ignore=self.ignore_list
+        )
 
-        if self.damage_overlay.color.a > 0:
-            new_alpha = max(0, self.damage_overlay.color.a - time.dt)
-            self.damage_overlay.color = color.rgba(255, 0, 0, new_alpha)
+    def _ground_ray(self, origin):
+        """Floor below origin from the baked heightfield, raycasting only where it can't answer."""
+        if self.height_field:
+            return self.height_field.ground(origin, ignore=self.ignore_list, bodies=True)
+        return self._raycast(origin, self.down)
 
     def input(self, key: str) -> None:
         # Toggle touch controls
@@ -478,18 +608,12 @@ class FirstPersonController(Entity, HealthMixin):
             self.shoot()
 
     def jump(self) -> None:
-        """Animate a jump if grounded."""
+        """Start a jump if grounded; fixed_update() raises the player along the curve."""
         if not self.grounded:
             return
-        self.grounded = False
-        seq=self.animate_y(
-            self.y + self.jump_height,
-            self.jump_up_duration,
-            resolution=int(1 // time.dt),
-            curve=curve.out_expo
-        )
-        sequences.append(seq)
-        invoke(self.start_fall, delay=self.fall_after)
+        self.grounded    = False
+        self.jump_timer  = 0.0
+        self.jump_base_y = None
 
     def start_fall(self) -> None:
         """Begin manual gravity animation after jump peak."""
@@ -505,49 +629,41 @@ class FirstPersonController(Entity, HealthMixin):
         if not self.gun:
             return
         # Firing rate limit (cooldown)
-        if hasattr(self, '_next_fire_time') and time.time() < self._next_fire_time:
+        if hasattr(self, '_next_fire_time') and game_time() < self._next_fire_time:
             return
-        self._next_fire_time = time.time() + 0.25  # 0.25s cooldown
+        self._next_fire_time = game_time() + 0.25  # 0.25s cooldown
         gunshot.play()
         self.gun.blink(color.gray)
         self.recoil_pitch += self.recoil_amount.x
         self.recoil_yaw   += random.uniform(-self.recoil_amount.y, self.recoil_amount.y)
-        # Raycast for hit detection
-        hit = raycast(
-            camera.world_position,
-            camera.forward,
-            distance=100,
-            traverse_target=scene,
-            ignore=[self, self.gun]
+        # A pooled bullet from the gun towards the crosshair; the projectile sweep
+        # tests it against the walls and every live bot, and bullet_hit() does the damage
+        aim = camera.world_position + camera.forward * self.aim_distance
+        projectiles.spawn(
+            self.gun.world_position,
+            aim - self.gun.world_position,
+            speed=50,
+            owner=self,
+            life=2,
+            max_range=100,
+            collide=True,
+            targets=tuple(b for b in ai_bots if b.enabled and getattr(b, 'alive', False)),
+            hit_radius=.4,
+            on_hit=self.bullet_hit
         )
-        bullet = Entity(
-            parent=self.gun,
-            model='cube',
-            scale=0.2,
-            position=(0.2, 0.1, 0),
-            color=color.gold,
-            name='player_bullet'
-        )
-        bullet.world_parent = scene
-        seq=bullet.animate_position(
-            bullet.position + (camera.forward * 50),
-            curve=curve.linear,
-            duration=1
-        )
-        sequences.append(seq)
-        destroy(bullet, delay=1)
-        if hit.hit:
-            target = hit.entity
-            if hasattr(target, 'take_damage'):
-                target.take_damage(50)
+
+    def bullet_hit(self, projectile, entity, point):
+        """on_hit callback for the player's bullets."""
+        if entity is not None and hasattr(entity, 'take_damage'):
+            entity.take_damage(50)
 
     def take_damage(self, amount):
         super().take_damage(amount)
         if hasattr(self, 'health_bar'):
             self.health_bar.value = self.health
 
-        # Flash the red overlay
-        self.damage_overlay.color = color.rgba(255, 0, 0, 0.3)
+        # Flash the red overlay, fading out over .3 s
+        effects.tween_color(self.damage_overlay, color.rgba(255, 0, 0, 0.3), color.rgba(255, 0, 0, 0), .3)
 
     def die(self):
         print("Player died!")
@@ -555,7 +671,7 @@ class FirstPersonController(Entity, HealthMixin):
         global player_alive
         player_alive = False
         destroy(self)  # Remove player entity
-        Text("Game Over", origin=(0,0), scale=3, color=color.red, parent=camera.ui)
+        registry.add(Text("Game Over", origin=(0,0), scale=3, color=color.red, parent=camera.ui), 'hud')
         invoke(game_over, delay=1)  # Delay to allow last frame effects (e.g. sounds)
 
 class DummyTarget(Entity, HealthMixin):
@@ -569,63 +685,33 @@ class DummyTarget(Entity, HealthMixin):
             **kwargs
         )
         HealthMixin.__init__(self, health=100)
+        registry.add(self, 'bots')
         self.spawn_point = self.position
+        self.hit_capsule = (-.6, .6)   # with the player's .4 bullet radius, the 2-unit-tall box
         self.visible = True
         self.enabled = True
 
-        self.health_bar = HealthBar(
-            max_value=100,
-            value=100,
-            scale=(.3, .02),
-            bar_color=color.red.tint(-.2),
-            roundness=.5,
-            show_text=False,
-            parent=self
-        )
-        self.health_bar.x = 0.1
-        self.health_bar.y = 1  # position it above the target
-        # self.health_bar.z = -0.01  # prevent z-fighting
-        self.health_bar.billboard=True
+        # Drawn by the shared health-bar layer, above the target while it is hurt
+        health_bars.add(self, max_health=100, offset=2)
 
         self.original_color = self.color
-        self.flash_intensity = 0  # 0 means normal, 1 means fully red
 
     def take_damage(self, amount):
         if not self.enabled:             # ignore damage if already “dead”
             return
         super().take_damage(amount)
-        # only update the bar if it still exists in the scene graph
-        try:
-            if hasattr(self, 'health_bar') and self.health_bar and self.health_bar.enabled:
-                self.health_bar.value = self.health
-        except AssertionError as e:
-            # health_bar node no longer valid—ignore
-            print(f"Health bar error: {e}")
-            pass
-
-        # Flash effect
-        self.flash_intensity = 1  # trigger full flash
-
-    def update(self):
-        if self.flash_intensity > 0:
-            # Gradually reduce flash intensity
-            self.flash_intensity = max(0, self.flash_intensity - time.dt * 2)  # fade speed
-            # Blend between red and original color
-            self.color = color.rgb32(
-                lerp(255, self.original_color[0]*255, 1 - self.flash_intensity),
-                lerp(0,   self.original_color[1]*255, 1 - self.flash_intensity),
-                lerp(0,   self.original_color[2]*255, 1 - self.flash_intensity)
-            )
+
+        # Flash effect: fully red, back to the original color over .5 s
+        if self.enabled:
+            effects.tween_color(self, color.red, self.original_color, .5)
     
     def die(self):
         print(f'{self} died.')
         # remove the entire entity (model, collider, children, etc.)
         destroy(self)
         # if you had any generic respawning here, drop it
-        # also destroy any bullets that are children or tracked globally
-        for b in scene.entities:
-            if isinstance(b, Entity) and getattr(b, 'collider', None) == 'box' and b.model.name == 'cube':
-                destroy(b)
+        # also recall the bullets this target fired
+        projectiles.release_owned(self)
 
 class AIBot(DummyTarget):
     def __init__(self, patrol_area=(10, 10), chase_range=5, speed = 1, **kwargs):
@@ -649,11 +735,13 @@ class AIBot(DummyTarget):
         )
 
         self.target_pos = self.get_valid_ground_position()
-        self.update_task = invoke(self.patrol, delay=1)
-        ai_bots.append(self)
-        bot_tasks.append(self.update_task)
+        ai_manager.add(self, delay=1)
+        sim_clock.interpolate(self)
 
-    def patrol(self):
+    def patrol(self, dt=None):
+        """One AI tick; called by ai_manager with the time since this bot's last tick."""
+        if dt is None:
+            dt = time.dt
         if not getattr(self, 'enabled', False) or not getattr(self, 'alive', False):
             return
         if not self.alive:
@@ -671,28 +759,36 @@ class AIBot(DummyTarget):
             if distance(self.position, self.target_pos) < 0.5:
                 self.target_pos = self.get_valid_ground_position()
 
-        move_dir = (self.target_pos - self.position).normalized()
+        # Chasing bots steer along the shared A* path around houses and walls
+        steer_pos = self.target_pos
+        if self.is_chasing:
+            waypoint = path_service.next_waypoint(self.position, player.position)
+            if waypoint is not None:
+                steer_pos = waypoint
+        move_dir = (steer_pos - self.position).normalized()
 
         # 2. Wall detection
-        front_ray = raycast(
-            self.position + Vec3(0, 0.5, 0),
-            move_dir,
-            distance=0.6,
-            ignore=[self],
-            traverse_target=scene
-        )
-        if front_ray.hit and not self.is_chasing:
-            # print("Wall ahead. Choosing new target.")
-            self.target_pos = self.get_valid_ground_position()
-            move_dir = (self.target_pos - self.position).normalized()
-            # Recalculate front ray with new direction
-            front_ray = raycast(
+        with ray_stats.measure('bot.patrol_front'):
+            front_ray = world_index.raycast(
                 self.position + Vec3(0, 0.5, 0),
                 move_dir,
                 distance=0.6,
                 ignore=[self],
-                traverse_target=scene
+                bodies=True
             )
+        if front_ray.hit and not self.is_chasing:
+            # print("Wall ahead. Choosing new target.")
+            self.target_pos = self.get_valid_ground_position()
+            move_dir = (self.target_pos - self.position).normalized()
+            # Recalculate front ray with new direction
+            with ray_stats.measure('bot.patrol_front'):
+                front_ray = world_index.raycast(
+                    self.position + Vec3(0, 0.5, 0),
+                    move_dir,
+                    distance=0.6,
+                    ignore=[self],
+                    bodies=True
+                )
 
         # 3. Avoid player and other bots
         blocked = False
@@ -705,15 +801,11 @@ class AIBot(DummyTarget):
 
         # 4. Move if clear
         if not blocked and not front_ray.hit:
-            self.position += move_dir * self.speed * time.dt
+            self.position += move_dir * self.speed * dt
 
         # 5. Keep grounded
-        down_ray = raycast(
-            self.position + Vec3(0, 0.5, 0),
-            direction=Vec3(0, -1, 0),
-            ignore=[self],
-            traverse_target=scene
-        )
+        with ray_stats.measure('bot.patrol_down'):
+            down_ray = height_field.ground(self.position + Vec3(0, 0.5, 0), ignore=[self])
         if down_ray.hit:
             self.y = down_ray.world_point.y + 1
 
@@ -724,121 +816,69 @@ class AIBot(DummyTarget):
             self.rotation_z = 0
             self.shoot()
 
-        self.update_task = invoke(self.patrol, delay=0.1)
-
-    def get_valid_ground_position(self, max_attempts=10):
-        for _ in range(max_attempts):
-            x = random.uniform(-self.patrol_area[0], self.patrol_area[0])
-            z = random.uniform(-self.patrol_area[1], self.patrol_area[1])
-            test_pos = Vec3(x, 20, z)
-            # print(f"Trying position: ({x}, 20, {z})")
-            ground_ray = raycast(
-                test_pos,
-                direction=Vec3(0, -1, 0),
-                distance=50,
-                ignore=[self],
-                traverse_target=scene
-            )
-            # print(f"Ground ray: {ground_ray}")
-            # print(f"Ground ray hit: {ground_ray.hit}, world point: {ground_ray.world_point}")
-            if ground_ray.hit:
-                y = ground_ray.world_point.y + 1
-                # print(f"Valid ground found at: ({x}, {y}, {z})")
-                return Vec3(x, y, z)
-        print("Failed to find valid ground. Returning origin.")
-        print(f"Last attempted position: ({x}, 20, {z})")
-        return Vec3(0, 2, 0)
-    
+    def get_valid_ground_position(self):
+        """Random walkable point inside the patrol area, drawn from the baked nav grid."""
+        p = nav_grid.random_point(
+            -self.patrol_area[0], -self.patrol_area[1],
+             self.patrol_area[0],  self.patrol_area[1]
+        )
+        if p is None:
+            return Vec3(self.position)
+        return Vec3(p.x, p.y + 1, p.z)  # bot origin sits 1 unit above the surface
+
     def shoot(self):
-        if not self.alive or not player or not self.enabled or time.time() < self._next_fire_time:
+        if not self.alive or not player or not self.enabled or game_time() < self._next_fire_time:
             return
         
-        self._next_fire_time = time.time() + self.fire_interval
+        self._next_fire_time = game_time() + self.fire_interval
         gunshot.play()
 
         # Raycast toward player
         dir_to_player = (player.position - self.position).normalized()
         eye_pos = self.position + Vec3(-.1, .5, .3)  # AI eye height
 
-        bullet = Entity(
-            model='cube',
-            color=color.gold,
-            scale=0.2,
-            position=eye_pos,
-            collider='box',
+        # Tracer from the shared pool; contact damage is applied in bullet_hit()
+        projectiles.spawn(
+            eye_pos,
+            player.position - eye_pos,
             speed=30,
-            name='ai_bullet'
+            owner=self,
+            life=3,
+            max_range=50,
+            collide=True,
+            targets=(player,),
+            hit_radius=.5,
+            on_hit=self.bullet_hit
         )
-        bullet.world_parent = scene
-        # Make the bullet face the direction to player
-        bullet.look_at(player.position)
-
-        def bullet_update(b=bullet):
-            if not b or not b.enabled:
-                return
-            # Check if player exists and is not destroyed
-            if not player or not hasattr(player, 'position') or player in scene.entities and player.enabled == False:
-                destroy(b)
-                return
-            # Check if AI (self) still exists and is enabled
-            if not self or not hasattr(self, 'position') or not self.enabled:
-                destroy(b)
-                return
-            # Raycast ahead of the bullet's current path
-            hit_info = raycast(
-                origin=b.position,
-                direction=b.forward,
-                distance=b.speed * time.dt,
-                ignore=[b, self] + ai_bots,
-                traverse_target=scene
+
+        with ray_stats.measure('bot.shoot_los'):
+            hit = world_index.raycast(
+                eye_pos,
+                dir_to_player,
+                distance=50,
+                ignore=[self],
+                bodies=True
             )
-            if hit_info.hit:
-                if hit_info.entity == player:
-                    if hasattr(player, 'take_damage'):
-                        player.take_damage(10)
-                    print("Bullet hit the player")
-                else:
-                    print(f"Bullet hit: {hit_info.entity}")
-                destroy(b)
-                return
-            b.position += b.forward * b.speed * time.dt
-
-            # Check bullet proximity to player safely
-            if player and hasattr(player, 'position') and distance(b.position, player.position) < 1.0:
-                if hasattr(player, 'take_damage'):
-                    player.take_damage(10)
-                destroy(b)
-                return
-
-            # Check if bullet is too far from AI
-            if self and hasattr(self, 'position') and distance(b.position, self.position) > 50:
-                destroy(b)
-                return
-
-        bullet.update = bullet_update
-
-        hit = raycast(
-            origin=eye_pos,
-            direction=dir_to_player,
-            distance=50,
-            ignore=[self],
-            traverse_target=scene
-        )
 
         if hit.hit and hit.entity == player:
             print(f"{self} shot the player!")
             player.take_damage(10)
-            self._next_fire_time = time.time() + self.fire_interval
+            self._next_fire_time = game_time() + self.fire_interval
     
+    def bullet_hit(self, projectile, entity, point):
+        """on_hit callback for this bot's bullets."""
+        if entity is not None and entity == player:
+            if hasattr(player, 'take_damage'):
+                player.take_damage(10)
+            print("Bullet hit the player")
+        else:
+            print(f"Bullet hit: {entity}")
+
     def die(self):
         print(f'{self} died.')
         super().die()
-        # stop its patrol task
-        if hasattr(self, 'update_task'):
-            self.update_task.pause()
-        # remove from our global lists
-        if self in ai_bots:      ai_bots.remove(self)
-        if self.update_task in bot_tasks:  bot_tasks.remove(self.update_task)
+        # stop ticking it
+        ai_manager.remove(self)
         # destroy this instance
         destroy(self)
         # spawn a brand-new bot after 3 seconds at the same spawn_point
@@ -849,9 +889,18 @@ class AIBot(DummyTarget):
         #     position=self.spawn_point
         # ), delay=3)
         if game_started and player_alive and len(ai_bots) == 0:
-            Text("You Win!", origin=(0,0), scale=3, color=color.green, parent=camera.ui)
+            registry.add(Text("You Win!", origin=(0,0), scale=3, color=color.green, parent=camera.ui), 'hud')
             quit_to_main_menu()
 
+# Profiling mode (ECHOES_PROFILE=1): update() and fixed_update() time per class, bot ticks and invoke()d callbacks as spans
+profiler.instrument(FirstPersonController, methods=('update', 'fixed_update'))
+profiler.instrument(AIBot, methods=('patrol', 'shoot'))
+profiler.instrument(AIManager, ProjectilePool, TouchLayer)
+profiler.instrument(HealthBarLayer, methods=('update_bars',))
+profiler.instrument(EffectManager)
+profiler.instrument(SimClock, methods=('advance',))
+invoke = profiler.wrap_invoke(invoke)
+
 def show_main_menu():
     global main_menu, menu_background
 
@@ -874,8 +923,9 @@ def show_main_menu():
         scale=(2, 1),  # Full screen
         z=1  # Send it to back (higher z = farther back in UI)
     )
+    registry.add(menu_background, 'menus')
     
-    main_menu = Entity(name="main_menu", parent=camera.ui)
+    main_menu = registry.add(Entity(name="main_menu", parent=camera.ui), 'menus')
 
     Text(name="main_menu_title", text="Main Menu", scale=2, x=-0.125, y=0.4, parent=main_menu)
 
@@ -906,12 +956,15 @@ def show_main_menu():
         on_click=application.quit
     )
 
+    # Speculatively load the round while the menu sits idle (after its first frame is up)
+    invoke(prefetch_round, delay=.5)
+
 def show_pause_menu():
     global pause_menu
 
     print("Showing pause menu...")
 
-    pause_menu = Entity(name="pause_menu", parent=camera.ui)
+    pause_menu = registry.add(Entity(name="pause_menu", parent=camera.ui), 'menus')
 
     Text(name="pause_menu_title", text="Paused", scale=2, x=-0.1, y=0.3, parent=pause_menu)
 
@@ -957,15 +1010,16 @@ def start_singleplayer():
     # Reset the “am I alive?” flag
     player_alive = True
 
-    # Clean up old bots & tasks
-    for t in bot_tasks:
-        print(f"Finishing bot task before starting singleplayer: {t}")
-        t.finish()
-    bot_tasks.clear()
+    # Clean up old bots and bullets
+    projectiles.clear()
     for b in ai_bots:
         print(f"Destroying AI bot before starting singleplayer: {b}")
         destroy(b)
-    ai_bots.clear()
+    ai_manager.clear()
+    health_bars.clear()
+    effects.clear()
+    touch_layer.clear()
+    sim_clock.clear()
     for seq in sequences:
         print(f"Finishing sequence before starting singleplayer: {seq}")
         if isinstance(seq, Sequence):
@@ -978,7 +1032,13 @@ def start_singleplayer():
     destroy(menu_background)
 
     game_started = True
-    setup_game()  # existing function that sets up map, player, bots, etc.
+    # Map, player, bots, etc. a stage per frame behind a progress bar; headless runs build it at once
+    if HEADLESS:
+        load_gameplay()
+        level_loader.load(setup_game(), background=False)
+    else:
+        prefetch_round()
+        level_loader.load(setup_game())
 
 def pause_game():
 
@@ -1018,7 +1078,7 @@ def quit_to_main_menu():
 
         print("cleaning up the scene...")
 
-        global player, bot_tasks, ai_bots, sequences, pause_menu, main_menu, menu_background
+        global player, ai_bots, sequences, pause_menu, main_menu, menu_background
 
         # 1) Pause the app to stop new tasks/animations
         application.pause()
@@ -1031,43 +1091,17 @@ def quit_to_main_menu():
                 seq.finish()
         sequences.clear()
 
-        # 3) Finish any lingering bot or AI tasks
-        for t in list(bot_tasks):
-            # if not t:
-            #     continue
-
-            # # If it's a Sequence, just finish it
-            # if isinstance(t, Sequence):
-            #     print(f"Finishing bot Sequence before quitting to main menu: {t}")
-            #     try:
-            #         t.finish()
-            #     except Exception as e:
-            #         print(f"Could not finish Sequence {t}: {e}")
-            #     continue
-
-            # # If it's some other task-like object with .finish
-            # if hasattr(t, 'finish'):
-            #     print(f"Finishing bot task before quitting to main menu: {t}")
-            #     try:
-            #         t.finish()
-            #     except Exception as e:
-            #         print(f"Could not finish bot task {t}: {e}")
-            print(f"Finishing bot task before quiting to main menu: {t}")
-            t.finish()
-        bot_tasks.clear()
-
-        # 4) Destroy every AI bot instance
-        for b in list(ai_bots):
-            # if not b:
-            #     continue
-            # try:
-            #     print(f"Destroying AI bot before quitting to main menu: {b}")
-            #     destroy(b)
-            # except Exception as e:
-            #     print(f"Could not destroy AI bot {b}: {e}")
-            print(f"Destroying AI bot before quiting to main menu: {b}")
-            destroy(b)
-        ai_bots.clear()
+        # 3) Stop ticking AI and recall bullets (neither lives in scene.entities)
+        ai_manager.player = None
+        projectiles.clear()
+
+        # 4) Destroy every AI bot / target instance
+        registry.destroy_kind('bots')
+        ai_manager.clear()
+        health_bars.clear()
+        effects.clear()
+        touch_layer.clear()
+        sim_clock.clear()
 
         # 5) Destroy the player (and its entire sub‐hierarchy)
         if player:
@@ -1075,24 +1109,11 @@ def quit_to_main_menu():
             destroy(player)
             player = None
 
-        # 6) Destroy *every* entity in the main scene
-        # (this hits ground, buildings, walls, bullets, etc.)
-        lst = list(scene.entities)
-        for e in lst:
-            if e:
-                print(f"Destroying scene entity before quiting to main menu: {e}")
-                destroy(e)
-            # print(f"Destroying scene entity before quiting to main menu: {e}")
-            # destroy(e)
-
-        # 7) Destroy *every* UI element under camera.ui
-        lst1 = list(camera.ui.children)
-        for e in lst1:
-            if e:
-                print(f"Destroying UI element before quiting to main menu: {e}")
-                destroy(e)
-            # print(f"Destroying UI element before quiting to main menu: {e}")
-            # destroy(e)
+        # 6) Destroy the level (ground, buildings, walls, gun pickup)
+        registry.destroy_kind('world')
+
+        # 7) Destroy the HUD (touch controls, health bar, crosshair, messages)
+        registry.destroy_kind('hud')
 
         # 8) Destroy any remaining sky instances & lights
         lst2 = list(Sky.instances)
@@ -1106,13 +1127,7 @@ def quit_to_main_menu():
         Sky.instances.clear()
 
         # 9) Teardown menus or background if somehow left
-        for ui_root in (main_menu, menu_background, pause_menu):
-            # if ui_root and not ui_root.destroyed:
-            #     print(f"Destroying UI root before quiting to main menu: {ui_root}")
-            #     destroy(ui_root)
-            if ui_root:
-                print(f"Destroying UI root before quiting to main menu: {ui_root}")
-                destroy(ui_root)
+        registry.destroy_kind('menus')
 
         main_menu = None
         menu_background = None
@@ -1120,8 +1135,7 @@ def quit_to_main_menu():
 
         # 10) Clear any leftover application state
         sequences.clear()
-        bot_tasks.clear()
-        ai_bots.clear()
+        ai_manager.clear()
 
         # 11) Un‐pause so input works again, then show the menu
         application.resume()
@@ -1142,25 +1156,17 @@ def game_over():
         except Exception as e:
             print(f"Could not disable pause_button: {e}")
 
-    # cancel all bot‑patrol invokes
-    # for t in bot_tasks:
-    for t in list(bot_tasks):
-        print(f"Finishing bot task before game over: {t}")
-        t.finish()
-    bot_tasks.clear()
+    # stop ticking AI and recall bullets
+    ai_manager.player = None
+    projectiles.clear()
 
     # destroy remaining bots
-    for b in ai_bots:
-        # if b and not b.alive:
-        #     print(f"Destroying AI bot before game over: {b}")
-        #     if hasattr(b, 'children'):
-        #         for child in list(b.children):
-        #             print(f"Destroying child of AI bot before game over: {child}")
-        #             destroy(child)
-        #     destroy(b)
-        print(f"Destroying AI bot before game over: {b}")
-        destroy(b)
-    ai_bots.clear()
+    registry.destroy_kind('bots')
+    ai_manager.clear()
+    health_bars.clear()
+    effects.clear()
+    touch_layer.clear()
+    sim_clock.clear()
 
     # cancel all animations
     # for item in sequences:
@@ -1171,49 +1177,62 @@ def game_over():
             item.finish()
     sequences.clear()
 
-    # Destroy all scene entities except the camera and UI
-    # for e in list(scene.entities):
-    #     if isinstance(e, Entity) and hasattr(e, 'alive') and e.alive and not camera:
-    #         print(f"Destroying scene entity before game over: {e}")
-    #         if hasattr(e, 'children'):
-    #             for child in list(e.children):
-    #                 print(f"Destroying child of scene entity before game over: {child}")
-    #                 destroy(child)
-    #         destroy(e)
-    for e in scene.entities:
-        print(f"Destroying scene entity before game over: {e}")
-        destroy(e)
+    # Destroy the level and whatever is left of the player
+    registry.destroy_kind('player', 'world')
 
     # Clear UI except pause button (optional)
-    # for e in list(camera.ui.children):
-    #     if (e and e != pause_button and hasattr(e, 'alive') and e.alive):
-    for e in camera.ui.children:
-        if e != pause_button:
-            print(f"Destroying UI element before game over: {e}")
-            if hasattr(e, 'children'):
-                for child in list(e.children):
-                    print(f"Destroying child of UI element before game over: {child}")
-                    destroy(child)
-            destroy(e)
+    registry.destroy_kind('hud', 'menus', keep=(pause_button,))
 
     show_main_menu()
 
 def setup_game():
-    global player, pause_button
+    """
+    Build a round in stages, yielding (label, progress) before each one so
+    level_loader can spread them over frames behind its progress bar:
+      1. The static world, then its spatial index and nav grid, then the
+         heightfield and the merged draw nodes.
+      2. Everything that moves or is touched (player, HUD, gun, bots) in
+         the last stage, so nothing updates against a half-built world.
+    """
+    global player, pause_button, world_index, nav_grid, path_service, height_field
     global joystick_move, joystick_look, button_jump, button_shoot
 
     print("setting up game...")
 
-    # Instantiate touch controls
-    joystick_move  = VirtualJoystick(name="joystick_move", position=(-.7, -.3))
-    joystick_look  = VirtualJoystick(name="joystick_look", position=( .3, -.3))
-    button_jump    = VirtualButton(name="button_jump", input='gamepad a', position=( .6, -.1), color=color.lime)
-    button_shoot   = VirtualButton(name="button_shoot", input='gamepad x', position=( .8, -.2), color=color.red)
+    # Add environment: ground, step-ups, houses and walls come from assets/arena.json
+    yield 'Building the arena...', .2
+    static_world = build_level(arena_level)
+    for e in static_world:
+        registry.add(e, 'world')
+
+    # Index the non-moving colliders once so rays only visit the cells they cross
+    yield 'Mapping paths...', .4
+    world_index = SpatialIndex(static_world, boxes=arena_level.boxes)
+    nav_grid = NavGrid(world_index)
+    path_service = PathService(nav_grid)
+
+    yield 'Baking terrain...', .6
+    height_field = HeightField(world_index)
+
+    # Draw the static pieces as a few merged nodes; the originals keep their colliders
+    for group in flatten_static(static_world):
+        registry.add(group, 'world')
 
-    pause_button = Button(name="pause_button", texture='cog', scale=(.08, .08), position=(-0.85, 0.45), origin=(-0.5, 0.5), parent=camera.ui, color=color.gray, on_click=pause_game)
+    yield 'Spawning players...', .8
+    # Instantiate touch controls; touch_layer lays them out on resize and feeds them pointers
+    touch_layer.clear()
+    joystick_move  = registry.add(touch_layer.add(VirtualJoystick(name="joystick_move", position=(-.7, -.3))), 'hud')
+    joystick_look  = registry.add(touch_layer.add(VirtualJoystick(name="joystick_look", position=( .3, -.3))), 'hud')
+    button_jump    = registry.add(touch_layer.add(VirtualButton(name="button_jump", key_name='gamepad a', position=( .6, -.1), color=color.lime)), 'hud')
+    button_shoot   = registry.add(touch_layer.add(VirtualButton(name="button_shoot", key_name='gamepad x', position=( .8, -.2), color=color.red)), 'hud')
+
+    pause_button = CornerButton(name="pause_button", texture='cog', scale=(.08, .08), color=color.gray, on_click=pause_game)
+    registry.add(touch_layer.add(pause_button), 'hud')
 
     # Player and gun setup
-    player = FirstPersonController(y=2, origin_y=-.5)
+    player = registry.add(FirstPersonController(position=arena_level.player_spawn, origin_y=-.5), 'player')
+    sim_clock.interpolate(player)
+    ai_manager.player = player
     
     # Touch controls
     joystick_move.visible = player.use_touch
@@ -1227,55 +1246,12 @@ def setup_game():
 
     pause_button.enabled = True
 
-    # Add environment
-    ground = Entity(name="ground", model='cube', scale=(30, 1, 30), color=color.rgb(0.9294117647058824, 0.7882352941176471, 0.6862745098039216), texture='white_cube', texture_scale=(30, 30), collider='box')
-    stepup1 = Entity(name="stepup1", model='cube', scale=(1, 1, 1), position=(1, 1, 0), color=color.gray, collider='box')
-    stepup2 = Entity(name="stepup2", model='cube', scale=(1, 1, 1), position=(2, 2, 0), color=color.gray, collider='box')
-
-    house1 = Entity(name="house1", model='assets/building_01.gltf', position=(-4, 0.5, -4), rotation=(0, 0, 0), scale=(1, 1, 1), collider='box')
-    house2 = Entity(name="house2", model='assets/building_01.gltf', position=( 4, 0.5, -4), rotation=(0, 0, 0), scale=(1, 1, 1), collider='box')
-    house3 = Entity(name="house3", model='assets/building_01.gltf', position=(-4, 0.5,  4), rotation=(0, 0, 0), scale=(1, 1, 1), collider='box')
-    house4 = Entity(name="house4", model='assets/building_01.gltf', position=( 4, 0.5,  4), rotation=(0, 0, 0), scale=(1, 1, 1), collider='box')
-
-    # ──────────────── Top Wall (North) ────────────────
-    wall_n1 = Entity(name="wall_n1", model='assets/wall_03.gltf', position=(-10, 0.5, 15), rotation=(0, 0, 0), scale=1, collider='box')
-    wall_n2 = Entity(name="wall_n2", model='assets/wall_03.gltf', position=(  0, 0.5, 15), rotation=(0, 0, 0), scale=1, collider='box')
-    wall_n3 = Entity(name="wall_n3", model='assets/wall_03.gltf', position=( 10, 0.5, 15), rotation=(0, 0, 0), scale=1, collider='box')
-
-    # ──────────────── Bottom Wall (South) ────────────────
-    wall_s1 = Entity(name="wall_s1", model='assets/wall_03.gltf', position=(-10, 0.5, -15), rotation=(0, 0, 0), scale=1, collider='box')
-    wall_s2 = Entity(name="wall_s2", model='assets/wall_03.gltf', position=(  0, 0.5, -15), rotation=(0, 0, 0), scale=1, collider='box')
-    wall_s3 = Entity(name="wall_s3", model='assets/wall_03.gltf', position=( 10, 0.5, -15), rotation=(0, 0, 0), scale=1, collider='box')
-
-    # ──────────────── Left Wall (West) ────────────────
-    wall_w1 = Entity(name="wall_w1", model='assets/wall_03.gltf', position=(-15, 0.5, -10), rotation=(0, 90, 0), scale=1, collider='box')
-    wall_w2 = Entity(name="wall_w2", model='assets/wall_03.gltf', position=(-15, 0.5,   0), rotation=(0, 90, 0), scale=1, collider='box')
-    wall_w3 = Entity(name="wall_w3", model='assets/wall_03.gltf', position=(-15, 0.5,  10), rotation=(0, 90, 0), scale=1, collider='box')
-
-    # ──────────────── Right Wall (East) ────────────────
-    wall_e1 = Entity(name="wall_e1", model='assets/wall_03.gltf', position=(15, 0.5, -10), rotation=(0, 90, 0), scale=1, collider='box')
-    wall_e2 = Entity(name="wall_e2", model='assets/wall_03.gltf', position=(15, 0.5,   0), rotation=(0, 90, 0), scale=1, collider='box')
-    wall_e3 = Entity(name="wall_e3", model='assets/wall_03.gltf', position=(15, 0.5,  10), rotation=(0, 90, 0), scale=1, collider='box')
-
-    # ──────────────── North Flank Walls (between top wall and top houses) ────────────────
-    north_fw1 = Entity(name="north_fw1", model='assets/wall_01.gltf', position=(-6, 0.5, 10), rotation=(0, 0, 0), scale=1, collider='box')
-    north_fw2 = Entity(name="north_fw2", model='assets/wall_01.gltf', position=( 0, 0.5, 11), rotation=(0, 0, 0), scale=1, collider='box')  # middle slightly forward
-    north_fw3 = Entity(name="north_fw3", model='assets/wall_01.gltf', position=( 6, 0.5, 10), rotation=(0, 0, 0), scale=1, collider='box')
-
-    # ──────────────── South Flank Walls (between bottom wall and bottom houses) ────────────────
-    south_fw1 = Entity(name="south_fw1", model='assets/wall_01.gltf', position=(-6, 0.5, -10), rotation=(0, 0, 0), scale=1, collider='box')
-    south_fw2 = Entity(name="south_fw2", model='assets/wall_01.gltf', position=( 0, 0.5, -11), rotation=(0, 0, 0), scale=1, collider='box')  # middle forward
-    south_fw3 = Entity(name="south_fw3", model='assets/wall_01.gltf', position=( 6, 0.5, -10), rotation=(0, 0, 0), scale=1, collider='box')
-
-    # ──────────────── West Flank Walls (between left wall and left houses) ────────────────
-    west_fw1 = Entity(name="west_fw1", model='assets/wall_01.gltf', position=(-10, 0.5, -6), rotation=(0, 90, 0), scale=1, collider='box')
-    west_fw2 = Entity(name="west_fw2", model='assets/wall_01.gltf', position=(-11, 0.5,  0), rotation=(0, 90, 0), scale=1, collider='box')  # middle pushed left
-    west_fw3 = Entity(name="west_fw3", model='assets/wall_01.gltf', position=(-10, 0.5,  6), rotation=(0, 90, 0), scale=1, collider='box')
-
-    # ──────────────── East Flank Walls (between right wall and right houses) ────────────────
-    east_fw1 = Entity(name="east_fw1", model='assets/wall_01.gltf', position=(10, 0.5, -6), rotation=(0, 90, 0), scale=1, collider='box')
-    east_fw2 = Entity(name="east_fw2", model='assets/wall_01.gltf', position=(11, 0.5,  0), rotation=(0, 90, 0), scale=1, collider='box')  # middle pushed right
-    east_fw3 = Entity(name="east_fw3", model='assets/wall_01.gltf', position=(10, 0.5,  6), rotation=(0, 90, 0), scale=1, collider='box')
+    player.collision_index = world_index
+    player.height_field = height_field
+    ai_manager.world_index = world_index
+    ai_manager.path_service = path_service
+    ai_manager.height_field = height_field
+    projectiles.world_index = world_index
 
     player.health_bar = HealthBar(
         name="health_bar", 
@@ -1288,6 +1264,7 @@ def setup_game():
         show_text=True, 
         parent=camera.ui
     )
+    registry.add(player.health_bar, 'hud')
 
     # Gun pickup
     gun = Button(
@@ -1299,6 +1276,7 @@ def setup_game():
         scale=0.1, 
         color=color.gray.tint(-.2)
     )
+    registry.add(gun, 'world')
 
     gun.on_click = lambda: (
         setattr(gun, 'parent', camera),
@@ -1309,33 +1287,56 @@ def setup_game():
     )
 
     # ──────────────── AI Bots ────────────────
-
-    # Top left corner (free of houses/walls)
-    AIBot(position=(-10, 2, 10), patrol_area=(4, 4), chase_range=12, speed=1)
-
-    # Bottom right corner
-    AIBot(position=(10, 2, -10), patrol_area=(4, 4), chase_range=8, speed=1)
-
-    # Middle-left flank area
-    AIBot(position=(-10, 2, 0), patrol_area=(3, 5), chase_range=0, speed=1)
-
-    # Middle-right flank area
-    AIBot(position=(10, 2, 0), patrol_area=(3, 5), chase_range=4, speed=1)
-
-    # Bottom-center between houses and wall
-    AIBot(position=(0, 2, -12), patrol_area=(5, 3), chase_range=5, speed=1)
+    for bot in arena_level.bots:
+        AIBot(**bot)
 
     # Bind buttons
     button_jump.on_click = player.jump
     button_shoot.on_click = player.shoot
 
-    Sky()
+    # The sky follows the camera's far plane, which a windowless run doesn't have
+    if not HEADLESS:
+        Sky()
+
+def simulate():
+    """One fixed simulation tick (time.dt is the tick length)."""
+    if player and player.enabled:
+        player.fixed_update()
+    # Bound the bots and the player once for every ray cast this tick
+    if world_index:
+        world_index.update_bodies(ai_bots + [player])
+    # All bot AI runs from here, at distance-based rates
+    ai_manager.update()
+    # ...and every bullet in flight
+    projectiles.update()
 
 def update():
+    # The second frame closes the startup report
+    startup.frame()
+    # Close the previous frame's raycast stats and profile (no-ops unless enabled)
+    ray_stats.end_frame()
+    profiler.end_frame()
+    # A round being loaded advances one stage per frame
+    level_loader.update()
+    # Player movement, bot AI and bullets run in fixed ticks; the player and
+    # bots are then shown between their last two tick positions
+    sim_clock.advance(simulate)
+    # Every hurt target's health bar, as one mesh
+    health_bars.update_bars()
+    # ...and whatever flashes and fades are in progress
+    effects.update()
+    # Touch pointers held on the joysticks and buttons
+    touch_layer.update()
+
     if mouse.left and isinstance(mouse.hovered_entity, Button):
         return
     
     # print("mouse.hovered_entity :", mouse.hovered_entity)
 
-show_main_menu()
-app.run()
+update = profiler.wrap(update, 'update')
+
+# Headless runs (headless.py) drive the game themselves
+if not HEADLESS:
+    show_main_menu()
+    startup.mark('show_main_menu')
+    app.run()
@@ -0,0 +1,157 @@
+from headless import game_time
+from ursina import Vec3, camera
+from spatial_index import np, ray_aabb_batch
+from ray_stats import ray_stats
+
+
+class BotArrays:
+    """
+    Struct-of-arrays copy of the bot population for the vectorized AI pass:
+      1. Position, target, speed, chase range, chase flag and next fire time
+         live in NumPy arrays, one row per bot.
+      2. tick() runs distance-to-player, the chase/patrol switch, wall checks,
+         movement and grounding for every due bot in one pass.
+      3. Results are written back to the Entity transforms; only retargeting
+         on arrival and shooting fall back to per-bot Python calls.
+      4. Bots that are disabled or no longer alive are masked out each tick,
+         as in the per-bot loop: they neither move, ray-test nor block.
+
+    The arrays are authoritative while the manager runs in vectorized mode
+    and are rebuilt from the entities whenever a bot is added or removed.
+    """
+    def __init__(self, bots, manager):
+        self.bots    = list(bots)
+        self.manager = manager
+        n = len(self.bots)
+
+        self.position       = np.array([tuple(b.position) for b in self.bots], dtype=float).reshape(n, 3)
+        self.target_pos     = np.array([tuple(b.target_pos) for b in self.bots], dtype=float).reshape(n, 3)
+        self.speed          = np.array([b.speed for b in self.bots], dtype=float)
+        self.chase_range    = np.array([b.chase_range for b in self.bots], dtype=float)
+        self.is_chasing     = np.array([b.is_chasing for b in self.bots], dtype=bool)
+        self.next_fire_time = np.array([b._next_fire_time for b in self.bots], dtype=float)
+
+        # Scheduling state (see AIManager): seconds until next tick, time since last tick
+        self.wait    = np.array([b._ai_wait for b in self.bots], dtype=float)
+        self.elapsed = np.array([b._ai_elapsed for b in self.bots], dtype=float)
+
+    def store(self) -> None:
+        """Copy the per-bot state that only lives in the arrays back onto the entities."""
+        for i, bot in enumerate(self.bots):
+            bot._ai_wait        = float(self.wait[i])
+            bot._ai_elapsed     = float(self.elapsed[i])
+            bot._next_fire_time = float(self.next_fire_time[i])
+
+    def intervals(self, idx, dist):
+        """Vectorized AIManager.interval_for() for the bots in `idx`."""
+        m = self.manager
+        interval = np.where(dist <= m.far, m.mid_interval, m.far_interval)
+
+        to_bot = self.position[idx] - np.array(tuple(camera.world_position))
+        norm = np.linalg.norm(to_bot, axis=1)
+        norm[norm == 0] = 1
+        facing = (to_bot / norm[:, None]) @ np.array(tuple(camera.forward))
+        interval = np.where(facing < m.view_cos, m.hidden_interval, interval)
+
+        return np.where(dist <= np.maximum(m.near, self.chase_range[idx]), 0, interval)
+
+    def active(self):
+        """Mask of the bots the AI should run this tick (enabled and alive)."""
+        return np.array(
+            [bool(b.enabled) and bool(getattr(b, 'alive', False)) for b in self.bots],
+            dtype=bool
+        )
+
+    def tick(self, player, dt: float) -> None:
+        m = self.manager
+        active = self.active()
+        self.elapsed[active] += dt
+        self.wait[active]    -= dt
+        idx = np.nonzero(active & (self.wait <= 0))[0]
+        if len(idx) == 0:
+            return
+
+        pos  = self.position[idx]
+        pp   = np.array(tuple(player.position), dtype=float)
+        step = np.minimum(self.elapsed[idx], m.max_step)
+        self.elapsed[idx] = 0
+
+        # 1. Determine target: chase player or patrol
+        dist = np.linalg.norm(pos - pp, axis=1)
+        self.wait[idx] = self.intervals(idx, dist)
+
+        chasing = dist < self.chase_range[idx]
+        self.is_chasing[idx] = chasing
+        self.target_pos[idx[chasing]] = pp
+
+        arrived = ~chasing & (np.linalg.norm(self.target_pos[idx] - pos, axis=1) < .5)
+        for i in idx[arrived]:
+            self.target_pos[i] = tuple(self.bots[i].get_valid_ground_position())
+
+        move_dir = self.target_pos[idx] - pos
+
+        # Chasing bots steer along the shared A* path instead of straight at the player
+        if m.path_service is not None:
+            for k in np.nonzero(chasing)[0]:
+                waypoint = m.path_service.next_waypoint(Vec3(*pos[k]), player.position)
+                if waypoint is not None:
+                    move_dir[k] = tuple(waypoint - Vec3(*pos[k]))
+        norm = np.linalg.norm(move_dir, axis=1)
+        norm[norm == 0] = 1
+        move_dir /= norm[:, None]
+
+        # 2. Wall detection against the static boxes, one batched query
+        lo, hi = m.world_index.box_arrays()
+        eye = pos + (0, .5, 0)
+        with ray_stats.measure('ai_batch.walls', rays=len(idx)):
+            wall_t, _ = ray_aabb_batch(eye, move_dir, np.full(len(idx), .6), lo, hi)
+        wall = np.isfinite(wall_t)
+
+        # Patrolling bots facing a wall pick a new target and wait for their next tick
+        for i in idx[wall & ~chasing]:
+            self.target_pos[i] = tuple(self.bots[i].get_valid_ground_position())
+
+        # 3. Avoid player and other bots (XZ distance, chunked to bound memory)
+        blocked = dist < 1.5
+        others = self.position[:, [0, 2]]
+        for start in range(0, len(idx), 256):
+            part = idx[start:start + 256]
+            d2 = ((self.position[part][:, None, [0, 2]] - others[None]) ** 2).sum(axis=2)
+            d2[np.arange(len(part)), part] = np.inf   # ignore self
+            d2[:, ~active] = np.inf                   # ...and bots that are out of play
+            blocked[start:start + 256] |= (d2 < 1.5 ** 2).any(axis=1)
+
+        # 4. Move if clear
+        move = ~blocked & ~wall
+        pos[move] += move_dir[move] * (self.speed[idx][move] * step[move])[:, None]
+
+        # 5. Keep grounded: heightfield where it can answer, batched rays for the rest
+        floor = np.full(len(idx), np.nan)
+        if m.height_field is not None:
+            floor = m.height_field.sample_heights(pos[:, 0], pos[:, 2])
+            floor[floor > pos[:, 1] + .5] = np.nan
+        rest = np.isnan(floor)
+        if rest.any():
+            down = np.tile((0., -1., 0.), (int(rest.sum()), 1))
+            with ray_stats.measure('ai_batch.ground', rays=len(down)):
+                ground_t, _ = ray_aabb_batch(pos[rest] + (0, .5, 0), down, np.full(int(rest.sum()), np.inf), lo, hi)
+            floor[rest] = pos[rest, 1] + .5 - ground_t
+        grounded = np.isfinite(floor)
+        pos[grounded, 1] = floor[grounded] + 1
+
+        self.position[idx] = pos
+
+        # Write back transforms; chasing bots still aim and shoot individually
+        now = game_time()
+        for k, i in enumerate(idx):
+            bot = self.bots[i]
+            bot.setPos(*pos[k])
+            bot.target_pos = Vec3(*self.target_pos[i])
+            bot.is_chasing = bool(chasing[k])
+            if chasing[k]:
+                bot.look_at(player.position)
+                bot.rotation_x = 0  # keep upright
+                bot.rotation_z = 0
+                if now >= self.next_fire_time[i]:
+                    bot.shoot()
+                    self.next_fire_time[i] = bot._next_fire_time
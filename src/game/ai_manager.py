@@ -0,0 +1,111 @@
+import random
+from ursina import camera, time
+from ursina.ursinamath import distance
+from spatial_index import np
+
+
+class AIManager:
+    """
+    Owns every AI bot and runs their patrol logic from one per-frame update:
+      1. Bots near the player (or within their chase range) tick every frame.
+      2. Bots further away tick at a lower rate, and bots outside the
+         camera's view at the lowest rate.
+      3. Each bot receives the time since its own last tick, so movement
+         speed does not depend on how often it is updated.
+      4. Optionally (vectorized=True, needs NumPy and a world_index) the whole
+         population is ticked in one struct-of-arrays pass, see ai_batch.py.
+
+    Not an Entity on purpose: round teardown destroys every scene entity,
+    so the game's global update() drives it instead.
+    """
+    def __init__(
+        self,
+        near: float = 10,
+        far: float = 25,
+        mid_interval: float = .1,
+        far_interval: float = .25,
+        hidden_interval: float = .5,
+        view_cos: float = .5,
+        max_step: float = .5,
+        vectorized: bool = False
+    ):
+        self.near            = near
+        self.far             = far
+        self.mid_interval    = mid_interval
+        self.far_interval    = far_interval
+        self.hidden_interval = hidden_interval
+        self.view_cos        = view_cos   # cos of the half-angle counted as "in view"
+        self.max_step        = max_step   # clamp on the dt handed to a single tick
+
+        self.bots        = []
+        self.player      = None
+        self.world_index = None   # SpatialIndex, required for vectorized mode
+        self.path_service = None  # PathService used by chasing bots in vectorized mode
+        self.height_field = None  # HeightField used for grounding in vectorized mode
+        self.vectorized  = vectorized
+        self._arrays     = None   # BotArrays, rebuilt when the population changes
+
+        if vectorized and np is None:
+            print("AIManager: NumPy not available, using per-bot AI ticks")
+            self.vectorized = False
+
+    def add(self, bot, delay: float = 1) -> None:
+        """Start ticking a bot after `delay` seconds."""
+        # Random offset so bots spawned together don't all tick on the same frame
+        bot._ai_wait    = delay + random.uniform(0, self.mid_interval)
+        bot._ai_elapsed = 0
+        self._invalidate_arrays()
+        self.bots.append(bot)
+
+    def remove(self, bot) -> None:
+        if bot in self.bots:
+            self._invalidate_arrays()
+            self.bots.remove(bot)
+
+    def clear(self) -> None:
+        self._arrays = None
+        self.bots.clear()
+
+    def _invalidate_arrays(self) -> None:
+        if self._arrays is not None:
+            self._arrays.store()
+            self._arrays = None
+
+    def interval_for(self, bot, player) -> float:
+        """Seconds until the bot's next tick, based on distance and visibility."""
+        dist = distance(bot.position, player.position)
+        if dist <= max(self.near, getattr(bot, 'chase_range', 0)):
+            return 0
+
+        to_bot = (bot.world_position - camera.world_position).normalized()
+        if to_bot.dot(camera.forward) < self.view_cos:
+            return self.hidden_interval
+
+        return self.mid_interval if dist <= self.far else self.far_interval
+
+    def update(self) -> None:
+        player = self.player
+        if not player or not player.enabled:
+            return
+
+        dt = time.dt
+        if self.vectorized and self.world_index and self.bots:
+            if self._arrays is None:
+                from ai_batch import BotArrays
+                self._arrays = BotArrays(self.bots, self)
+            self._arrays.tick(player, dt)
+            return
+
+        for bot in list(self.bots):
+            if not bot.enabled or not getattr(bot, 'alive', False):
+                continue
+
+            bot._ai_elapsed += dt
+            bot._ai_wait    -= dt
+            if bot._ai_wait > 0:
+                continue
+
+            step = min(bot._ai_elapsed, self.max_step)
+            bot._ai_elapsed = 0
+            bot._ai_wait    = self.interval_for(bot, player)
+            bot.patrol(step)
@@ -0,0 +1,131 @@
+"""
+Shared character data and animation level-of-detail for Actor-based bots.
+
+  1. shared_actor() loads a character file once as a template Actor; every
+     bot's Actor is a copy of it, sharing its geometry and animation
+     bundles instead of going back through the loader.
+  2. ActorAnimator remembers which animation a bot asked for, so switching
+     is a string compare rather than an Actor.getCurrentAnim() scan, and
+     the animation can be frozen and resumed without the bot knowing.
+  3. AnimationLOD runs once per frame: bots near the camera animate every
+     frame, further ones at a reduced rate (Panda3D's per-character LOD
+     animation), and bots past the freeze distance or outside the view
+     hold their pose with no animation running at all.
+"""
+from direct.actor.Actor import Actor
+from ursina import camera
+
+_templates = {}   # model path -> template Actor
+
+
+def shared_actor(path: str) -> Actor:
+    """A new Actor for `path`, copied from the one template loaded per path."""
+    template = _templates.get(path)
+    if template is None:
+        template = _templates[path] = Actor(path)
+    return Actor(other=template)
+
+
+class ActorAnimator:
+    """
+    The animation an Actor should be playing:
+      1. play() starts an animation unless it is the one already requested
+         (a finished one-shot can be played again). A name the character
+         has no animation for stops it, rather than raising.
+      2. freeze() stops every control, holding the current pose; thaw()
+         carries on from the frame it stopped at.
+    """
+    def __init__(self, actor: Actor):
+        self.actor  = actor
+        self.name   = None
+        self.loop   = True
+        self.frozen = False
+
+    def play(self, name: str, loop: bool = True) -> None:
+        if name == self.name and (loop or self.frozen):
+            return
+        control = self.actor.getAnimControl(name)
+        if name == self.name and control is not None and control.isPlaying():
+            return
+        self.name = name
+        self.loop = loop
+        if control is None:
+            self.actor.stop()
+        elif self.frozen:
+            self.actor.pose(name, 0)
+        elif loop:
+            self.actor.loop(name)
+        else:
+            self.actor.play(name)
+
+    def freeze(self) -> None:
+        if not self.frozen:
+            self.actor.stop()
+            self.frozen = True
+
+    def thaw(self) -> None:
+        if not self.frozen:
+            return
+        self.frozen = False
+        if self.name is None:
+            return
+        if self.loop:
+            self.actor.loop(self.name, restart=0)
+            return
+        control = self.actor.getAnimControl(self.name)
+        if control is None:
+            return
+        last = control.getNumFrames() - 1
+        if control.getFrame() < last:
+            control.play(control.getFrame(), last)
+
+
+class AnimationLOD:
+    """
+    Per-frame animation detail for every bot with an `animator`:
+      1. register() turns on Panda3D's LOD animation for the Actor: full
+         rate within `near` of the camera, one pose update every `delay`
+         seconds at `far`, and less often beyond.
+      2. update() freezes animators further than `freeze` from the camera or
+         outside its view cone (cos of the half-angle `view_cos`) and thaws
+         them once they come back.
+    """
+    def __init__(
+        self,
+        near: float = 10,
+        far: float = 30,
+        delay: float = .2,
+        freeze: float = 45,
+        view_cos: float = .5
+    ):
+        self.near     = near
+        self.far      = far
+        self.delay    = delay
+        self.freeze   = freeze
+        self.view_cos = view_cos
+        self.frozen   = 0   # animators frozen after the last update()
+
+    def register(self, actor: Actor) -> ActorAnimator:
+        actor.setLODAnimation(self.far, self.near, self.delay)
+        return ActorAnimator(actor)
+
+    def visible(self, position) -> bool:
+        to_bot = position - camera.world_position
+        dist = to_bot.length()
+        if dist > self.freeze:
+            return False
+        # anything within `near` stays animated, even just behind the camera
+        return dist <= self.near or to_bot.dot(camera.forward) >= self.view_cos * dist
+
+    def update(self, bots) -> None:
+        frozen = 0
+        for bot in bots:
+            animator = getattr(bot, 'animator', None)
+            if animator is None or not bot.enabled:
+                continue
+            if self.visible(bot.world_position):
+                animator.thaw()
+            else:
+                animator.freeze()
+                frozen += 1
+        self.frozen = frozen
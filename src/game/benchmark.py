@@ -0,0 +1,252 @@
+"""
+Scaling benchmarks for both arenas, built on the headless runner.
+
+    python benchmark.py --bots 5 50 200 1000 --fire-rates 0 20 --out bench.json
+
+  1. Every (arena, bot count, fire rate) combination runs in its own
+     process (one Ursina app per process), see headless.py.
+  2. Bots beyond the level's own are spawned on random walkable cells;
+     the fire rate is extra bot shots per second through the projectile
+     pool, on top of the player's random input script.
+  3. Each run reports frame time percentiles, raycasts per tick, live
+     entity and scene-graph node counts and peak memory; the whole
+     sweep is written as one JSON file to compare across commits.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULT_PREFIX = 'BENCH_RESULT '
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[i]
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB, None where unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class RayCounter:
+    """Counts raycasts by wrapping the functions the game calls them through."""
+    def __init__(self):
+        self.rays       = 0   # scalar raycasts (ursina or spatial index)
+        self.batch_rays = 0   # rays tested inside batched NumPy passes
+
+    def wrap(self, owner, name: str, batched: bool = False) -> None:
+        fn = getattr(owner, name, None)
+        if fn is None:
+            return
+
+        def counted(*args, **kwargs):
+            if batched:
+                self.batch_rays += len(args[0])
+            else:
+                self.rays += 1
+            return fn(*args, **kwargs)
+
+        setattr(owner, name, counted)
+
+
+def spawn_bots(game, count: int, rng: random.Random) -> None:
+    """Add AI bots on random walkable cells until the level has `count`."""
+    grid = game.nav_grid
+    while len(game.ai_manager.bots) < count:
+        p = grid.cell_center(rng.choice(grid.walkable_cells))
+        game.AIBot(
+            position=(p.x, p.y + 1, p.z),
+            patrol_area=(4, 4),
+            chase_range=rng.choice((0, 5, 10)),
+            speed=1
+        )
+
+
+def bot_fire(game, rate: float, rng: random.Random):
+    """Input-script hook that makes random bots shoot at `rate` shots per second."""
+    def fire(run):
+        bots, player = game.ai_manager.bots, game.player
+        if not bots or not player:
+            return
+        shots = rate * run.dt
+        count = int(shots) + (rng.random() < shots - int(shots))
+        for _ in range(count):
+            bot = rng.choice(bots)
+            origin = bot.world_position + game.Vec3(0, .5, 0)
+            game.projectiles.spawn(
+                origin,
+                player.world_position - origin,
+                speed=30,
+                owner=bot,
+                life=3,
+                max_range=50,
+                collide=True,
+                targets=(player,),
+                hit_radius=.5
+            )
+    return fire
+
+
+def run_single(arena: str, bots: int, fire_rate: float, ticks: int, warmup: int, seed: int, vectorized: bool) -> dict:
+    """One benchmark run in this process."""
+    import headless
+    random.seed(seed)
+    rng = random.Random(seed)
+
+    game = headless.load_game(arena)
+    from ursina import scene
+    import spatial_index
+
+    counter = RayCounter()
+    counter.wrap(game, 'raycast')
+    counter.wrap(sys.modules.get('ursina.prefabs.first_person_controller'), 'raycast')
+    counter.wrap(spatial_index.SpatialIndex, 'raycast')
+    import ai_batch
+    import projectiles
+    counter.wrap(ai_batch, 'ray_aabb_batch', batched=True)
+    counter.wrap(projectiles, 'ray_aabb_batch', batched=True)
+
+    if vectorized:
+        game.ai_manager.vectorized = spatial_index.np is not None
+    if getattr(game, 'player', None) is not None and hasattr(game.player, 'health'):
+        game.player.health = float('inf')   # keep the round going for the whole run
+    spawn_bots(game, bots, rng)
+
+    player_inputs = headless.random_inputs(seed)
+    fire = bot_fire(game, fire_rate, rng)
+
+    def inputs(run):
+        player_inputs(run)
+        fire(run)
+
+    run = headless.HeadlessRun(game, inputs=inputs)
+    for _ in range(warmup):
+        run.step()
+
+    counter.rays = counter.batch_rays = 0
+    frame_ms = []
+    entities = live_projectiles = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        run.step()
+        frame_ms.append((time.perf_counter() - start) * 1000)
+        entities = max(entities, len(scene.entities))
+        live_projectiles = max(live_projectiles, len(game.projectiles.live))
+    nodes = scene.countNumDescendants()
+
+    frame_ms.sort()
+    from ray_stats import ray_stats
+    result = {
+        'arena': arena,
+        'bots': bots,
+        'fire_rate': fire_rate,
+        'vectorized': bool(game.ai_manager.vectorized),
+        'ticks': ticks,
+        'frame_ms': {
+            'mean': sum(frame_ms) / len(frame_ms),
+            'p50': percentile(frame_ms, 50),
+            'p90': percentile(frame_ms, 90),
+            'p99': percentile(frame_ms, 99),
+            'max': frame_ms[-1],
+        },
+        'raycasts_per_tick': counter.rays / ticks,
+        'batch_rays_per_tick': counter.batch_rays / ticks,
+        'peak_entities': entities,
+        'scene_nodes': nodes,
+        'peak_live_projectiles': live_projectiles,
+        'bots_alive': len(game.ai_manager.bots),
+        'peak_memory_mb': peak_memory_mb(),
+    }
+    if ray_stats.enabled:
+        result['ray_sites'] = ray_stats.dump()['sites']
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=GAME_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--arenas', nargs='+', default=['arena', 'map'], choices=['arena', 'map'])
+    parser.add_argument('--bots', nargs='+', type=int, default=[5, 50, 200, 1000])
+    parser.add_argument('--fire-rates', nargs='+', type=float, default=[0, 20], help='extra bot shots per second')
+    parser.add_argument('--ticks', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vectorized', action='store_true', help='use the NumPy struct-of-arrays AI pass (needs NumPy)')
+    parser.add_argument('--ray-stats', action='store_true', help='add per-call-site raycast stats (ray_stats.py)')
+    parser.add_argument('--out', default='benchmark.json')
+    parser.add_argument('--single', nargs=3, metavar=('ARENA', 'BOTS', 'FIRE_RATE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.vectorized and importlib.util.find_spec('numpy') is None:
+        parser.error('--vectorized needs NumPy, which is not installed (pip install numpy)')
+
+    if args.single:
+        arena, bots, fire_rate = args.single[0], int(args.single[1]), float(args.single[2])
+        result = run_single(arena, bots, fire_rate, args.ticks, args.warmup, args.seed, args.vectorized)
+        print(RESULT_PREFIX + json.dumps(result))
+        return
+
+    if args.ray_stats:
+        os.environ['ECHOES_RAY_STATS'] = '1'   # inherited by every run
+
+    results = []
+    for arena in args.arenas:
+        for bots in args.bots:
+            for fire_rate in args.fire_rates:
+                print(f"benchmark: {arena}, {bots} bots, {fire_rate} shots/s ...", flush=True)
+                cmd = [
+                    sys.executable, os.path.abspath(__file__),
+                    '--single', arena, str(bots), str(fire_rate),
+                    '--ticks', str(args.ticks), '--warmup', str(args.warmup), '--seed', str(args.seed)
+                ]
+                if args.vectorized:
+                    cmd.append('--vectorized')
+                proc = subprocess.run(cmd, cwd=GAME_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                lines = [l for l in proc.stdout.decode(errors='replace').splitlines() if l.startswith(RESULT_PREFIX)]
+                if not lines:
+                    print(f"benchmark: run failed (exit code {proc.returncode})")
+                    results.append({'arena': arena, 'bots': bots, 'fire_rate': fire_rate, 'error': proc.returncode})
+                    continue
+                result = json.loads(lines[-1][len(RESULT_PREFIX):])
+                f = result['frame_ms']
+                print(f"  p50 {f['p50']:.2f} ms, p99 {f['p99']:.2f} ms, "
+                      f"{result['raycasts_per_tick']:.1f} rays/tick, {result['peak_memory_mb']} MB")
+                results.append(result)
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"benchmark: wrote {len(results)} results to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
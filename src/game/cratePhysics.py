@@ -1,5 +1,8 @@
 from ursina import *
 from ursina.prefabs.first_person_controller import FirstPersonController
+from spatial_index import SpatialIndex
+from heightfield import HeightField
+from ray_stats import ray_stats
 
 app = Ursina()
 
@@ -12,6 +15,9 @@ ground = Entity(model='plane', scale=20, texture='white_cube', texture_scale=(20
 
 wall = Entity(model='cube', color=color.gray, scale=(1, 3, 10), position=(6, 1.5, 0), collider='box')
 
+# ground and wall never move: bake them once for the crate's ground checks
+height_field = HeightField(SpatialIndex([ground, wall]))
+
 crate_target_position = crate.position
 
 crate_fall_speed = 0
@@ -20,6 +26,7 @@ crate_grounded = False
 
 def update():
     global crate_target_position, crate_fall_speed, crate_grounded
+    ray_stats.end_frame()
 
     move_direction = Vec3(0, 0, 0)
     if held_keys['w']:
@@ -40,13 +47,15 @@ def update():
         to_crate = Vec3(crate.position.x - player.position.x, 0, crate.position.z - player.position.z).normalized()
         if push_dir.dot(to_crate) > 0.5:
             push_distance = 0.3
-            hit_info = raycast(crate.world_position, push_dir, distance=1, ignore=(player, crate))
+            with ray_stats.measure('crate.push'):
+                hit_info = raycast(crate.world_position, push_dir, distance=1, ignore=(player, crate))
             if not hit_info.hit:
                 crate_target_position += push_dir * push_distance
 
     crate.position = lerp(crate.position, Vec3(crate_target_position.x, crate.position.y, crate_target_position.z), 6 * time.dt)
 
-    down_hit = raycast(crate.world_position, direction=Vec3(0, -1, 0), distance=5, ignore=(crate,))
+    with ray_stats.measure('crate.down'):
+        down_hit = height_field.ground(crate.world_position, max_distance=5, ignore=(crate,), dynamic=(player,))
 
     if down_hit.hit:
         if down_hit.distance > 0.6:
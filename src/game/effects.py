@@ -0,0 +1,63 @@
+from ursina import Color, time
+
+
+class ColorTween:
+    """Blend an entity's color from `start` to `end` over `duration` seconds."""
+    def __init__(self, entity, start: Color, end: Color, duration: float):
+        self.entity   = entity
+        self.start    = tuple(start)
+        self.end      = tuple(end)
+        self.duration = duration
+        self.elapsed  = 0.0
+        entity.color = Color(*self.start)
+
+    def step(self, dt: float) -> bool:
+        if self.entity.is_empty():    # destroyed mid-effect
+            return False
+        self.elapsed += dt
+        k = min(self.elapsed / self.duration, 1) if self.duration > 0 else 1
+        self.entity.color = Color(*(a + (b - a) * k for a, b in zip(self.start, self.end)))
+        return k < 1
+
+
+class EffectManager:
+    """
+    Time-based visual effects (hit flashes, overlay fades, HUD tweens),
+    stepped only while they run:
+      1. start() adds anything with a step(dt) method that returns False
+         once it has finished; finished effects are dropped right away.
+      2. Effects are keyed (by default on the effect itself), so starting
+         one under a key that is still running replaces it: a second hit
+         restarts the flash instead of stacking another.
+      3. update() is called from the game's update(); with nothing active
+         it returns immediately, so idle targets and an idle HUD cost no
+         per-frame Python at all.
+
+    Not an Entity on purpose, like AIManager: round teardown destroys the
+    scene's entities, so the game's global update() drives it and clear()
+    drops whatever was still running.
+    """
+    def __init__(self):
+        self.active = {}   # key -> effect
+
+    def start(self, effect, key=None):
+        self.active[effect if key is None else key] = effect
+        return effect
+
+    def stop(self, key) -> None:
+        self.active.pop(key, None)
+
+    def clear(self) -> None:
+        self.active.clear()
+
+    def tween_color(self, entity, start: Color, end: Color, duration: float) -> ColorTween:
+        """Start (or restart) a color blend on `entity`."""
+        return self.start(ColorTween(entity, start, end, duration), key=(entity, 'color'))
+
+    def update(self) -> None:
+        if not self.active:
+            return
+        dt = time.dt
+        for key, effect in list(self.active.items()):
+            if not effect.step(dt) and self.active.get(key) is effect:
+                del self.active[key]
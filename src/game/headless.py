@@ -0,0 +1,192 @@
+"""
+Headless, fixed-timestep runs of the game for profiling and CI.
+
+    python headless.py [arena|map] --ticks 600 --dt 0.0166 --seed 0
+
+  1. The game script (__main__.py's 30x30 arena or map.py's 60x60 map) is
+     imported with ECHOES_HEADLESS=1, so it opens no window, skips the
+     Android asset setup and never enters app.run().
+  2. Every tick sets time.dt to the fixed step, runs the game's update()
+     and then one app.step() (sequences and entity updates).
+  3. Inputs come from a script: a callable that is handed the run before
+     every tick and presses/releases keys through press()/release().
+
+Only one Ursina app can exist per process, so each run needs its own process.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time as _time
+
+HEADLESS = os.environ.get('ECHOES_HEADLESS') == '1'
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+ARENAS = {
+    'arena': '__main__.py',   # setup_game() 30x30 arena
+    'map':   'map.py',        # 60x60 map with animated bots
+}
+
+sim_time = None   # simulated seconds while a headless run is active, else None
+
+
+def game_time() -> float:
+    """Seconds on the game clock: simulated time in headless runs, wall time otherwise."""
+    return _time.time() if sim_time is None else sim_time
+
+
+def load_game(arena: str = 'arena'):
+    """Import one of the game scripts without a window and return its module."""
+    global HEADLESS, sim_time
+    os.environ['ECHOES_HEADLESS'] = '1'
+    HEADLESS = True
+    sim_time = 0.0
+
+    from panda3d.core import loadPrcFileData
+    loadPrcFileData('', 'audio-library-name null')
+
+    # No window to confine or hide the cursor in, so only remember the state
+    from ursina import mouse
+    mouse_type = type(mouse)
+    mouse_type.locked  = property(lambda m: getattr(m, '_locked', False), lambda m, v: setattr(m, '_locked', v))
+    mouse_type.visible = property(lambda m: getattr(m, '_visible', True), lambda m, v: setattr(m, '_visible', v))
+
+    if GAME_DIR not in sys.path:
+        sys.path.insert(0, GAME_DIR)
+    os.chdir(GAME_DIR)
+
+    name = f'echoes_{arena}'
+    spec = importlib.util.spec_from_file_location(name, os.path.join(GAME_DIR, ARENAS[arena]))
+    game = importlib.util.module_from_spec(spec)
+    sys.modules[name] = game
+    spec.loader.exec_module(game)
+
+    if arena == 'arena':
+        # Skip the main menu: build the round and pick up the gun
+        game.start_singleplayer()
+        game.player.use_touch = False
+        for e in game.registry.of('world'):
+            if e.name == 'gun_pickup':
+                e.on_click()
+    return game
+
+
+def random_inputs(seed: int = 0, fire_rate: float = 2, turn_every: float = .5):
+    """
+    Input script that wanders around: new movement keys and heading every
+    `turn_every` seconds, and shots at about `fire_rate` per second.
+    """
+    rng = random.Random(seed)
+    state = {'next_turn': 0.0}
+
+    def script(run):
+        if run.time >= state['next_turn']:
+            state['next_turn'] = run.time + turn_every
+            for key in 'wasd':
+                run.release(key)
+            for key in rng.sample('wasd', rng.randint(0, 2)):
+                run.press(key)
+            if run.game.player:
+                run.game.player.rotation_y = rng.uniform(0, 360)
+        if fire_rate and run.fire_key and rng.random() < fire_rate * run.dt:
+            run.press(run.fire_key)
+            run.release(run.fire_key)
+    return script
+
+
+def scripted_inputs(events: dict):
+    """Input script from {tick: [key, ...]}; a key ending in ' up' is released."""
+    def script(run):
+        for key in events.get(run.tick, ()):
+            if key.endswith(' up'):
+                run.release(key[:-3])
+            else:
+                run.press(key)
+    return script
+
+
+class HeadlessRun:
+    """Drives a loaded game module one fixed step at a time."""
+    def __init__(self, game, dt: float = 1 / 60, inputs=None):
+        from ursina import application
+        self.game   = game
+        self.app    = game.app
+        self.dt     = dt
+        self.inputs = inputs
+        self.tick   = 0
+        self.time   = 0.0
+        # The arena's player shoots on 'gamepad x'; map.py's player has no gun
+        self.fire_key = 'gamepad x' if hasattr(game, 'start_singleplayer') else None
+        application.calculate_dt = False
+
+    def press(self, key: str) -> None:
+        self._send(key)
+
+    def release(self, key: str) -> None:
+        self._send(key + ' up')
+
+    def _send(self, key: str) -> None:
+        # Keyboard keys only reach held_keys and the entities when flagged as raw
+        self.app.input(key, is_raw=True)
+        # The game module isn't __main__ here, so its input() isn't called for us
+        if hasattr(self.game, 'input'):
+            self.game.input(key)
+
+    def step(self) -> None:
+        global sim_time
+        from ursina import application, time
+        if self.inputs:
+            self.inputs(self)
+
+        time.dt = time.dt_unscaled = self.dt
+        if not application.paused:
+            self.game.update()
+        self.app.step()
+
+        self.tick += 1
+        self.time += self.dt
+        sim_time = self.time
+
+    def run(self, ticks: int) -> dict:
+        start = _time.perf_counter()
+        for _ in range(ticks):
+            self.step()
+        wall = _time.perf_counter() - start
+
+        player = self.game.player
+        return {
+            'ticks': self.tick,
+            'sim_time': self.time,
+            'wall_time': wall,
+            'bots_alive': len(self.game.ai_manager.bots),
+            'player_health': getattr(player, 'health', None) if player else None,
+        }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('arena', nargs='?', default='arena', choices=sorted(ARENAS))
+    parser.add_argument('--ticks', type=int, default=600)
+    parser.add_argument('--dt', type=float, default=1 / 60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fire-rate', type=float, default=2, help='player shots per second')
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    game = load_game(args.arena)
+    run = HeadlessRun(game, dt=args.dt, inputs=random_inputs(args.seed, args.fire_rate))
+    print(run.run(args.ticks))
+
+    from ray_stats import ray_stats
+    from profiler import profiler
+    if ray_stats.enabled:
+        ray_stats.print_report()
+    if profiler.enabled:
+        profiler.print_report()
+
+
+if __name__ == '__main__':
+    # Run through the importable copy, so the game sees the same sim_time
+    import headless
+    headless.main()
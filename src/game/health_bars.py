@@ -0,0 +1,170 @@
+from array import array
+
+from panda3d.core import (
+    Geom, GeomNode, GeomTriangles, GeomVertexArrayFormat, GeomVertexData,
+    GeomVertexFormat, InternalName,
+)
+from ursina import Color, Entity, camera, color
+from spatial_index import np
+
+_FORMAT = None
+
+
+def _vertex_format():
+    """Position and color as plain float32 columns, so rows can be written as one flat array."""
+    global _FORMAT
+    if _FORMAT is None:
+        columns = GeomVertexArrayFormat()
+        columns.addColumn(InternalName.getVertex(), 3, Geom.NTFloat32, Geom.CPoint)
+        columns.addColumn(InternalName.getColor(), 4, Geom.NTFloat32, Geom.CColor)
+        _FORMAT = GeomVertexFormat.registerFormat(columns)
+    return _FORMAT
+
+
+class HealthBarLayer(Entity):
+    """
+    Every target's health bar as camera-facing quads in one dynamic mesh:
+      1. add() registers an entity with a `health` out of `max_health`; the
+         layer reads it every frame, so take_damage() has no bar to update
+         and nothing is tweened.
+      2. update_bars() (called from the game's update()) drops destroyed
+         targets and culls disabled, full-health and distant ones, then
+         writes a background and a fill quad per bar, turned towards the
+         camera, straight into the vertex buffer.
+      3. The layer is a single Geom, so any number of bars is one draw call.
+
+    Not registered with the round's entities: it lives for the whole game
+    and clear() forgets the targets at round teardown.
+    """
+    def __init__(
+        self,
+        width: float = .3,
+        height: float = .04,
+        max_distance: float = 40,
+        back_color: Color = color.black66,
+        **kwargs
+    ):
+        super().__init__(name='health_bars', **kwargs)
+        self.width        = width
+        self.height       = height
+        self.max_distance = max_distance
+        self.back_color   = tuple(back_color)
+        self.targets      = []   # [entity, max_health, height above origin, fill color]
+        self.bars         = 0    # bars drawn by the last update_bars()
+
+        self.vdata = GeomVertexData('health_bars', _vertex_format(), Geom.UHDynamic)
+        self.triangles = GeomTriangles(Geom.UHDynamic)
+        self.triangles.setIndexType(Geom.NTUint32)
+        geom = Geom(self.vdata)
+        geom.addPrimitive(self.triangles)
+        node = GeomNode('health_bars')
+        node.addGeom(geom)
+        self.bar_mesh = self.attachNewNode(node)
+        self.bar_mesh.setTwoSided(True)
+        self._quad_capacity = 0
+        self._indices = b''
+
+    # ── Targets ────────────────────────────────────────────
+
+    def add(self, entity, max_health: float = 100, offset: float = 1, fill_color: Color = color.red.tint(-.2)) -> None:
+        """Show a bar `offset` units above the entity's origin whenever it is hurt."""
+        self.targets.append([entity, max_health, offset, tuple(fill_color)])
+
+    def remove(self, entity) -> None:
+        self.targets = [t for t in self.targets if t[0] is not entity]
+
+    def clear(self) -> None:
+        self.targets = []
+        self.bars    = 0
+        self._upload(b'', 0)
+
+    # ── Drawing ────────────────────────────────────────────
+
+    def visible_bars(self) -> list:
+        """(x, y, z, fraction, fill color) of every bar worth drawing this frame."""
+        cam = camera.world_position
+        max_sq = self.max_distance * self.max_distance
+        bars = []
+        alive = []
+        for target in self.targets:
+            entity, max_health, offset, fill = target
+            if entity.is_empty():    # destroyed
+                continue
+            alive.append(target)
+            if not entity.enabled:
+                continue
+            fraction = getattr(entity, 'health', max_health) / max_health
+            if fraction >= 1:
+                continue
+            p = entity.world_position
+            if (p - cam).length_squared() > max_sq:
+                continue
+            bars.append((p.x, p.y + offset, p.z, max(fraction, 0), fill))
+        self.targets = alive
+        return bars
+
+    def update_bars(self) -> None:
+        bars = self.visible_bars()
+        was_drawing = self.bars
+        self.bars = len(bars)
+        if not bars:
+            # empty the mesh once when the last bar goes; idle frames upload nothing
+            if was_drawing:
+                self._upload(b'', 0)
+            return
+
+        right = camera.right * (self.width / 2)
+        up    = camera.up * (self.height / 2)
+        # the fill sits a hair in front of the background
+        ahead = camera.back * .002
+        build = self._vertices_numpy if np is not None else self._vertices_python
+        self._upload(build(bars, tuple(right), tuple(up), tuple(ahead)), 2 * len(bars))
+
+    def _vertices_python(self, bars, right, up, ahead) -> bytes:
+        rx, ry, rz = right
+        ux, uy, uz = up
+        ax, ay, az = ahead
+        back = self.back_color
+        data = array('f')
+        for x, y, z, fraction, fill in bars:
+            # background: the full width
+            for sx, sy in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+                data.extend((x + sx * rx + sy * ux, y + sx * ry + sy * uy, z + sx * rz + sy * uz))
+                data.extend(back)
+            # fill: from the left edge to `fraction` of the width
+            for sx, sy in ((-1, -1), (2 * fraction - 1, -1), (2 * fraction - 1, 1), (-1, 1)):
+                data.extend((x + sx * rx + sy * ux + ax, y + sx * ry + sy * uy + ay, z + sx * rz + sy * uz + az))
+                data.extend(fill)
+        return data.tobytes()
+
+    def _vertices_numpy(self, bars, right, up, ahead) -> bytes:
+        n = len(bars)
+        centers  = np.array([b[:3] for b in bars], dtype=np.float32)
+        fraction = np.array([b[3] for b in bars], dtype=np.float32)
+        fills    = np.array([b[4] for b in bars], dtype=np.float32)
+        right, up, ahead = (np.array(v, dtype=np.float32) for v in (right, up, ahead))
+
+        # corner multipliers of right/up for the background (0-3) and fill (4-7) quads
+        sx = np.empty((n, 8), dtype=np.float32)
+        sx[:, [0, 3, 4, 7]] = -1
+        sx[:, [1, 2]] = 1
+        sx[:, [5, 6]] = (2 * fraction - 1)[:, None]
+        sy = np.array([-1, -1, 1, 1, -1, -1, 1, 1], dtype=np.float32)
+
+        out = np.empty((n, 8, 7), dtype=np.float32)
+        out[:, :, :3] = centers[:, None, :] + sx[:, :, None] * right + sy[None, :, None] * up
+        out[:, 4:, :3] += ahead
+        out[:, :4, 3:] = self.back_color
+        out[:, 4:, 3:] = fills[:, None, :]
+        return out.tobytes()
+
+    def _upload(self, vertices: bytes, quads: int) -> None:
+        if quads > self._quad_capacity:
+            self._quad_capacity = max(quads, 2 * self._quad_capacity, 32)
+            indices = array('I')
+            for q in range(self._quad_capacity):
+                i = 4 * q
+                indices.extend((i, i + 1, i + 2, i, i + 2, i + 3))
+            self._indices = indices.tobytes()
+        self.vdata.modifyArray(0).modifyHandle().setData(vertices)
+        self.triangles.modifyVertices().modifyHandle().setData(self._indices[:quads * 6 * 4])
@@ -0,0 +1,134 @@
+import math
+from ursina import Vec3
+from ursina.hit_info import HitInfo
+from spatial_index import np
+
+
+class HeightField:
+    """
+    Floor heights baked from the static colliders, for ground queries:
+      1. Heights are stored at the corners of a regular XZ grid (the top of
+         the highest static box over each corner).
+      2. Inside a cell the floor height and normal come from bilinear
+         interpolation of its four corners, with no raycast.
+      3. Cells whose corners disagree by more than `max_delta` straddle a
+         step or wall edge; queries there, and queries close to a dynamic
+         entity, fall back to a raycast against the spatial index.
+    """
+    def __init__(self, index, cell_size: float = .5, max_delta: float = .05):
+        self.index     = index
+        self.cell_size = cell_size
+        self.max_delta = max_delta
+        self.min_x = index.min_x
+        self.min_z = index.min_z
+        self.nx = max(1, int(math.ceil((index.max_x - index.min_x) / cell_size)))
+        self.nz = max(1, int(math.ceil((index.max_z - index.min_z) / cell_size)))
+
+        # Corner heights, (nx + 1) * (nz + 1), None where there is nothing below
+        eps = 1e-4
+        self.heights = []
+        for iz in range(self.nz + 1):
+            for ix in range(self.nx + 1):
+                x = self.min_x + ix * cell_size
+                z = self.min_z + iz * cell_size
+                tops = [index.boxes[i][1][1] for i in index.boxes_in_rect(x - eps, z - eps, x + eps, z + eps)]
+                self.heights.append(max(tops) if tops else None)
+
+        self._height_array = None
+        self.samples   = 0   # queries answered from the heightfield
+        self.fallbacks = 0   # queries that needed a raycast
+
+    def sample(self, x: float, z: float):
+        """
+        (height, normal) of the floor at x, z, or None where the heightfield
+        can't answer reliably (grid edge or a height discontinuity).
+        """
+        fx = (x - self.min_x) / self.cell_size
+        fz = (z - self.min_z) / self.cell_size
+        ix, iz = int(math.floor(fx)), int(math.floor(fz))
+        if not (0 <= ix < self.nx and 0 <= iz < self.nz):
+            return None
+
+        row = self.nx + 1
+        h00 = self.heights[iz * row + ix]
+        h10 = self.heights[iz * row + ix + 1]
+        h01 = self.heights[(iz + 1) * row + ix]
+        h11 = self.heights[(iz + 1) * row + ix + 1]
+        if h00 is None or h10 is None or h01 is None or h11 is None:
+            return None
+        if max(h00, h10, h01, h11) - min(h00, h10, h01, h11) > self.max_delta:
+            return None
+
+        tx, tz = fx - ix, fz - iz
+        height = (h00 * (1 - tx) + h10 * tx) * (1 - tz) + (h01 * (1 - tx) + h11 * tx) * tz
+        dh_dx = ((h10 - h00) * (1 - tz) + (h11 - h01) * tz) / self.cell_size
+        dh_dz = ((h01 - h00) * (1 - tx) + (h11 - h10) * tx) / self.cell_size
+        return height, Vec3(-dh_dx, 1, -dh_dz).normalized()
+
+    def ground(self, origin, max_distance=9999, ignore=None, dynamic=(), dynamic_radius: float = 1.5, bodies=False) -> HitInfo:
+        """
+        Floor straight below `origin`, returned like a downward raycast.
+        Entities in `dynamic` (or, with bodies=True, the index's moving
+        bodies) within dynamic_radius (XZ) force a raycast, since something
+        may be standing on or under them.
+        """
+        x, y, z = origin[0], origin[1], origin[2]
+
+        near_dynamic = bodies and self.index.bodies_near(x, z, dynamic_radius, ignore)
+        for e in dynamic:
+            if e is None or not getattr(e, 'enabled', False) or (ignore and e in ignore):
+                continue
+            p = e.world_position
+            if (p[0] - x) ** 2 + (p[2] - z) ** 2 < dynamic_radius ** 2:
+                near_dynamic = True
+                break
+
+        result = None if near_dynamic else self.sample(x, z)
+        if result is None or result[0] > y:
+            self.fallbacks += 1
+            return self.index.raycast(origin, Vec3(0, -1, 0), distance=max_distance, ignore=ignore, dynamic=dynamic, bodies=bodies)
+
+        self.samples += 1
+        height, normal = result
+        dist = y - height
+        if dist > max_distance:
+            return HitInfo(hit=False, distance=max_distance)
+
+        world_point = Vec3(x, height, z)
+        return HitInfo(
+            hit=True,
+            point=world_point,
+            world_point=world_point,
+            distance=dist,
+            normal=normal,
+            world_normal=normal,
+        )
+
+    def sample_heights(self, x, z):
+        """
+        Vectorized sample() heights for arrays of x and z (requires NumPy);
+        NaN where a raycast is needed.
+        """
+        if self._height_array is None:
+            self._height_array = np.array(
+                [np.nan if h is None else h for h in self.heights], dtype=float
+            ).reshape(self.nz + 1, self.nx + 1)
+        H = self._height_array
+
+        fx = (np.asarray(x) - self.min_x) / self.cell_size
+        fz = (np.asarray(z) - self.min_z) / self.cell_size
+        ix = np.floor(fx).astype(int)
+        iz = np.floor(fz).astype(int)
+        inside = (ix >= 0) & (ix < self.nx) & (iz >= 0) & (iz < self.nz)
+        ix = np.clip(ix, 0, self.nx - 1)
+        iz = np.clip(iz, 0, self.nz - 1)
+
+        h00, h10 = H[iz, ix], H[iz, ix + 1]
+        h01, h11 = H[iz + 1, ix], H[iz + 1, ix + 1]
+        corners = np.stack((h00, h10, h01, h11))
+        # NaN corners make the spread NaN, which also fails the test
+        flat = inside & (corners.max(axis=0) - corners.min(axis=0) <= self.max_delta)
+
+        tx, tz = fx - ix, fz - iz
+        height = (h00 * (1 - tx) + h10 * tx) * (1 - tz) + (h01 * (1 - tx) + h11 * tx) * tz
+        return np.where(flat, height, np.nan)
@@ -0,0 +1,276 @@
+"""
+Data-driven levels: placements, colliders, spawn points and bot patrols.
+
+    python level.py build            # compile every assets/*.json level
+    python level.py build arena      # ...or just the named ones
+
+  1. A level is written as assets/<name>.json: a list of static pieces
+     (Entity keyword arguments), the player spawn and the bots' spawn and
+     patrol parameters.
+  2. `build` compiles it into assets/<name>.lvl, a packed binary with the
+     collider world bounds already computed and every spawn checked for
+     a floor below it.
+  3. load_level() reads the .lvl in one go (falling back to the .json
+     when there is no up-to-date .lvl) and build_level() instantiates the
+     pieces; SpatialIndex takes the precomputed boxes as they are.
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+
+from ursina import Entity, application, color
+from setup_ursina_android import ensure_asset
+
+MAGIC   = b'ECLV'
+VERSION = 1
+
+# magic, version, sha1 of the source .json, string table size, pieces, bots, player spawn
+_HEADER = struct.Struct('<4sH20sIII3f')
+# name, model, texture, collider (string ids, -1 = unset), position, rotation, scale,
+# color, texture_scale, flags, collider box (lo, hi)
+_PIECE  = struct.Struct('<4h3f3f3f4f2fB6f')
+# position, patrol_area, chase_range, speed
+_BOT    = struct.Struct('<3f2f2f')
+
+_HAS_COLOR         = 1
+_HAS_TEXTURE_SCALE = 2
+_HAS_BOX           = 4
+
+PIECE_KEYS = ('name', 'model', 'position', 'rotation', 'scale', 'color', 'texture', 'texture_scale', 'collider')
+BOT_KEYS   = ('position', 'patrol_area', 'chase_range', 'speed')
+
+
+class Level:
+    """
+    One level, however it was loaded:
+      1. pieces: Entity keyword arguments per static piece, in file order.
+      2. player_spawn / bots: where the player starts and AIBot() arguments.
+      3. boxes: each piece's collider world bounds, precomputed by the
+         build step (None when the level came from its .json).
+    """
+    def __init__(self, name: str, pieces: list, player_spawn: tuple, bots: list, boxes: list = None):
+        self.name         = name
+        self.pieces       = pieces
+        self.player_spawn = player_spawn
+        self.bots         = bots
+        self.boxes        = boxes
+
+
+def level_path(filename: str):
+    """Path of a level file under assets/, next to the game or the working directory."""
+    ensure_asset(f'assets/{filename}')
+    for base in (os.path.join(str(application.asset_folder), 'assets'), 'assets'):
+        path = os.path.join(base, filename)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# ── Source (.json) ─────────────────────────────────────────
+
+def parse_level(name: str, data: dict) -> Level:
+    """Check a decoded .json level and turn its lists into tuples."""
+    pieces = []
+    for i, p in enumerate(data.get('pieces', ())):
+        unknown = set(p) - set(PIECE_KEYS)
+        if unknown or 'model' not in p:
+            raise ValueError(f"level {name}: piece {i} has unknown keys {sorted(unknown)} or no model")
+        pieces.append({k: tuple(p[k]) if isinstance(p[k], list) else p[k] for k in PIECE_KEYS if k in p})
+
+    bots = []
+    for i, b in enumerate(data.get('bots', ())):
+        if set(b) != set(BOT_KEYS):
+            raise ValueError(f"level {name}: bot {i} needs exactly {BOT_KEYS}")
+        bots.append({k: tuple(b[k]) if isinstance(b[k], list) else b[k] for k in BOT_KEYS})
+
+    return Level(name, pieces, tuple(data.get('player_spawn', (0, 0, 0))), bots)
+
+
+# ── Compiled (.lvl) ────────────────────────────────────────
+
+def pack_level(level: Level, boxes: list, source_hash: bytes) -> bytes:
+    strings = []
+    ids = {}
+
+    def string_id(s):
+        if s is None:
+            return -1
+        if s not in ids:
+            ids[s] = len(strings)
+            strings.append(s)
+        return ids[s]
+
+    body = bytearray()
+    for p, box in zip(level.pieces, boxes):
+        flags = 0
+        if 'color' in p:
+            flags |= _HAS_COLOR
+        if 'texture_scale' in p:
+            flags |= _HAS_TEXTURE_SCALE
+        if box is not None:
+            flags |= _HAS_BOX
+        lo, hi = box if box is not None else ((0, 0, 0), (0, 0, 0))
+        body += _PIECE.pack(
+            string_id(p.get('name')), string_id(p['model']), string_id(p.get('texture')), string_id(p.get('collider')),
+            *p.get('position', (0, 0, 0)), *p.get('rotation', (0, 0, 0)), *p.get('scale', (1, 1, 1)),
+            *p.get('color', (1, 1, 1, 1)), *p.get('texture_scale', (1, 1)),
+            flags, *lo, *hi
+        )
+    for b in level.bots:
+        body += _BOT.pack(*b['position'], *b['patrol_area'], b['chase_range'], b['speed'])
+
+    table = '\0'.join(strings).encode('utf-8')
+    header = _HEADER.pack(MAGIC, VERSION, source_hash, len(table), len(level.pieces), len(level.bots), *level.player_spawn)
+    return header + table + bytes(body)
+
+
+def unpack_level(name: str, data: bytes) -> Level:
+    magic, version, _, table_size, n_pieces, n_bots, *spawn = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"level {name}: not a version {VERSION} level file")
+
+    offset = _HEADER.size
+    strings = data[offset:offset + table_size].decode('utf-8').split('\0') if table_size else []
+    offset += table_size
+
+    def string(i):
+        return strings[i] if i >= 0 else None
+
+    pieces, boxes = [], []
+    end = offset + n_pieces * _PIECE.size
+    for rec in _PIECE.iter_unpack(data[offset:end]):
+        name_id, model_id, texture_id, collider_id = rec[0:4]
+        flags = rec[19]
+        # same key order as PIECE_KEYS, so the collider is made after model and scale
+        p = {}
+        if name_id >= 0:
+            p['name'] = string(name_id)
+        p['model']    = string(model_id)
+        p['position'] = rec[4:7]
+        p['rotation'] = rec[7:10]
+        p['scale']    = rec[10:13]
+        if flags & _HAS_COLOR:
+            p['color'] = rec[13:17]
+        if texture_id >= 0:
+            p['texture'] = string(texture_id)
+        if flags & _HAS_TEXTURE_SCALE:
+            p['texture_scale'] = rec[17:19]
+        if collider_id >= 0:
+            p['collider'] = string(collider_id)
+        pieces.append(p)
+        boxes.append((rec[20:23], rec[23:26]) if flags & _HAS_BOX else None)
+
+    bots = [
+        {'position': rec[0:3], 'patrol_area': rec[3:5], 'chase_range': rec[5], 'speed': rec[6]}
+        for rec in _BOT.iter_unpack(data[end:end + n_bots * _BOT.size])
+    ]
+    return Level(name, pieces, tuple(spawn), bots, boxes)
+
+
+def source_hash_of(data: bytes) -> bytes:
+    """The .lvl header records the sha1 of the .json it was built from."""
+    return _HEADER.unpack_from(data)[2]
+
+
+# ── Loading ────────────────────────────────────────────────
+
+def load_level(name: str) -> Level:
+    """
+    Load a level by name:
+      1. assets/<name>.lvl, if there is one and it was built from the
+         current assets/<name>.json (or the .json isn't shipped): one read,
+         boxes included.
+      2. Otherwise assets/<name>.json, whose boxes are computed at runtime.
+    """
+    lvl_path  = level_path(f'{name}.lvl')
+    json_path = level_path(f'{name}.json')
+
+    source = None
+    if json_path:
+        with open(json_path, 'rb') as f:
+            source = f.read()
+
+    if lvl_path:
+        with open(lvl_path, 'rb') as f:
+            data = f.read()
+        if source is None or source_hash_of(data) == hashlib.sha1(source).digest():
+            level = unpack_level(name, data)
+            print(f"level: {name}.lvl, {len(level.pieces)} pieces, {len(level.bots)} bots")
+            return level
+        print(f"level: {name}.lvl is out of date, loading {name}.json (run `python level.py build`)")
+
+    if source is None:
+        raise FileNotFoundError(f"level {name}: no assets/{name}.lvl or assets/{name}.json")
+    level = parse_level(name, json.loads(source.decode('utf-8')))
+    print(f"level: {name}.json, {len(level.pieces)} pieces, {len(level.bots)} bots")
+    return level
+
+
+def build_level(level: Level) -> list:
+    """Create the level's static entities, in file order (aligned with level.boxes)."""
+    entities = []
+    for p in level.pieces:
+        if 'color' in p:
+            p = dict(p, color=color.rgba(*p['color']))
+        entities.append(Entity(**p))
+    return entities
+
+
+# ── Build step ─────────────────────────────────────────────
+
+def compile_level(name: str) -> str:
+    """
+    Compile assets/<name>.json into assets/<name>.lvl (needs a running
+    Ursina app, since the collider bounds come from the loaded models):
+      1. Instantiate the pieces and record each collider's world bounds.
+      2. Check every spawn has something to land on.
+      3. Pack everything, with the source's sha1, into the .lvl.
+    """
+    from ursina import destroy
+    from spatial_index import SpatialIndex, world_aabb
+    from nav_grid import NavGrid
+
+    json_path = level_path(f'{name}.json')
+    with open(json_path, 'rb') as f:
+        source = f.read()
+    level = parse_level(name, json.loads(source.decode('utf-8')))
+
+    entities = build_level(level)
+    boxes = [world_aabb(e) for e in entities]
+    for e in entities:
+        destroy(e)
+
+    nav_grid = NavGrid(SpatialIndex(entities, boxes=boxes))
+    for label, spawn in [('player', level.player_spawn)] + [(f'bot {i}', b['position']) for i, b in enumerate(level.bots)]:
+        if nav_grid.heights[nav_grid.cell_index(spawn[0], spawn[2])] is None:
+            print(f"level: warning, {name} {label} spawn {spawn} has no floor below it")
+
+    lvl_path = json_path[:-len('.json')] + '.lvl'
+    data = pack_level(level, boxes, hashlib.sha1(source).digest())
+    with open(lvl_path, 'wb') as f:
+        f.write(data)
+    print(f"level: wrote {lvl_path} ({len(data)} bytes, {len(level.pieces)} pieces, {len(level.bots)} bots)")
+    return lvl_path
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != 'build':
+        print("usage: python level.py build [name ...]")
+        return
+
+    from panda3d.core import load_prc_file_data
+    from ursina import Ursina
+    load_prc_file_data('', 'audio-library-name null')
+    Ursina(window_type='none')
+
+    assets_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+    names = argv[1:] or sorted(f[:-len('.json')] for f in os.listdir(assets_dir) if f.endswith('.json'))
+    for name in names:
+        compile_level(name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Staged round loading behind a progress bar, with model prefetch while the
+main menu is idle.
+
+  1. prefetch() hands the round's models to Panda3D's async loader, which
+     reads them on its own thread; each finished model lands in ursina's
+     imported_meshes, so the round's Entity(model=...) calls only copy it.
+  2. load() runs a round's setup as a generator of stages: one stage per
+     frame behind a LoadingScreen (after any prefetch still in flight), or
+     all at once for headless runs.
+  3. update() advances it and is called from the game's update().
+"""
+import builtins
+import time
+
+from panda3d.core import Filename
+from ursina import Entity, Text, camera, color, destroy
+from model_cache import model_cache, GLTF_TYPES
+
+
+class LoadingScreen(Entity):
+    """Full-screen backdrop with a label and a progress bar in [0, 1]."""
+    def __init__(self, **kwargs):
+        super().__init__(parent=camera.ui, name='loading_screen', **kwargs)
+        self.backdrop = Entity(parent=self, model='quad', color=color.black, scale=(2, 1), z=1)
+        self.track    = Entity(parent=self, model='quad', color=color.gray.tint(-.3), scale=(.6, .03), y=-.1)
+        self.bar      = Entity(parent=self.track, model='quad', color=color.azure, origin_x=-.5, x=-.5, scale_x=0)
+        self.label    = Text(parent=self, text='Loading...', origin=(0, 0), y=-.03)
+
+    def show(self, label: str, progress: float) -> None:
+        self.label.text  = label
+        self.bar.scale_x = max(0, min(1, progress))
+
+
+class LevelLoader:
+    """
+    Loads a round in the background:
+      1. pending maps each imported_meshes key still being read by the
+         async loader to its file.
+      2. stages is the running setup generator; it yields (label, progress)
+         before each stage, and the label is what the screen shows while
+         that stage is next.
+    """
+    def __init__(self):
+        self.pending = {}      # imported_meshes key -> file being loaded
+        self.stages  = None
+        self.screen  = None
+        self.label   = None
+        self._waiting_for = 0
+        self._started     = 0.0
+
+    # ── Prefetch ───────────────────────────────────────────
+
+    @staticmethod
+    def model_file(name: str):
+        """The cached .bam behind a glTF model name, or None if only a synchronous load can produce it."""
+        if not model_cache.enabled or not name.lower().endswith(GLTF_TYPES):
+            return None
+        _, bam = model_cache.find_bam(name)
+        return bam if bam is not None and model_cache.cached(bam) else None
+
+    def prefetch(self, names) -> int:
+        """Start async loads for the models not loaded or loading yet; returns how many started."""
+        from ursina import mesh_importer
+        started = 0
+        for name in names:
+            stem = name.split('.')[0]    # ursina's imported_meshes key
+            if stem in mesh_importer.imported_meshes or stem in self.pending:
+                continue
+            path = self.model_file(name)
+            if path is None:
+                continue
+            # registered first: a model already in Panda's cache calls back immediately
+            self.pending[stem] = path
+            builtins.loader.loadModel(Filename.fromOsSpecific(path), callback=self._loaded, extraArgs=[stem])
+            started += 1
+        if started:
+            print(f"level_loader: prefetching {started} models")
+        return started
+
+    def _loaded(self, model, stem: str) -> None:
+        from ursina import mesh_importer
+        self.pending.pop(stem, None)
+        if model is None:
+            print(f"level_loader: could not prefetch {stem}")
+        elif stem not in mesh_importer.imported_meshes:
+            mesh_importer.imported_meshes[stem] = model
+            model_cache.hits += 1
+
+    # ── Stages ─────────────────────────────────────────────
+
+    @property
+    def busy(self) -> bool:
+        return self.stages is not None
+
+    def load(self, stages, background: bool = True) -> None:
+        """Run a setup generator: one stage per frame behind the loading screen, or right now."""
+        if not background:
+            for _ in stages:
+                pass
+            return
+        self.stages  = stages
+        self.label   = None
+        self.screen  = LoadingScreen()
+        self._waiting_for = len(self.pending)
+        self._started     = time.perf_counter()
+        self.screen.show('Loading models...', 0)
+
+    def update(self) -> None:
+        """Advance the round being loaded by one stage (called once per frame)."""
+        if self.stages is None:
+            return
+        if self.pending:
+            done = 1 - len(self.pending) / max(self._waiting_for, len(self.pending))
+            self.screen.show('Loading models...', .2 * done)
+            return
+
+        start = time.perf_counter()
+        try:
+            label, progress = next(self.stages)
+        except StopIteration:
+            self._report(self.label, start)
+            destroy(self.screen)
+            self.screen = None
+            self.stages = None
+            print(f"level_loader: round ready in {(time.perf_counter() - self._started) * 1000:.1f} ms")
+            return
+        self._report(self.label, start)
+        self.label = label
+        self.screen.show(label, progress)
+
+    @staticmethod
+    def _report(label, start: float) -> None:
+        if label is not None:
+            print(f"level_loader: {label} {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+level_loader = LevelLoader()
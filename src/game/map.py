@@ -1,12 +1,35 @@
 from ursina import *
 from ursina.prefabs.first_person_controller import FirstPersonController
-from ursina.prefabs.health_bar import HealthBar
-from direct.actor.Actor import Actor
+from spatial_index import SpatialIndex
+from nav_grid import NavGrid
+from pathfinding import PathService
+from heightfield import HeightField
+from projectiles import ProjectilePool
+from ai_manager import AIManager
+from health_bars import HealthBarLayer
+from headless import HEADLESS, game_time
+from ray_stats import ray_stats
+from profiler import profiler
+from static_world import flatten_static
+from level import load_level, build_level
+from model_cache import model_cache
+from animation_lod import AnimationLOD, shared_actor
+from sim_clock import SimClock, sim_clock
 import simplepbr
 
-app = Ursina()
+app = Ursina(window_type='none') if HEADLESS else Ursina()
 
-simplepbr.init()
+if not HEADLESS:
+    simplepbr.init()
+
+# glTF models load from their converted .bam (see model_cache.py)
+model_cache.install()
+
+ai_manager = AIManager()
+# Full-rate skinning near the camera, reduced further out, frozen past 45 units or out of view
+animation_lod = AnimationLOD()
+projectiles = ProjectilePool(capacity=64)
+health_bars = HealthBarLayer()
 
 class HealthMixin:
     def __init__(self, health=100, **kwargs):
@@ -36,32 +59,13 @@ class DummyTarget(Entity, HealthMixin):
         self.visible = True
         self.enabled = True
 
-        self.health_bar = HealthBar(
-            max_value=100,
-            value=100,
-            scale=(.3, .02),
-            bar_color=color.red.tint(-.2),
-            roundness=.5,
-            show_text=False,
-            parent=self
-        )
-        self.health_bar.x = 0.1
-        self.health_bar.y = 1  # position it above the target
-        # self.health_bar.z = -0.01  # prevent z-fighting
-        self.health_bar.billboard=True
+        # Drawn by the shared health-bar layer, above the target while it is hurt
+        health_bars.add(self, max_health=100, offset=1)
 
     def take_damage(self, amount):
         if not self.enabled:             # ignore damage if already “dead”
             return
         super().take_damage(amount)
-        # only update the bar if it still exists in the scene graph
-        try:
-            if hasattr(self, 'health_bar') and self.health_bar and self.health_bar.enabled:
-                self.health_bar.value = self.health
-        except AssertionError as e:
-            # health_bar node no longer valid—ignore
-            print(f"Health bar error: {e}")
-            pass
     
     def die(self):
         print(f'{self} died.')
@@ -69,10 +73,8 @@ class DummyTarget(Entity, HealthMixin):
         self.set_animation('Death', loop=False)
         invoke(lambda: destroy(self), delay=2.0)
         # if you had any generic respawning here, drop it
-        # also destroy any bullets that are children or tracked globally
-        for b in scene.entities:
-            if isinstance(b, Entity) and getattr(b, 'collider', None) == 'box' and b.model.name == 'cube':
-                destroy(b)
+        # also recall the bullets this target fired
+        projectiles.release_owned(self)
 
 class AIBot(DummyTarget):
     def __init__(self, patrol_area=(10, 10), chase_range=5, speed = 5, **kwargs):
@@ -86,10 +88,11 @@ class AIBot(DummyTarget):
         self.is_chasing = False
         self.state = 'idle'
 
-        # Replace normal model with Actor
-        self.actor = Actor('assets/newcharact.glb')
+        # Replace normal model with Actor (a copy of the one shared character)
+        self.actor = shared_actor(model_cache.model_path('assets/newcharact.glb'))
         self.actor.reparent_to(self)
-        self.actor.loop('RifleIdle')
+        self.animator = animation_lod.register(self.actor)
+        self.animator.play('RifleIdle')
 
         self.gun = Entity(
             parent=self,
@@ -102,18 +105,17 @@ class AIBot(DummyTarget):
         )
 
         self.target_pos = self.get_valid_ground_position()
-        self.update_task = invoke(self.patrol, delay=1)
+        ai_manager.add(self, delay=1)
+        sim_clock.interpolate(self)
 
     def set_animation(self, anim_name, loop=True):
-        """Change animation only if different from current."""
-        current_anim = self.actor.getCurrentAnim()
-        if current_anim != anim_name:
-            if loop:
-                self.actor.loop(anim_name)
-            else:
-                self.actor.play(anim_name)
+        """Change animation only if different from the one last requested (animation_lod may be holding it)."""
+        self.animator.play(anim_name, loop)
     
-    def patrol(self):
+    def patrol(self, dt=None):
+        """One AI tick; called by ai_manager with the time since this bot's last tick."""
+        if dt is None:
+            dt = time.dt
         if not getattr(self, 'enabled', False) or not getattr(self, 'alive', False):
             return
         if not self.alive:
@@ -131,7 +133,13 @@ class AIBot(DummyTarget):
             if distance(self.position, self.target_pos) < 0.5:
                 self.target_pos = self.get_valid_ground_position()
 
-        move_dir = (self.target_pos - self.position).normalized()
+        # Chasing bots steer along the shared A* path around houses and walls
+        steer_pos = self.target_pos
+        if self.is_chasing:
+            waypoint = path_service.next_waypoint(self.position, player.position)
+            if waypoint is not None:
+                steer_pos = waypoint
+        move_dir = (steer_pos - self.position).normalized()
 
         # Determine animation state
         if self.is_chasing:
@@ -143,25 +151,27 @@ class AIBot(DummyTarget):
                 self.set_animation('RifleIdle')
 
         # 2. Wall detection
-        front_ray = raycast(
-            self.position + Vec3(0, 0.5, 0),
-            move_dir,
-            distance=0.6,
-            ignore=[self],
-            traverse_target=scene
-        )
-        if front_ray.hit and not self.is_chasing:
-            # print("Wall ahead. Choosing new target.")
-            self.target_pos = self.get_valid_ground_position()
-            move_dir = (self.target_pos - self.position).normalized()
-            # Recalculate front ray with new direction
-            front_ray = raycast(
+        with ray_stats.measure('bot.patrol_front'):
+            front_ray = world_index.raycast(
                 self.position + Vec3(0, 0.5, 0),
                 move_dir,
                 distance=0.6,
                 ignore=[self],
-                traverse_target=scene
+                bodies=True
             )
+        if front_ray.hit and not self.is_chasing:
+            # print("Wall ahead. Choosing new target.")
+            self.target_pos = self.get_valid_ground_position()
+            move_dir = (self.target_pos - self.position).normalized()
+            # Recalculate front ray with new direction
+            with ray_stats.measure('bot.patrol_front'):
+                front_ray = world_index.raycast(
+                    self.position + Vec3(0, 0.5, 0),
+                    move_dir,
+                    distance=0.6,
+                    ignore=[self],
+                    bodies=True
+                )
 
         # 3. Avoid player and other bots
         blocked = False
@@ -170,15 +180,11 @@ class AIBot(DummyTarget):
 
         # 4. Move if clear
         if not blocked and not front_ray.hit:
-            self.position += move_dir * self.speed * time.dt
+            self.position += move_dir * self.speed * dt
 
         # 5. Keep grounded
-        down_ray = raycast(
-            self.position + Vec3(0, 0.5, 0),
-            direction=Vec3(0, -1, 0),
-            ignore=[self],
-            traverse_target=scene
-        )
+        with ray_stats.measure('bot.patrol_down'):
+            down_ray = height_field.ground(self.position + Vec3(0, 0.5, 0), ignore=[self])
         if down_ray.hit:
             self.y = down_ray.world_point.y + 1
 
@@ -189,36 +195,21 @@ class AIBot(DummyTarget):
             self.rotation_z = 0
             self.shoot()
 
-        self.update_task = invoke(self.patrol, delay=0.1)
-
-    def get_valid_ground_position(self, max_attempts=10):
-        for _ in range(max_attempts):
-            x = random.uniform(-self.patrol_area[0], self.patrol_area[0])
-            z = random.uniform(-self.patrol_area[1], self.patrol_area[1])
-            test_pos = Vec3(x, 20, z)
-            # print(f"Trying position: ({x}, 20, {z})")
-            ground_ray = raycast(
-                test_pos,
-                direction=Vec3(0, -1, 0),
-                distance=50,
-                ignore=[self],
-                traverse_target=scene
-            )
-            # print(f"Ground ray: {ground_ray}")
-            # print(f"Ground ray hit: {ground_ray.hit}, world point: {ground_ray.world_point}")
-            if ground_ray.hit:
-                y = ground_ray.world_point.y + 1
-                # print(f"Valid ground found at: ({x}, {y}, {z})")
-                return Vec3(x, y, z)
-        print("Failed to find valid ground. Returning origin.")
-        print(f"Last attempted position: ({x}, 20, {z})")
-        return Vec3(0, 1, 0)
-    
+    def get_valid_ground_position(self):
+        """Random walkable point inside the patrol area, drawn from the baked nav grid."""
+        p = nav_grid.random_point(
+            -self.patrol_area[0], -self.patrol_area[1],
+             self.patrol_area[0],  self.patrol_area[1]
+        )
+        if p is None:
+            return Vec3(self.position)
+        return Vec3(p.x, p.y + 1, p.z)  # bot origin sits 1 unit above the surface
+
     def shoot(self):
-        if not self.alive or not player or not self.enabled or time.time() < self._next_fire_time:
+        if not self.alive or not player or not self.enabled or game_time() < self._next_fire_time:
             return
         
-        self._next_fire_time = time.time() + self.fire_interval
+        self._next_fire_time = game_time() + self.fire_interval
 
         # Play shooting animation once
         self.set_animation('FiringRifle', loop=False)
@@ -235,82 +226,48 @@ class AIBot(DummyTarget):
         dir_to_player = (player.position - self.position).normalized()
         eye_pos = self.position + Vec3(-.1, .5, .3)  # AI eye height
 
-        bullet = Entity(
-            model='cube',
-            color=color.gold,
-            scale=0.2,
-            position=eye_pos,
-            collider='box',
+        # Tracer from the shared pool; contact damage is applied in bullet_hit()
+        projectiles.spawn(
+            eye_pos,
+            player.position - eye_pos,
             speed=30,
-            name='ai_bullet'
+            owner=self,
+            life=3,
+            max_range=50,
+            collide=True,
+            targets=(player,),
+            hit_radius=.5,
+            on_hit=self.bullet_hit
         )
-        bullet.world_parent = scene
-        # Make the bullet face the direction to player
-        bullet.look_at(player.position)
-
-        def bullet_update(b=bullet):
-            if not b or not b.enabled:
-                return
-            # Check if player exists and is not destroyed
-            if not player or not hasattr(player, 'position') or player in scene.entities and player.enabled == False:
-                destroy(b)
-                return
-            # Check if AI (self) still exists and is enabled
-            if not self or not hasattr(self, 'position') or not self.enabled:
-                destroy(b)
-                return
-            # Raycast ahead of the bullet's current path
-            hit_info = raycast(
-                origin=b.position,
-                direction=b.forward,
-                distance=b.speed * time.dt,
-                ignore=[b, self],
-                traverse_target=scene
+
+        with ray_stats.measure('bot.shoot_los'):
+            hit = world_index.raycast(
+                eye_pos,
+                dir_to_player,
+                distance=50,
+                ignore=[self],
+                bodies=True
             )
-            if hit_info.hit:
-                if hit_info.entity == player:
-                    if hasattr(player, 'take_damage'):
-                        player.take_damage(10)
-                    print("Bullet hit the player")
-                else:
-                    print(f"Bullet hit: {hit_info.entity}")
-                destroy(b)
-                return
-            b.position += b.forward * b.speed * time.dt
-
-            # Check bullet proximity to player safely
-            if player and hasattr(player, 'position') and distance(b.position, player.position) < 1.0:
-                if hasattr(player, 'take_damage'):
-                    player.take_damage(10)
-                destroy(b)
-                return
-
-            # Check if bullet is too far from AI
-            if self and hasattr(self, 'position') and distance(b.position, self.position) > 50:
-                destroy(b)
-                return
-
-        bullet.update = bullet_update
-
-        hit = raycast(
-            origin=eye_pos,
-            direction=dir_to_player,
-            distance=50,
-            ignore=[self],
-            traverse_target=scene
-        )
 
         if hit.hit and hit.entity == player:
             print(f"{self} shot the player!")
             player.take_damage(10)
-            self._next_fire_time = time.time() + self.fire_interval
+            self._next_fire_time = game_time() + self.fire_interval
     
+    def bullet_hit(self, projectile, entity, point):
+        """on_hit callback for this bot's bullets."""
+        if entity is not None and entity == player:
+            if hasattr(player, 'take_damage'):
+                player.take_damage(10)
+            print("Bullet hit the player")
+        else:
+            print(f"Bullet hit: {entity}")
+
     def die(self):
         print(f'{self} died.')
         super().die()
-        # stop its patrol task
-        if hasattr(self, 'update_task'):
-            self.update_task.pause()
+        # stop ticking it
+        ai_manager.remove(self)
         # destroy this instance
         destroy(self)
         # spawn a brand-new bot after 3 seconds at the same spawn_point
@@ -321,60 +278,114 @@ class AIBot(DummyTarget):
             position=self.spawn_point
         ), delay=3)
 
+class TickedFirstPersonController(FirstPersonController):
+    """
+    ursina's first-person prefab with its physics on the simulation clock:
+      1. fixed_update() runs the prefab's movement, gravity and landing once
+         per tick (see sim_clock.py); update() keeps mouse look at the
+         display rate.
+      2. jump() no longer builds a y animation sized from 1 // time.dt; the
+         rise follows the same out_expo curve from a per-tick timer and is
+         cut off at fall_after, as the prefab's start_fall() does.
+    """
+    def __init__(self, **kwargs):
+        self.jump_timer  = None  # seconds into the current jump's rise
+        self.jump_base_y = None  # y the rise started from, taken on its first tick
+        super().__init__(**kwargs)
 
-# Double-size open map — 60 × 60 (simple, direct expansion)
-
-# ground (make one big ground)
-ground = Entity(name='ground', model='cube', scale=(60,1,60), position=(0,0,0),
-                texture='white_cube', texture_scale=(60,60), collider='box')
-
-# outer walls: horizontal segments length 10 each.
-# Top and bottom at z = +30 / -30 (centers). To cover -30..+30 need 6 segments at x = -25,-15,-5,5,15,25.
-for cx in (-25,-15,-5,5,15,25):
-    Entity(model='assets/wall_03.gltf', position=(cx,0.5,30), rotation=(0,0,0), scale=1, collider='box')
-    Entity(model='assets/wall_03.gltf', position=(cx,0.5,-30), rotation=(0,0,0), scale=1, collider='box')
-
-# Left/Right vertical outer walls: rotate 90 degrees; centers at x = ±30, z = -25..25 (same centers)
-for cz in (-25,-15,-5,5,15,25):
-    Entity(model='assets/wall_03.gltf', position=(-30,0,5,cz)[0:3], rotation=(0,90,0), scale=1, collider='box')
-    # above line is shorthand; in practice:
-    Entity(model='assets/wall_03.gltf', position=(-30,0.5,cz), rotation=(0,90,0), scale=1, collider='box')
-    Entity(model='assets/wall_03.gltf', position=( 30,0.5,cz), rotation=(0,90,0), scale=1, collider='box')
-
-# Houses: a 3×3 grid centered in the middle, centers at x,z = -10,0,10
-for hx in (-10, 0, 10):
-    for hz in (-10, 0, 10):
-        Entity(name=f'house_{hx}_{hz}', model='assets/building_01.gltf',
-            position=(hx,0.5,hz), rotation=(0,0,0), scale=1, collider='box')
+    def update(self):
+        self.rotation_y += mouse.velocity[0] * self.mouse_sensitivity[1]
+        self.camera_pivot.rotation_x -= mouse.velocity[1] * self.mouse_sensitivity[0]
+        self.camera_pivot.rotation_x = clamp(self.camera_pivot.rotation_x, -90, 90)
+
+    def fixed_update(self):
+        # Jump: rise along the curve until fall_after
+        if self.jump_timer is not None:
+            if self.jump_base_y is None:
+                self.jump_base_y = self.y
+            self.jump_timer += time.dt
+            if self.jump_timer >= self.fall_after:
+                self.start_fall()
+            else:
+                t = min(self.jump_timer / self.jump_up_duration, 1)
+                self.y = self.jump_base_y + self.jump_height * curve.out_expo(t)
 
-# Flank walls (short 5-unit pieces) placed as inner fences between outer bounds and houses.
-# Example: north row at z = +20, centers x = -20,-10,0,10,20  (creates passable ~1-unit gaps)
-for cx in (-20,-10,0,10,20):
-    Entity(model='assets/wall_01.gltf', position=(cx,0.5,20), rotation=(0,0,0), scale=1, collider='box')
-    Entity(model='assets/wall_01.gltf', position=(cx,0.5,-20), rotation=(0,0,0), scale=1, collider='box')
+        # The prefab's own update() minus the look, which update() already did this frame
+        sensitivity = self.mouse_sensitivity
+        self.mouse_sensitivity = Vec2(0, 0)
+        try:
+            super().update()
+        finally:
+            self.mouse_sensitivity = sensitivity
 
-# West/East flank walls (vertical orientation): centers at x = -20 and 20, z = -20,-10,0,10,20
-for cz in (-20,-10,0,10,20):
-    Entity(model='assets/wall_01.gltf', position=(-20,0.5,cz), rotation=(0,90,0), scale=1, collider='box')
-    Entity(model='assets/wall_01.gltf', position=( 20,0.5,cz), rotation=(0,90,0), scale=1, collider='box')
+    def jump(self):
+        if not self.grounded:
+            return
+        self.grounded    = False
+        self.jumping     = True
+        self.jump_timer  = 0.0
+        self.jump_base_y = None
+
+    def start_fall(self):
+        self.jump_timer = None
+        self.jumping    = False
+
+# Profiling mode (ECHOES_PROFILE=1): update() and fixed_update() time per class, bot ticks and invoke()d callbacks as spans
+profiler.instrument(TickedFirstPersonController, methods=('update', 'fixed_update'))
+profiler.instrument(AIBot, methods=('patrol', 'shoot'))
+profiler.instrument(AIManager, ProjectilePool, AnimationLOD)
+profiler.instrument(HealthBarLayer, methods=('update_bars',))
+profiler.instrument(SimClock, methods=('advance',))
+invoke = profiler.wrap_invoke(invoke)
+
+
+# Double-size open map — 60 × 60: ground, outer walls, a 3×3 grid of houses and
+# inner flank walls, all listed in assets/map.json
+level = load_level('map')
+static_colliders = build_level(level)
+
+# index the static colliders once; bots query it instead of walking the whole scene
+world_index = SpatialIndex(static_colliders, boxes=level.boxes)
+nav_grid = NavGrid(world_index)
+path_service = PathService(nav_grid)
+height_field = HeightField(world_index)
+projectiles.world_index = world_index
+
+# draw walls, houses and ground as a few merged nodes (colliders stay on the originals)
+flatten_static(static_colliders)
 
 # ──────────────── AI Bots ────────────────
-
-# Top left corner (free of houses/walls)
-AIBot(position=(-10, 10, 10), patrol_area=(4, 4), chase_range=12, speed=7)
-
-# Bottom right corner
-AIBot(position=(10, 10, -10), patrol_area=(4, 4), chase_range=8, speed=4)
-  
-# Middle-left flank area
-AIBot(position=(-10, 10, 0), patrol_area=(3, 5), chase_range=10, speed=6)
-
-# Middle-right flank area
-AIBot(position=(10, 10, 0), patrol_area=(3, 5), chase_range=13, speed=8)
-
-# Bottom-center between houses and wall
-AIBot(position=(0, 10, -12), patrol_area=(5, 3), chase_range=15, speed=10)
-
-player = FirstPersonController()
-
-app.run()
\ No newline at end of file
+for bot in level.bots:
+    AIBot(**bot)
+
+player = TickedFirstPersonController(position=level.player_spawn)
+sim_clock.interpolate(player)
+ai_manager.player = player
+
+def simulate():
+    """One fixed simulation tick (time.dt is the tick length)."""
+    if player.enabled:
+        player.fixed_update()
+    # Bound the player once for every ray the bots cast this tick
+    world_index.update_bodies([player])
+    # All bot AI runs from here, at distance-based rates
+    ai_manager.update()
+    # ...and every bullet in flight
+    projectiles.update()
+
+def update():
+    # Close the previous frame's raycast stats and profile (no-ops unless enabled)
+    ray_stats.end_frame()
+    profiler.end_frame()
+    # Bot AI and bullets run in fixed ticks; bots are shown between their last two ticks
+    sim_clock.advance(simulate)
+    # Every hurt target's health bar, as one mesh
+    health_bars.update_bars()
+    # Freeze the animation of bots too far away or out of view
+    animation_lod.update(ai_manager.bots)
+
+update = profiler.wrap(update, 'update')
+
+# Headless runs (headless.py) drive the game themselves
+if not HEADLESS:
+    app.run()
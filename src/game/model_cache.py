@@ -0,0 +1,297 @@
+"""
+Content-hashed .bam cache for glTF models.
+
+    python model_cache.py prewarm    # convert every glTF under assets/ (run before bdist_apps)
+
+  1. A glTF/glb is converted to Panda3D's native .bam once and stored next
+     to it as bam/<name>-<key>.bam.pz, where the key hashes the source bytes
+     together with the converter (cache format, panda3d-gltf and Panda3D
+     versions, sRGB setting). Editing a model or upgrading the converter
+     simply misses the cache. The .bam is zlib-compressed (.pz): embedded
+     textures are stored as raw images, ~3 MB per model uncompressed.
+  2. install() routes ursina's load_model() through the cache, so every
+     Entity(model='assets/x.gltf') loads the .bam; Actors take their path
+     from model_path().
+  3. prewarm converts everything ahead of time and writes bam/index.json,
+     which setup_ursina_android uses to extract the cache from the APK.
+  4. Packaged builds (assets extracted from the APK) find a model's .bam
+     through that index, so the glTF is neither extracted nor read; the
+     source is only hashed when the index has no usable entry. Running
+     from the source tree always hashes, so edited models are picked up.
+
+Set ECHOES_MODEL_CACHE=0 to load the glTF files directly.
+"""
+import builtins
+import hashlib
+import json
+import os
+import sys
+
+from panda3d.core import Filename, NodePath, PandaSystem
+from setup_ursina_android import ensure_asset, lazy_assets
+
+CACHE_VERSION = 1
+GLTF_TYPES    = ('.gltf', '.glb')
+BAM_TYPES     = ('.bam', '.bam.pz')
+INDEX_FILE    = 'index.json'
+
+
+class ModelCache:
+    """
+    glTF -> .bam conversions keyed by content hash:
+      1. lookup() takes the .bam from the shipped index when it can (see
+         use_index), else hashes the source (once per session) and returns
+         the matching .bam, converting and writing it first on a miss.
+      2. load() returns the model the way ursina's load_model() would,
+         sharing ursina's imported_meshes so later copies stay cheap.
+      3. hits / misses count this session's lookups.
+    """
+    def __init__(self, enabled: bool = True, cache_dir: str = 'bam', compress: bool = True, use_index=None):
+        self.enabled   = enabled
+        self.cache_dir = cache_dir
+        self.compress  = compress
+        self.hits      = 0
+        self.misses    = 0
+        self._use_index = use_index   # None: only in packaged builds
+        self._keys      = {}    # source path -> key
+        self._indexes   = {}    # model folder -> {glTF file name: .bam path}
+
+    # ── Keys ───────────────────────────────────────────────
+
+    @staticmethod
+    def no_srgb() -> bool:
+        try:
+            from ursina import application
+            return bool(application.gltf_no_srgb)
+        except (ImportError, AttributeError):
+            return True
+
+    def converter_tag(self) -> str:
+        import gltf
+        return (f'cache{CACHE_VERSION}/gltf{getattr(gltf, "__version__", "?")}/'
+                f'panda{PandaSystem.getVersionString()}/no_srgb{int(self.no_srgb())}')
+
+    def key(self, source: str) -> str:
+        key = self._keys.get(source)
+        if key is None:
+            h = hashlib.sha1(self.converter_tag().encode('utf-8'))
+            with open(source, 'rb') as f:
+                h.update(f.read())
+            key = self._keys[source] = h.hexdigest()[:16]
+        return key
+
+    def bam_path(self, source: str) -> str:
+        folder, filename = os.path.split(source)
+        stem = os.path.splitext(filename)[0]
+        ext = '.bam.pz' if self.compress else '.bam'
+        return os.path.join(folder, self.cache_dir, f'{stem}-{self.key(source)}{ext}')
+
+    @property
+    def use_index(self) -> bool:
+        """Whether to trust bam/index.json over hashing: by default, only when assets come from the APK."""
+        if self._use_index is not None:
+            return self._use_index
+        return lazy_assets.files_dir is not None
+
+    def indexed_bam(self, name: str):
+        """The .bam the prewarm index lists for a model name, or None."""
+        folder, filename = os.path.split(name)
+        index = self._indexes.get(folder)
+        if index is None:
+            index = self._indexes[folder] = self._read_index(folder)
+        return index.get(filename)
+
+    def _read_index(self, folder: str) -> dict:
+        path = self.resolve(f'{folder}/{self.cache_dir}/{INDEX_FILE}' if folder else f'{self.cache_dir}/{INDEX_FILE}')
+        if path is None:
+            return {}
+        try:
+            with open(path) as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"model_cache: ignoring {path}: {e}")
+            return {}
+        # bams from another converter would not match what hashing finds
+        if index.get('converter') != self.converter_tag():
+            return {}
+        cache_folder = os.path.dirname(path)
+        return {source: os.path.join(cache_folder, bam) for source, bam in index.get('models', {}).items()}
+
+    def find_bam(self, name: str):
+        """(source path or None, .bam path) for a model name, or (None, None) if there is no such model."""
+        if self.use_index:
+            bam = self.indexed_bam(name)
+            if bam is not None and self.cached(bam):
+                return None, bam
+        source = self.resolve(name)
+        if source is None:
+            return None, None
+        return source, self.bam_path(source)
+
+    @staticmethod
+    def resolve(name: str):
+        """File path of a model name like 'assets/wall_01.gltf', or None."""
+        ensure_asset(name)
+        candidates = [name]
+        try:
+            from ursina import application
+            candidates.insert(0, os.path.join(str(application.asset_folder), name))
+        except ImportError:
+            pass
+        for path in candidates:
+            if os.path.isfile(path):
+                return path
+        return None
+
+    # ── Conversion ─────────────────────────────────────────
+
+    def convert(self, source: str, bam: str):
+        """Parse the glTF and write it to `bam`; returns the loaded ModelRoot."""
+        import gltf
+        settings = gltf.GltfSettings()
+        settings.no_srgb = self.no_srgb()
+        root = gltf.load_model(source, gltf_settings=settings)
+
+        try:
+            os.makedirs(os.path.dirname(bam), exist_ok=True)
+            # same extension, so a .pz temp file is compressed too
+            tmp = os.path.join(os.path.dirname(bam), '.tmp-' + os.path.basename(bam))
+            if NodePath(root).writeBamFile(Filename.fromOsSpecific(tmp)):
+                os.replace(tmp, bam)
+            else:
+                print(f"model_cache: could not write {bam}")
+        except OSError as e:
+            # a read-only install still runs, just without a cache
+            print(f"model_cache: could not write {bam}: {e}")
+        return root
+
+    def cached(self, bam: str) -> bool:
+        """Whether `bam` is on disk (pulled out of the APK first, on Android)."""
+        ensure_asset(f'{self.cache_dir}/{os.path.basename(bam)}')
+        return os.path.exists(bam)
+
+    def lookup(self, name: str):
+        """Path of the cached .bam for a glTF model name, or None if there is no such file."""
+        source, bam = self.find_bam(name)
+        if bam is None:
+            return None
+        if source is None or self.cached(bam):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.convert(source, bam)
+            if not os.path.exists(bam):
+                return None
+        return bam
+
+    # ── Loading ────────────────────────────────────────────
+
+    def model_path(self, name: str) -> str:
+        """The .bam to load instead of a glTF (for Actor and loader calls), or `name` itself."""
+        if self.enabled and name.lower().endswith(GLTF_TYPES):
+            return self.lookup(name) or name
+        return name
+
+    def load(self, name: str):
+        """A glTF model from the cache as a NodePath, or None to let ursina load it."""
+        from ursina import mesh_importer
+        stem = name.split('.')[0]    # ursina's imported_meshes key
+        if stem in mesh_importer.imported_meshes:
+            return None
+
+        source, bam = self.find_bam(name)
+        if bam is None:
+            return None
+        if source is None or self.cached(bam):
+            self.hits += 1
+            root = builtins.loader.loadModel(Filename.fromOsSpecific(bam)).node()
+        else:
+            self.misses += 1
+            root = self.convert(source, bam)
+
+        mesh_importer.imported_meshes[stem] = NodePath(root)
+        return NodePath(root)
+
+    def install(self) -> None:
+        """Send ursina's load_model() (and so Entity.model) through the cache."""
+        if not self.enabled:
+            return
+        from ursina import entity, mesh_importer
+        original = mesh_importer.load_model
+        if getattr(original, '_model_cache', False):
+            return
+        cache = self
+
+        def load_model(name, *args, **kwargs):
+            if isinstance(name, str) and name.lower().endswith(GLTF_TYPES):
+                model = cache.load(name)
+                if model is not None:
+                    return model
+            return original(name, *args, **kwargs)
+
+        load_model._model_cache = True
+        mesh_importer.load_model = load_model
+        entity.load_model = load_model
+
+    # ── Prewarm ────────────────────────────────────────────
+
+    def prewarm(self, root: str) -> list:
+        """
+        Convert every glTF under `root`:
+          1. Each model's current .bam is written unless it already exists.
+          2. Stale .bams of the same model (older keys) are deleted.
+          3. Every cache folder gets an index.json of its .bam files.
+        Returns the .bam paths.
+        """
+        written = []
+        for folder, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if d != self.cache_dir]
+            sources = sorted(f for f in files if f.lower().endswith(GLTF_TYPES))
+            if not sources:
+                continue
+
+            cache_folder = os.path.join(folder, self.cache_dir)
+            index = {}
+            for filename in sources:
+                source = os.path.join(folder, filename)
+                bam = self.bam_path(source)
+                if not os.path.exists(bam):
+                    try:
+                        self.convert(source, bam)
+                    except Exception as e:
+                        # e.g. a glTF whose .bin buffer isn't in the repo
+                        print(f"model_cache: skipping {source}: {e}")
+                        continue
+                    print(f"model_cache: {source} -> {bam}")
+                index[filename] = os.path.basename(bam)
+                written.append(bam)
+
+            if not index:
+                continue
+            current = set(index.values())
+            stems = {os.path.splitext(f)[0] for f in sources}
+            for f in os.listdir(cache_folder):
+                if f.endswith(BAM_TYPES) and f not in current and f.rsplit('-', 1)[0] in stems:
+                    os.remove(os.path.join(cache_folder, f))
+                    print(f"model_cache: removed stale {f}")
+
+            with open(os.path.join(cache_folder, INDEX_FILE), 'w') as f:
+                json.dump({'converter': self.converter_tag(), 'models': index}, f, indent=2)
+        return written
+
+
+model_cache = ModelCache(enabled=os.environ.get('ECHOES_MODEL_CACHE') != '0')
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != 'prewarm':
+        print("usage: python model_cache.py prewarm [folder]")
+        return
+    root = argv[1] if len(argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+    bams = model_cache.prewarm(root)
+    print(f"model_cache: {len(bams)} models cached under {root}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import math
+import random
+from collections import Counter
+from ursina import Vec3
+
+
+class NavGrid:
+    """
+    Walkable-cell grid baked once per level from the static colliders:
+      1. Each cell records the highest surface of the boxes overlapping it.
+      2. A cell is walkable if that surface is within max_step of the
+         level's floor, so wall and house footprints are blocked.
+      3. Spawn and patrol points are drawn from per-area lists of walkable
+         cells, so sampling is O(1) and needs no raycasts.
+    """
+    def __init__(self, index, cell_size: float = 1.0, max_step: float = .5):
+        self.cell_size = cell_size
+        self.min_x = index.min_x
+        self.min_z = index.min_z
+        self.nx = max(1, int(math.ceil((index.max_x - index.min_x) / cell_size)))
+        self.nz = max(1, int(math.ceil((index.max_z - index.min_z) / cell_size)))
+
+        # 1) Lowest and highest box top over every cell (None = nothing there)
+        floors  = [None] * (self.nx * self.nz)
+        heights = [None] * (self.nx * self.nz)
+        eps = 1e-3   # boxes that only touch a cell edge don't count
+        for iz in range(self.nz):
+            for ix in range(self.nx):
+                x0 = self.min_x + ix * cell_size
+                z0 = self.min_z + iz * cell_size
+                tops = [index.boxes[i][1][1] for i in index.boxes_in_rect(
+                    x0 + eps, z0 + eps, x0 + cell_size - eps, z0 + cell_size - eps)]
+                if tops:
+                    floors[iz * self.nx + ix]  = min(tops)
+                    heights[iz * self.nx + ix] = max(tops)
+
+        # 2) The level floor is the most common lowest surface
+        counts = Counter(round(f, 3) for f in floors if f is not None)
+        self.floor_y = counts.most_common(1)[0][0] if counts else 0.0
+
+        self.heights  = heights
+        self.walkable = [h is not None and h <= self.floor_y + max_step for h in heights]
+        self.walkable_cells = [i for i, w in enumerate(self.walkable) if w]
+        self._area_cells = {}
+
+    def cell_of(self, x: float, z: float) -> tuple:
+        ix = int((x - self.min_x) // self.cell_size)
+        iz = int((z - self.min_z) // self.cell_size)
+        return min(max(ix, 0), self.nx - 1), min(max(iz, 0), self.nz - 1)
+
+    def cell_index(self, x: float, z: float) -> int:
+        ix, iz = self.cell_of(x, z)
+        return iz * self.nx + ix
+
+    def cell_center(self, cell: int) -> Vec3:
+        """World-space point on the surface at the middle of a cell."""
+        ix, iz = cell % self.nx, cell // self.nx
+        return Vec3(
+            self.min_x + (ix + .5) * self.cell_size,
+            self.heights[cell],
+            self.min_z + (iz + .5) * self.cell_size
+        )
+
+    def is_walkable(self, x: float, z: float) -> bool:
+        return self.walkable[self.cell_index(x, z)]
+
+    def cells_in_area(self, x0: float, z0: float, x1: float, z1: float) -> list:
+        """Walkable cells whose centers lie in the rectangle; cached per rectangle."""
+        key = (x0, z0, x1, z1)
+        if key not in self._area_cells:
+            ix0, iz0 = self.cell_of(x0, z0)
+            ix1, iz1 = self.cell_of(x1, z1)
+            cells = []
+            for iz in range(iz0, iz1 + 1):
+                for ix in range(ix0, ix1 + 1):
+                    cell = iz * self.nx + ix
+                    c = self.cell_center(cell) if self.walkable[cell] else None
+                    if c is not None and x0 <= c.x <= x1 and z0 <= c.z <= z1:
+                        cells.append(cell)
+            self._area_cells[key] = cells
+        return self._area_cells[key]
+
+    def random_point(self, x0: float, z0: float, x1: float, z1: float) -> Vec3:
+        """
+        Random surface point on a walkable cell inside the rectangle.
+        If the rectangle has no walkable cell, any walkable cell of the level is used.
+        """
+        cells = self.cells_in_area(x0, z0, x1, z1) or self.walkable_cells
+        if not cells:
+            return None
+
+        p = self.cell_center(random.choice(cells))
+        # Jitter inside the cell so bots don't all walk to exact centers
+        half = self.cell_size / 2
+        p.x += random.uniform(-half, half) * .8
+        p.z += random.uniform(-half, half) * .8
+        return p
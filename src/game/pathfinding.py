@@ -0,0 +1,193 @@
+import heapq
+import math
+from collections import OrderedDict
+from ursina import Vec3
+
+
+class PathService:
+    """
+    Grid A* over a NavGrid, shared by every chasing bot:
+      1. Paths are stored per goal cell as a "next hop" table, so any bot
+         standing on a cell that is already on a path to the same goal
+         reuses it without searching.
+      2. A new search stops as soon as it reaches such a cell and splices
+         onto the cached path, so bots converging on the player share work.
+      3. Tables are only dropped when the goal cell changes (the oldest
+         goals are evicted once more than `max_goals` are cached).
+      4. Failures are shared too: every walkable cell carries the label of
+         its connected region, so a goal in another region (a walled-off
+         yard) is rejected without searching, and a search that gives up
+         after `max_expansions` is not retried from the same region until
+         the goal cell changes.
+    """
+    def __init__(self, nav_grid, max_goals: int = 8, max_expansions: int = 4000):
+        self.grid = nav_grid
+        self.max_goals = max_goals
+        self.max_expansions = max_expansions  # give up on unreachable goals early
+        self._next_hop = OrderedDict()        # goal cell -> {cell: next cell towards goal}
+        self._given_up = {}                   # goal cell -> regions whose search hit max_expansions
+        self.region = self._label_regions()   # cell -> connected region id (None if blocked)
+
+        self.searches = 0   # counters, handy when profiling
+        self.reuses   = 0
+        self.rejects  = 0
+
+    def _neighbors(self, cell: int):
+        """8-connected walkable neighbours, no cutting across blocked corners."""
+        g = self.grid
+        ix, iz = cell % g.nx, cell // g.nx
+        for dx, dz in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)):
+            jx, jz = ix + dx, iz + dz
+            if not (0 <= jx < g.nx and 0 <= jz < g.nz):
+                continue
+            n = jz * g.nx + jx
+            if not g.walkable[n]:
+                continue
+            if dx and dz and not (g.walkable[iz * g.nx + jx] and g.walkable[jz * g.nx + ix]):
+                continue
+            yield n, (1.4142 if dx and dz else 1.0)
+
+    def _label_regions(self) -> list:
+        """Flood-fill the walkable cells into regions connected by _neighbors()."""
+        g = self.grid
+        labels = [None] * (g.nx * g.nz)
+        region = 0
+        for cell in g.walkable_cells:
+            if labels[cell] is not None:
+                continue
+            labels[cell] = region
+            stack = [cell]
+            while stack:
+                for n, _ in self._neighbors(stack.pop()):
+                    if labels[n] is None:
+                        labels[n] = region
+                        stack.append(n)
+            region += 1
+        return labels
+
+    def _heuristic(self, a: int, b: int) -> float:
+        nx = self.grid.nx
+        dx = abs(a % nx - b % nx)
+        dz = abs(a // nx - b // nx)
+        return max(dx, dz) + .4142 * min(dx, dz)   # octile distance
+
+    def nearest_walkable(self, cell: int, radius: int = 3):
+        """The cell itself if walkable, else the closest walkable cell within `radius`."""
+        g = self.grid
+        if g.walkable[cell]:
+            return cell
+        ix, iz = cell % g.nx, cell // g.nx
+        best, best_d = None, math.inf
+        for jz in range(max(0, iz - radius), min(g.nz, iz + radius + 1)):
+            for jx in range(max(0, ix - radius), min(g.nx, ix + radius + 1)):
+                n = jz * g.nx + jx
+                d = (jx - ix) ** 2 + (jz - iz) ** 2
+                if g.walkable[n] and d < best_d:
+                    best, best_d = n, d
+        return best
+
+    def _table(self, goal: int) -> dict:
+        table = self._next_hop.get(goal)
+        if table is None:
+            table = self._next_hop[goal] = {goal: None}
+            while len(self._next_hop) > self.max_goals:
+                evicted, _ = self._next_hop.popitem(last=False)
+                self._given_up.pop(evicted, None)
+        else:
+            self._next_hop.move_to_end(goal)
+        return table
+
+    def path(self, start: int, goal: int) -> list:
+        """List of cells from start to goal (inclusive), or [] if unreachable."""
+        region = self.region[start]
+        if region is None or region != self.region[goal]:
+            self.rejects += 1
+            return []
+        table = self._table(goal)
+
+        if start not in table:
+            if region in self._given_up.get(goal, ()):
+                self.rejects += 1
+                return []
+            self.searches += 1
+            if not self._search(start, goal, table):
+                self._given_up.setdefault(goal, set()).add(region)
+                return []
+        else:
+            self.reuses += 1
+
+        cells = [start]
+        while table[cells[-1]] is not None:
+            cells.append(table[cells[-1]])
+        return cells
+
+    def _search(self, start: int, goal: int, table: dict) -> bool:
+        """A* from start until the goal or any cell already in the goal's table."""
+        came_from = {start: None}
+        cost = {start: 0.0}
+        frontier = [(self._heuristic(start, goal), start)]
+        expansions = 0
+
+        while frontier:
+            _, cell = heapq.heappop(frontier)
+            if cell in table:
+                # Splice: record next hops along the new branch
+                while came_from[cell] is not None:
+                    table[came_from[cell]] = cell
+                    cell = came_from[cell]
+                return True
+
+            expansions += 1
+            if expansions > self.max_expansions:
+                return False
+
+            for n, step in self._neighbors(cell):
+                c = cost[cell] + step
+                if c < cost.get(n, math.inf):
+                    cost[n] = c
+                    came_from[n] = cell
+                    heapq.heappush(frontier, (c + self._heuristic(n, goal), n))
+        return False
+
+    def _line_walkable(self, a: int, b: int) -> bool:
+        """Whether the straight line between two cell centers only crosses walkable cells."""
+        g = self.grid
+        ax, az = a % g.nx, a // g.nx
+        bx, bz = b % g.nx, b // g.nx
+        steps = max(abs(bx - ax), abs(bz - az)) * 2
+        for i in range(1, steps):
+            t = i / steps
+            cx = int(round(ax + (bx - ax) * t))
+            cz = int(round(az + (bz - az) * t))
+            if not g.walkable[cz * g.nx + cx]:
+                return False
+        return True
+
+    def next_waypoint(self, position, goal_position, lookahead: int = 4):
+        """
+        Point to steer towards to reach goal_position from position, or None
+        if there is no path (callers then fall back to walking straight).
+        """
+        g = self.grid
+        start = self.nearest_walkable(g.cell_index(position.x, position.z))
+        goal  = self.nearest_walkable(g.cell_index(goal_position.x, goal_position.z))
+        if start is None or goal is None:
+            return None
+        if start == goal:
+            return Vec3(goal_position)
+
+        cells = self.path(start, goal)
+        if len(cells) < 2:
+            return None
+
+        # Skip ahead along the path while the straight line stays walkable
+        target = cells[1]
+        for c in cells[2:2 + lookahead]:
+            if not self._line_walkable(start, c):
+                break
+            target = c
+        if target == goal:
+            return Vec3(goal_position)
+
+        p = g.cell_center(target)
+        return Vec3(p.x, position.y, p.z)
@@ -0,0 +1,162 @@
+import functools
+import json
+import os
+import time
+
+
+class UpdateProfiler:
+    """
+    Opt-in frame profiler for update() methods and invoke() callbacks:
+      1. instrument() wraps methods of the given classes (update() by
+         default); each call is timed and aggregated per concrete class,
+         so AIBot and DummyTarget show up separately.
+      2. wrap() times a plain function (the global update()), and
+         wrap_invoke() makes every invoke()d callback its own span.
+      3. trace_frames() records every span of a frame range and writes a
+         Chrome trace-event file (open it in chrome://tracing or Perfetto).
+
+    Enable with ECHOES_PROFILE=1; ECHOES_PROFILE_TRACE=first:last:path also
+    records a trace. While disabled, instrument() and the wrappers leave
+    the game's functions untouched.
+    """
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.frame   = 0
+        self.totals  = {}     # span name -> [calls, total_ns, max_ns]
+
+        self._trace_range = None   # (first, last, path)
+        self._events = []
+        self._origin_ns = time.perf_counter_ns()
+
+    # ── Hooks ──────────────────────────────────────────────
+
+    def instrument(self, *classes, methods=('update',)) -> None:
+        """Time `methods` of each class (only those the class defines itself)."""
+        if not self.enabled:
+            return
+        for cls in classes:
+            for name in methods:
+                fn = cls.__dict__.get(name)
+                if fn is None or getattr(fn, '_profiled', False):
+                    continue
+                setattr(cls, name, self._method_wrapper(fn, name))
+
+    def _method_wrapper(self, fn, name: str):
+        profiler = self
+
+        @functools.wraps(fn)
+        def timed(obj, *args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(obj, *args, **kwargs)
+            finally:
+                profiler.add(f'{type(obj).__name__}.{name}', start, time.perf_counter_ns())
+        timed._profiled = True
+        return timed
+
+    def wrap(self, fn, name: str = None):
+        """Time a plain function under `name` (default: its qualified name)."""
+        if not self.enabled:
+            return fn
+        name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(name, start, time.perf_counter_ns())
+        return timed
+
+    def wrap_invoke(self, invoke):
+        """An invoke() whose callbacks are each timed as 'invoke:<name>'."""
+        if not self.enabled:
+            return invoke
+
+        @functools.wraps(invoke)
+        def profiled_invoke(function, *args, **kwargs):
+            name = getattr(function, '__qualname__', None) or repr(function)
+            return invoke(self.wrap(function, f'invoke:{name}'), *args, **kwargs)
+        return profiled_invoke
+
+    # ── Recording ──────────────────────────────────────────
+
+    def add(self, name: str, start_ns: int, end_ns: int) -> None:
+        ns = end_ns - start_ns
+        t = self.totals.get(name)
+        if t is None:
+            t = self.totals[name] = [0, 0, 0]
+        t[0] += 1
+        t[1] += ns
+        if ns > t[2]:
+            t[2] = ns
+
+        if self._trace_range and self._trace_range[0] <= self.frame <= self._trace_range[1]:
+            self._events.append({
+                'name': name,
+                'cat': 'update',
+                'ph': 'X',
+                'ts': (start_ns - self._origin_ns) / 1000,
+                'dur': ns / 1000,
+                'pid': 1,
+                'tid': 1,
+            })
+
+    def end_frame(self) -> None:
+        """Called once per frame, before the global update."""
+        if not self.enabled:
+            return
+        if self._trace_range:
+            first, last, path = self._trace_range
+            if first <= self.frame <= last:
+                self._events.append({
+                    'name': f'frame {self.frame}',
+                    'ph': 'i',
+                    's': 'g',
+                    'ts': (time.perf_counter_ns() - self._origin_ns) / 1000,
+                    'pid': 1,
+                    'tid': 1,
+                })
+            if self.frame == last:
+                self.write_trace(path)
+                self._trace_range = None
+        self.frame += 1
+
+    def trace_frames(self, first: int, last: int, path: str = 'profile_trace.json') -> None:
+        """Record every span of frames first..last and write them to `path`."""
+        self._trace_range = (first, last, path)
+        self._events = []
+
+    def write_trace(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self._events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Profiler: wrote {len(self._events)} trace events to {path}")
+
+    # ── Reports ────────────────────────────────────────────
+
+    def report(self) -> dict:
+        """Per-span totals, most expensive first."""
+        frames = max(self.frame, 1)
+        out = {}
+        for name, (calls, total_ns, max_ns) in sorted(self.totals.items(), key=lambda kv: -kv[1][1]):
+            out[name] = {
+                'calls_per_frame': calls / frames,
+                'ms_per_frame': total_ns / frames / 1e6,
+                'mean_us': total_ns / calls / 1000,
+                'max_us': max_ns / 1000,
+            }
+        return out
+
+    def print_report(self) -> None:
+        print(f"Update profile over {self.frame} frames:")
+        for name, s in self.report().items():
+            print(f"  {name:<40} {s['calls_per_frame']:7.1f} calls/frame  {s['ms_per_frame']:7.3f} ms/frame  "
+                  f"mean {s['mean_us']:7.1f} us  max {s['max_us']:8.1f} us")
+
+
+profiler = UpdateProfiler(enabled=os.environ.get('ECHOES_PROFILE') == '1')
+
+if profiler.enabled and os.environ.get('ECHOES_PROFILE_TRACE'):
+    _first, _last, _path = (os.environ['ECHOES_PROFILE_TRACE'].split(':', 2) + ['profile_trace.json'])[:3]
+    profiler.trace_frames(int(_first), int(_last), _path)
@@ -0,0 +1,277 @@
+from ursina import Entity, Vec3, color, scene, time
+from spatial_index import np, ray_aabb_batch
+from ray_stats import ray_stats
+
+
+def segment_capsule_batch(origins, directions, lengths, bottoms, tops, radius):
+    """
+    Vectorized sweep of N segments against K capsules (requires NumPy).
+
+    Segment i runs from origins[i] along the unit directions[i] for lengths[i];
+    capsule k is the segment bottoms[k]..tops[k] grown by radius[i].
+    Returns an (N, K) array with the distance along each segment to its first
+    contact with each capsule (0 if it starts inside), inf where they don't touch.
+    """
+    o  = origins[:, None, :]
+    d  = directions[:, None, :]
+    r2 = (radius ** 2)[:, None]
+    ab = (tops - bottoms)[None, :, :]
+    oa = o - bottoms[None, :, :]
+
+    def dot(u, v):
+        return (u * v).sum(axis=2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 1) Side of the capsule: infinite cylinder, kept only between the end caps
+        baba = dot(ab, ab)
+        bard = dot(ab, d)
+        baoa = dot(ab, oa)
+        a = baba - bard * bard
+        b = baba * dot(d, oa) - baoa * bard
+        c = baba * dot(oa, oa) - baoa * baoa - r2 * baba
+        h = b * b - a * c
+        t_side = (-b - np.sqrt(h)) / a
+        y = baoa + t_side * bard
+        t_side = np.where((h >= 0) & (a > 1e-9) & (y > 0) & (y < baba), t_side, np.inf)
+
+        # 2) End caps: spheres around both ends
+        def sphere(center):
+            oc = o - center[None, :, :]
+            bs = dot(d, oc)
+            hs = bs * bs - (dot(oc, oc) - r2)
+            ts = -bs - np.sqrt(hs)
+            return np.where(hs >= 0, ts, np.inf)
+
+        t = np.minimum(t_side, np.minimum(sphere(bottoms), sphere(tops)))
+
+        # 3) Segments starting inside the capsule hit at once
+        u = np.where(baba > 1e-9, np.clip(baoa / baba, 0, 1), 0)
+        closest = oa - ab * u[..., None]
+        inside = dot(closest, closest) <= r2
+
+    t = np.where(inside, 0, t)
+    return np.where((t >= 0) & (t <= lengths[:, None]), t, np.inf)
+
+
+class Projectile:
+    """One slot of the pool: a reusable bullet node plus its flight state."""
+    __slots__ = (
+        'node', 'position', 'direction', 'speed', 'owner', 'origin',
+        'age', 'life', 'max_range', 'collide', 'targets', 'hit_radius', 'on_hit', 'live'
+    )
+
+    def __init__(self, node):
+        self.node = node
+        self.live = False
+
+
+class ProjectilePool:
+    """
+    Fixed-size pool of bullet nodes with one update loop for every live shot:
+      1. Nodes are created lazily up to `capacity` and recycled (disabled,
+         then re-enabled) instead of being created and destroyed per shot.
+      2. When every node is in flight, the oldest live projectile is
+         recycled for the new shot, so the cap is never exceeded.
+      3. Movement, lifetime, range and hit checks for all live projectiles
+         run in update(), called once per frame by the game. Hits are found
+         by sweep(), one vectorized segment test against the static boxes
+         and the targets' capsules for every projectile at once.
+
+    The nodes are not added to scene.entities, so round teardown (which
+    destroys every scene entity) leaves the pool intact; call clear() instead.
+    """
+    def __init__(self, capacity: int = 64, model: str = 'cube', scale: float = .2, bullet_color=color.gold):
+        self.capacity     = capacity
+        self.model        = model
+        self.scale        = scale
+        self.bullet_color = bullet_color
+        self.world_index  = None   # SpatialIndex the colliding projectiles are tested against
+
+        self._free = []   # idle Projectile slots
+        self.live  = []   # in flight, oldest first
+        self.last_hits = []  # (projectile, entity, point) records from the last update()
+        self.created  = 0
+        self.recycled = 0
+
+    def _acquire(self) -> Projectile:
+        if self._free:
+            return self._free.pop()
+        if self.created < self.capacity:
+            self.created += 1
+            node = Entity(
+                parent=scene,
+                model=self.model,
+                scale=self.scale,
+                color=self.bullet_color,
+                name='pooled_bullet',
+                add_to_scene_entities=False
+            )
+            return Projectile(node)
+        # Pool exhausted: steal the oldest shot in flight
+        self.recycled += 1
+        p = self.live.pop(0)
+        p.live = False
+        return p
+
+    def spawn(
+        self,
+        position,
+        direction,
+        speed: float,
+        owner=None,
+        life: float = 1,
+        max_range: float = None,
+        collide: bool = False,
+        targets=(),
+        hit_radius: float = 1.0,
+        on_hit=None
+    ) -> Projectile:
+        """
+        Launch a projectile. Colliding projectiles stop at static geometry and
+        at the capsule of any entity in `targets` (its `hit_capsule` = (bottom,
+        top) offsets above its position, grown by hit_radius); then
+        on_hit(projectile, entity, point) is called.
+        """
+        p = self._acquire()
+        p.position   = Vec3(position)
+        p.direction  = Vec3(direction).normalized()
+        p.speed      = speed
+        p.owner      = owner
+        p.origin     = Vec3(position)
+        p.age        = 0
+        p.life       = life
+        p.max_range  = max_range
+        p.collide    = collide
+        p.targets    = targets
+        p.hit_radius = hit_radius
+        p.on_hit     = on_hit
+        p.live       = True
+
+        p.node.position = p.position
+        p.node.look_at(p.position + p.direction)
+        p.node.enabled = True
+        self.live.append(p)
+        return p
+
+    def release(self, p: Projectile) -> None:
+        """Return a projectile's node to the pool."""
+        if not p.live:
+            return
+        p.live = False
+        p.node.enabled = False
+        p.owner = p.on_hit = None
+        p.targets = ()
+        self.live.remove(p)
+        self._free.append(p)
+
+    def release_owned(self, owner) -> None:
+        """Release every live projectile fired by `owner`."""
+        for p in list(self.live):
+            if p.owner is owner:
+                self.release(p)
+
+    def clear(self) -> None:
+        """Release every live projectile (used on round teardown)."""
+        for p in list(self.live):
+            self.release(p)
+
+    def sweep(self, projectiles, dt: float) -> list:
+        """
+        Test every projectile's path for this frame (a segment of length
+        speed * dt) against the static boxes and its targets' capsules in
+        one batched pass. Returns (projectile, entity, point) records for
+        the projectiles that hit something.
+        """
+        if not projectiles:
+            return []
+        if np is None or not self.world_index:
+            return [r for r in (self._sweep_one(p, dt) for p in projectiles) if r]
+
+        n = len(projectiles)
+        origins = np.array([tuple(p.position) for p in projectiles], dtype=float)
+        dirs    = np.array([tuple(p.direction) for p in projectiles], dtype=float)
+        steps   = np.array([p.speed * dt for p in projectiles], dtype=float)
+
+        # 1) Static colliders
+        lo, hi = self.world_index.box_arrays()
+        t_box, box = ray_aabb_batch(origins, dirs, steps, lo, hi)
+
+        # 2) Target capsules: one column per distinct target, masked per projectile
+        targets = []
+        for p in projectiles:
+            for t in p.targets:
+                if t and t.enabled and t not in targets:
+                    targets.append(t)
+
+        t_cap = np.full(n, np.inf)
+        cap = np.zeros(n, dtype=int)
+        if targets:
+            bottoms, tops = [], []
+            for t in targets:
+                low, high = getattr(t, 'hit_capsule', (0, 0))
+                pos = t.world_position
+                bottoms.append((pos[0], pos[1] + low, pos[2]))
+                tops.append((pos[0], pos[1] + high, pos[2]))
+            radius = np.array([p.hit_radius for p in projectiles], dtype=float)
+            mask = np.array([[t in p.targets for t in targets] for p in projectiles], dtype=bool)
+
+            t_all = segment_capsule_batch(origins, dirs, steps, np.array(bottoms), np.array(tops), radius)
+            t_all[~mask] = np.inf
+            cap = t_all.argmin(axis=1)
+            t_cap = t_all[np.arange(n), cap]
+
+        # 3) Nearest hit per projectile
+        hits = []
+        for i in np.nonzero(np.isfinite(t_box) | np.isfinite(t_cap))[0]:
+            p = projectiles[i]
+            if t_cap[i] <= t_box[i]:
+                entity, t = targets[cap[i]], t_cap[i]
+            else:
+                entity, t = self.world_index.entities[box[i]], t_box[i]
+            hits.append((p, entity, Vec3(*(origins[i] + dirs[i] * t))))
+        return hits
+
+    def _sweep_one(self, p: Projectile, dt: float):
+        """Per-projectile fallback for sweep() when NumPy is not available."""
+        step = p.speed * dt
+        if self.world_index:
+            hit_info = self.world_index.raycast(
+                p.position,
+                p.direction,
+                distance=step,
+                ignore=[p.owner],
+                dynamic=[t for t in p.targets if t]
+            )
+            if hit_info.hit:
+                return p, hit_info.entity, hit_info.world_point
+
+        end = p.position + p.direction * step
+        for t in p.targets:
+            if t and t.enabled and (end - t.position).length() < p.hit_radius:
+                return p, t, end
+        return None
+
+    def update(self) -> None:
+        dt = time.dt
+
+        # 1) Drop shots whose shooter is gone
+        for p in list(self.live):
+            if p.owner is not None and not getattr(p.owner, 'enabled', False):
+                self.release(p)
+
+        # 2) One batched collision pass over everything that can hit
+        colliding = [p for p in self.live if p.collide]
+        with ray_stats.measure('projectiles.sweep', rays=len(colliding)):
+            self.last_hits = self.sweep(colliding, dt)
+        for p, entity, point in self.last_hits:
+            if p.on_hit:
+                p.on_hit(p, entity, point)
+            self.release(p)
+
+        # 3) Advance the survivors
+        for p in list(self.live):
+            p.age += dt
+            p.position += p.direction * (p.speed * dt)
+            p.node.position = p.position
+            if p.age >= p.life or (p.max_range and (p.position - p.origin).length() > p.max_range):
+                self.release(p)
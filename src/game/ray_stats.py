@@ -0,0 +1,165 @@
+import json
+import os
+import time
+from collections import deque
+
+
+class _Off:
+    """Shared no-op context manager returned while stats are disabled."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_OFF = _Off()
+
+# Latency buckets in microseconds: [0, 1), [1, 2), [2, 4) ... [32768, inf)
+BUCKET_LIMITS_US = [1 << i for i in range(16)]
+
+
+def _bucket(ns: int) -> int:
+    us = ns // 1000
+    return min(us.bit_length(), len(BUCKET_LIMITS_US))
+
+
+class _Site:
+    """Calls and latencies recorded for one call site during one frame."""
+    __slots__ = ('calls', 'rays', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.calls    = 0
+        self.rays     = 0
+        self.total_ns = 0
+        self.max_ns   = 0
+        self.buckets  = [0] * (len(BUCKET_LIMITS_US) + 1)
+
+
+class _Measure:
+    __slots__ = ('stats', 'site', 'rays', 'start')
+
+    def __init__(self, stats, site: str, rays: int):
+        self.stats = stats
+        self.site  = site
+        self.rays  = rays
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.site, time.perf_counter_ns() - self.start, self.rays)
+        return False
+
+
+class RaycastStats:
+    """
+    Opt-in raycast counters and latency histograms per named call site:
+      1. Call sites wrap their ray query in `with ray_stats.measure('site'):`;
+         while disabled that returns a shared no-op, so the cost is one call.
+      2. Every frame's calls, rays and a log2 latency histogram are kept per
+         site; end_frame() closes the frame (the game calls it from update()).
+      3. Only the last `window` frames are kept, so dump() describes the
+         recent collision budget, not the whole session.
+
+    Enable with ECHOES_RAY_STATS=1 or `ray_stats.enabled = True`.
+    """
+    def __init__(self, window: int = 300, enabled: bool = False):
+        self.enabled = enabled
+        self.frames  = deque(maxlen=window)   # closed frames: {site: _Site}
+        self.current = {}
+        self.frame_count = 0
+
+    def measure(self, site: str, rays: int = 1):
+        """Context manager timing one query at `site` (`rays` > 1 for batched passes)."""
+        if not self.enabled:
+            return _OFF
+        return _Measure(self, site, rays)
+
+    def record(self, site: str, ns: int, rays: int = 1) -> None:
+        s = self.current.get(site)
+        if s is None:
+            s = self.current[site] = _Site()
+        s.calls    += 1
+        s.rays     += rays
+        s.total_ns += ns
+        if ns > s.max_ns:
+            s.max_ns = ns
+        s.buckets[_bucket(ns)] += 1
+
+    def end_frame(self) -> None:
+        if not self.enabled:
+            return
+        self.frames.append(self.current)
+        self.current = {}
+        self.frame_count += 1
+
+    def reset(self) -> None:
+        self.frames.clear()
+        self.current = {}
+
+    def dump(self) -> dict:
+        """Per-site summary over the rolling window, busiest site first."""
+        frames = len(self.frames) or 1
+        sites = {}
+        for frame in self.frames:
+            for name, s in frame.items():
+                agg = sites.get(name)
+                if agg is None:
+                    agg = sites[name] = {'calls': 0, 'rays': 0, 'total_ns': 0, 'max_ns': 0,
+                                         'peak_calls': 0, 'buckets': [0] * len(s.buckets)}
+                agg['calls']    += s.calls
+                agg['rays']     += s.rays
+                agg['total_ns'] += s.total_ns
+                agg['max_ns']    = max(agg['max_ns'], s.max_ns)
+                agg['peak_calls'] = max(agg['peak_calls'], s.calls)
+                agg['buckets']   = [a + b for a, b in zip(agg['buckets'], s.buckets)]
+
+        report = {}
+        for name, agg in sorted(sites.items(), key=lambda kv: -kv[1]['total_ns']):
+            calls = agg['calls']
+            report[name] = {
+                'calls_per_frame': calls / frames,
+                'peak_calls_per_frame': agg['peak_calls'],
+                'rays_per_frame': agg['rays'] / frames,
+                'ms_per_frame': agg['total_ns'] / frames / 1e6,
+                'mean_us': agg['total_ns'] / calls / 1000 if calls else 0,
+                'p50_us': self._percentile_us(agg['buckets'], .5),
+                'p99_us': self._percentile_us(agg['buckets'], .99),
+                'max_us': agg['max_ns'] / 1000,
+                'histogram_us': {self._bucket_label(i): n for i, n in enumerate(agg['buckets']) if n},
+            }
+        return {'frames': len(self.frames), 'sites': report}
+
+    @staticmethod
+    def _percentile_us(buckets: list, q: float) -> float:
+        """Upper edge of the bucket holding the q-quantile."""
+        total = sum(buckets)
+        if not total:
+            return 0
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= q * total:
+                return BUCKET_LIMITS_US[i] if i < len(BUCKET_LIMITS_US) else float('inf')
+        return float('inf')
+
+    @staticmethod
+    def _bucket_label(i: int) -> str:
+        lo = 0 if i == 0 else BUCKET_LIMITS_US[i - 1]
+        return f'{lo}-{BUCKET_LIMITS_US[i]}' if i < len(BUCKET_LIMITS_US) else f'{lo}+'
+
+    def dump_json(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.dump(), f, indent=2)
+
+    def print_report(self) -> None:
+        report = self.dump()
+        print(f"Raycast stats over the last {report['frames']} frames:")
+        for name, s in report['sites'].items():
+            print(f"  {name:<24} {s['calls_per_frame']:7.1f} calls/frame  {s['ms_per_frame']:7.3f} ms/frame  "
+                  f"mean {s['mean_us']:7.1f} us  p99 <{s['p99_us']} us")
+
+
+ray_stats = RaycastStats(enabled=os.environ.get('ECHOES_RAY_STATS') == '1')
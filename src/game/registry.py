@@ -0,0 +1,51 @@
+from ursina import destroy
+
+
+class EntityRegistry:
+    """
+    Live entities grouped by kind ('bots', 'world', 'hud', 'menus', ...):
+      1. add() files an entity under a kind when it is created.
+      2. Destroying the entity drops it from its kind again (ursina calls
+         its on_destroy), so a kind never holds dead entities.
+      3. destroy_kind() tears down just the kinds asked for, instead of
+         scanning scene.entities and camera.ui.children.
+    """
+    def __init__(self):
+        self._kinds = {}   # kind -> {entity: None}, in creation order
+
+    def add(self, entity, kind: str):
+        """Register `entity` under `kind` and return it."""
+        members = self._kinds.setdefault(kind, {})
+        if entity in members:
+            return entity
+        members[entity] = None
+
+        previous = getattr(entity, 'on_destroy', None)
+
+        def on_destroy():
+            members.pop(entity, None)
+            if previous:
+                previous()
+
+        entity.on_destroy = on_destroy
+        return entity
+
+    def discard(self, entity, kind: str) -> None:
+        self._kinds.get(kind, {}).pop(entity, None)
+
+    def of(self, kind: str) -> list:
+        return list(self._kinds.get(kind, ()))
+
+    def count(self, kind: str) -> int:
+        return len(self._kinds.get(kind, ()))
+
+    def destroy_kind(self, *kinds, keep=()) -> None:
+        """Destroy every entity of the given kinds, except those in `keep`."""
+        for kind in kinds:
+            for e in self.of(kind):
+                if e in keep:
+                    continue
+                print(f"Destroying {kind} entity: {e}")
+                destroy(e)
+                # Already-destroyed nodes don't call on_destroy again
+                self.discard(e, kind)
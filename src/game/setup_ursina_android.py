@@ -1,72 +1,226 @@
+import hashlib
+import json
 import os
 import sys
+import threading
 from direct.stdpy.file import open, exists
+from headless import HEADLESS
 
 app_id = 'com.mygame.Echoes'
 assets = ['arrow.ursinamesh', 'arrow_down.png', 'arrow_right.png', 'bag.png', 'Bitstream Vera License.txt', 'bow_arrow.png', 'brick.png', 'circle.blend', 'circle.png', 'circle.ursinamesh', 'circle_outlined.png', 'cog.png', 'cube.blend', 'cube.ursinamesh', 'cube_uv_top.blend', 'cube_uv_top.ursinamesh', 'cursor.png', 'diamond.ursinamesh', 'file_icon.png', 'folder.png', 'gem.png', 'grass.png', 'grass_tintable.png', 'heightmap_1.png', 'horizontal_gradient.png', 'icosphere.blend', 'icosphere.ursinamesh', 'items.psd', 'LICENSE.txt', 'line.ursinamesh', 'noise.png', 'noise.wav', 'OpenSans-Regular.ttf', 'orb.png', 'perlin_noise.png', 'plane.blend', 'plane.ursinamesh', 'quad.blend', 'quad.ursinamesh', 'radial_gradient.png', 'rainbow.png', 'reflection_map_3.jpg', 'scale_gizmo.ursinamesh', 'shore.jpg', 'sine.wav', 'sky_default.jpg', 'sky_dome.blend', 'sky_dome.ursinamesh', 'sky_sunset.jpg', 'sphere.blend', 'sphere.ursinamesh', 'square.wav', 'sword.png', 'test_tileset.png', 'tilemap_test_level.png', 'triangle.wav', 'untitled_scene[0,0].csv', 'untitled_scene[1,0].csv', 'untitled_scene[1,1].csv', 'untitled_scene[1,2].csv', 'untitled_scene[2,0].csv', 'untitled_scene[2,3].csv', 'ursina.ico', 'ursina.png','ursina_logo.png', 'ursina_wink_0000.png', 'ursina_wink_0001.png', 'VeraMono.ttf', 'vertical_gradient.png', 'vignette.png', 'white_cube.png', 'wireframe_cube.ursinamesh', 'wireframe_quad.ursinamesh', '_bat_to_exe.bat'] 
-game_assets = ['building_01.gltf', 'gunshot.wav', 'label.jpg', 'pistol.gltf', 'wall_01.gltf', 'wall_03.gltf']
+game_assets = ['arena.lvl', 'building_01.gltf', 'gunshot.wav', 'label.jpg', 'map.lvl', 'pistol.gltf', 'wall_01.gltf', 'wall_03.gltf']
 game_assets_src_dir = 'game/assets'
 
+# Built into the APK by `python game/setup_ursina_android.py manifest` (see LazyAssets)
+manifest_name = 'asset_manifest.json'
+apk_root      = '/android_asset'
+chunk_size    = 256 * 1024
+
+# What ursina's loaders try for a name without an extension, in their order
+model_types   = ('.bam', '.ursinamesh', '.obj', '.glb', '.gltf')
+texture_types = ('.tif', '.jpg', '.jpeg', '.png', '.gif')
+audio_types   = ('.ogg', '.wav')
+
 def setup_ursina_android():
+    if HEADLESS:
+        # headless.py runs on desktop/CI machines, there is nothing to copy
+        return
     print("Setting up Ursina for Android...")
     if sys.platform == 'android' or sys.platform == 'linux':
         print("platform :", sys.platform)
         # Step 0: Change the path
         os.chdir(f"/data/data/{app_id}/files/")
 
-        copy_ursina_assets()
+        lazy_assets.start(os.getcwd())
+        lazy_assets.install()
+
+def asset_entries(read=None):
+    """
+    (path in the APK, path under files/) for every file that can be
+    extracted: the ursina assets, the game assets and the prewarmed model
+    cache (model_cache.py). `read` opens the cache index; the build reads
+    it from the source tree.
+    """
+    entries = [(f"ursina_assets/{asset}", os.path.basename(asset)) for asset in assets]
+    entries += [(f"{game_assets_src_dir}/{asset}", f"assets/{asset}") for asset in game_assets]
+
+    index_path = f"{game_assets_src_dir}/bam/index.json"
+    index = (read or _read_apk)(index_path)
+    if index:
+        entries.append((index_path, "assets/bam/index.json"))
+        for bam in json.loads(index.decode('utf-8'))['models'].values():
+            entries.append((f"{game_assets_src_dir}/bam/{bam}", f"assets/bam/{bam}"))
+    return entries
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _read_apk(path):
+    path = f"{apk_root}/{path}"
+    return _read(path) if exists(path) else None
 
-        copy_game_assets()
+class LazyAssets:
+    """
+    Extracts files from the APK the first time something asks for them:
+      1. start() reads the APK's manifest and the record of what was
+         extracted before; files that are new or whose hash changed are
+         pending. Nothing is copied and no file is stat()ed.
+      2. install() hooks ursina's model, texture, audio and font loading,
+         so a requested name is pulled out of the APK right before ursina
+         looks for it on disk. Code reading files directly (level.py,
+         model_cache.py) calls ensure_asset() itself.
+      3. Each extraction is streamed in chunks through a .part file and
+         then recorded in files/asset_manifest.json.
+    Without a manifest in the APK (a build that skipped the manifest step)
+    every listed file is treated as pending and copied when first missing.
+    """
+    def __init__(self):
+        self.files_dir = None
+        self.pending   = {}    # dest -> manifest entry, not extracted (or out of date)
+        self.extracted = {}    # dest -> manifest entry, saved to the local record
+        self.by_name   = {}    # file name -> dests, to match requests like 'cube' or 'assets/x.gltf'
+        self.version   = None
+        self._lock = threading.Lock()
 
-def copy_ursina_assets():
-    # Step 1: Check if there is ursina assets
-    missing_assets = []
-    for asset in assets:
-        src_path = f"/android_asset/ursina_assets/{asset}"
-        dest_path = os.path.join(os.getcwd(), os.path.basename(asset))
-        
-        if not exists(dest_path):
-            print(f"copy_ursina_assets: will copy missing file {asset}")
-            missing_assets.append(asset)
+    def start(self, files_dir):
+        # stdpy's open() resolves relative paths against Panda's VFS, not os.chdir()
+        self.files_dir = files_dir
+        record_path = os.path.join(files_dir, manifest_name)
+
+        manifest = _read_apk(f"game/{manifest_name}")
+        if manifest is not None:
+            manifest = json.loads(manifest.decode('utf-8'))
         else:
-            print(f"copy_ursina_assets: already exists {asset}")
-    
-    if missing_assets:
-        # Step 2: Copy the missing assets
-        for asset in missing_assets:
-            src_path = f"/android_asset/ursina_assets/{asset}"
-            dest_path = os.path.join(os.getcwd(), os.path.basename(asset))
-            
-            print(f"copy_ursina_assets: copying {src_path} -> {dest_path}")
-
-            with open(src_path, 'rb') as src_file, open(dest_path, 'wb') as dest_file:
-                dest_file.write(src_file.read())
-
-def copy_game_assets():
-    if game_assets_src_dir:
-        # Step 3: Check if there is your game assets
-        my_missing_assets = []
-        for asset in game_assets:
-            src_path = f"/android_asset/{game_assets_src_dir}/{asset}"
-            dest_assets_dir = os.path.join(os.getcwd(), 'assets')
-            os.makedirs(dest_assets_dir, exist_ok=True)
-            dest_path = os.path.join(dest_assets_dir, asset)
-            
-            if not exists(dest_path):
-                print(f"copy_game_assets: will copy missing file {asset}")
-                my_missing_assets.append(asset)
+            print("lazy_assets: no asset manifest in the APK, extracting missing files on demand")
+            manifest = {'version': None, 'files': {dest: {'src': src} for src, dest in asset_entries()}}
+        self.version = manifest['version']
+
+        record = json.loads(_read(record_path).decode('utf-8')) if exists(record_path) else {'files': {}}
+        for dest, entry in manifest['files'].items():
+            self.by_name.setdefault(dest.rsplit('/', 1)[-1], []).append(dest)
+            previous = record['files'].get(dest)
+            if previous is not None and 'sha1' in entry and previous.get('sha1') == entry['sha1']:
+                self.extracted[dest] = entry
             else:
-                print(f"copy_game_assets: already exists {asset}")
-        
-        if my_missing_assets:
-            # Step 4: Copy the your game assets
-            for asset in game_assets:
-                src_path = f"/android_asset/{game_assets_src_dir}/{asset}"
-                dest_assets_dir = os.path.join(os.getcwd(), 'assets')
-                os.makedirs(dest_assets_dir, exist_ok=True)
-                dest_path = os.path.join(dest_assets_dir, asset)
-                
-                print(f"copy_game_assets: copying {src_path} -> {dest_path}")
-
-                with open(src_path, 'rb') as src_file, open(dest_path, 'wb') as dest_file:
-                    dest_file.write(src_file.read())
\ No newline at end of file
+                self.pending[dest] = entry
+        print(f"lazy_assets: {len(self.extracted)} files extracted, {len(self.pending)} on demand")
+
+    def ensure(self, name, suffixes=('',)):
+        """
+        Extract the files ursina would find for `name` (matched the way its
+        '**/<name><suffix>' globs do), trying `suffixes` in order and stopping
+        at the first one the APK has.
+        """
+        if not self.pending or not isinstance(name, str):
+            return
+        name = name.replace('\\', '/')
+        for suffix in suffixes:
+            wanted = name + suffix
+            dests = [
+                dest for dest in self.by_name.get(wanted.rsplit('/', 1)[-1], ())
+                if dest == wanted or dest.endswith('/' + wanted)
+            ]
+            if dests:
+                for dest in dests:
+                    self.extract(dest)
+                return
+
+    def extract(self, dest):
+        with self._lock:
+            entry = self.pending.get(dest)
+            if entry is None:
+                return
+            dest_path = os.path.join(self.files_dir, dest)
+            # manifest-less builds: keep what an earlier launch copied
+            if 'sha1' in entry or not os.path.exists(dest_path):
+                print(f"lazy_assets: extracting {dest}")
+                copy_file(f"{apk_root}/{entry['src']}", dest_path)
+            del self.pending[dest]
+            self.extracted[dest] = entry
+            if self.version is not None:
+                self._save_record()
+
+    def _save_record(self):
+        record_path = os.path.join(self.files_dir, manifest_name)
+        with open(record_path + '.part', 'wb') as f:
+            f.write(json.dumps({'version': self.version, 'files': self.extracted}).encode('utf-8'))
+        os.replace(record_path + '.part', record_path)
+
+    def install(self):
+        """Hook ursina's loaders (call before the game imports ursina's names)."""
+        import ursina
+        from ursina import mesh_importer, texture_importer
+        from ursina.audio import Audio
+        from ursina.text import Text
+
+        def hook(fn, suffixes):
+            def lazy_load(name, *args, **kwargs):
+                if isinstance(name, str):
+                    self.ensure(name, ('',) if '.' in name else suffixes)
+                return fn(name, *args, **kwargs)
+            return lazy_load
+
+        # every module that imported the loaders by name gets the hooked ones
+        for original, suffixes in ((mesh_importer.load_model, model_types), (texture_importer.load_texture, texture_types)):
+            lazy_load = hook(original, suffixes)
+            for module in list(sys.modules.values()):
+                if getattr(module, '__name__', '').startswith('ursina') and getattr(module, original.__name__, None) is original:
+                    setattr(module, original.__name__, lazy_load)
+
+        def property_hook(prop, suffixes):
+            def fset(obj, value):
+                if isinstance(value, str):
+                    self.ensure(value, ('',) if '.' in value else suffixes)
+                prop.fset(obj, value)
+            return property(prop.fget, fset, prop.fdel)
+
+        Audio.clip = property_hook(Audio.clip, audio_types)
+        Text.font  = property_hook(Text.font, ('',))
+
+lazy_assets = LazyAssets()
+
+def ensure_asset(name, suffixes=('',)):
+    """Extract `name` (a path under files/, e.g. 'assets/arena.lvl') from the APK if it isn't yet."""
+    lazy_assets.ensure(name, suffixes)
+
+def copy_file(src_path, dest_path):
+    """Stream one file in chunks, through a temporary file so a partial copy is never used."""
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + '.part'
+    with open(src_path, 'rb') as src_file, open(tmp_path, 'wb') as dest_file:
+        while True:
+            chunk = src_file.read(chunk_size)
+            if not chunk:
+                break
+            dest_file.write(chunk)
+    os.replace(tmp_path, dest_path)
+
+def build_manifest(src_root):
+    """Write game/asset_manifest.json from the source tree (run before bdist_apps)."""
+    def read(path):
+        local = os.path.join(src_root, path)
+        return _read(local) if os.path.exists(local) else None
+
+    files = {}
+    for src, dest in asset_entries(read):
+        h = hashlib.sha1()
+        with open(os.path.join(src_root, src), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                h.update(chunk)
+        files[dest] = {'src': src, 'size': os.path.getsize(os.path.join(src_root, src)), 'sha1': h.hexdigest()}
+
+    version = hashlib.sha1(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()
+    path = os.path.join(src_root, 'game', manifest_name)
+    with open(path, 'wb') as f:
+        f.write(json.dumps({'version': version, 'files': files}, indent=1, sort_keys=True).encode('utf-8'))
+    print(f"build_manifest: {len(files)} files, version {version[:12]} -> {path}")
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['manifest']:
+        build_manifest(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    else:
+        print("usage: python game/setup_ursina_android.py manifest")
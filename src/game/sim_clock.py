@@ -0,0 +1,115 @@
+"""
+Fixed-timestep simulation clock with interpolated display.
+
+  1. advance() adds the frame's time to an accumulator and runs the
+     simulation in whole ticks of 1 / rate seconds. While a tick runs,
+     time.dt is the tick length, so movement, gravity and bot AI see the
+     same step whatever the frame rate. A long frame runs at most
+     `max_steps` ticks and drops the rest instead of spiralling.
+  2. Entities registered with interpolate() are simulated at their true
+     position, then shown between their last two tick positions by the
+     time left in the accumulator, so motion stays smooth when the
+     simulation runs slower than the display.
+  3. Anything that moves a registered entity outside a tick (a respawn, a
+     teleport) is picked up as a snap rather than interpolated across.
+
+ECHOES_SIM_HZ sets the rate (default 60); weak devices can lower it.
+"""
+import os
+
+from ursina import time
+
+
+class SimClock:
+    """
+    The simulation's tick rate and the display state of interpolated entities:
+      1. ticks counts the ticks run by the last advance(); alpha is how far
+         the display sits between the last two ticks (0 to 1).
+      2. _tracked maps an entity to [previous, current, shown] positions,
+         or None until it has been seen by a tick.
+    """
+    def __init__(self, rate: float = 60, max_steps: int = 5):
+        self.max_steps   = max_steps
+        self.accumulator = 0.0
+        self.alpha       = 0.0
+        self.ticks       = 0
+        self._tracked    = {}   # entity -> [previous, current, shown] or None
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float) -> None:
+        self.rate = max(float(rate), 1.0)
+        self.step = 1 / self.rate
+
+    # ── Interpolated entities ──────────────────────────────
+
+    def interpolate(self, entity):
+        self._tracked[entity] = None
+        return entity
+
+    def forget(self, entity) -> None:
+        self._tracked.pop(entity, None)
+
+    def clear(self) -> None:
+        self._tracked.clear()
+        self.accumulator = 0.0
+        self.alpha       = 0.0
+
+    def _restore(self) -> None:
+        """Put every tracked entity back at its simulated position."""
+        for entity, state in list(self._tracked.items()):
+            if entity.is_empty():    # destroyed
+                del self._tracked[entity]
+                continue
+            position = entity.position
+            if state is None or position != state[2]:
+                # new, or moved outside a tick: start again from here
+                self._tracked[entity] = [position, position, position]
+            else:
+                entity.position = state[1]
+
+    def _show(self, alpha: float) -> None:
+        for entity, state in list(self._tracked.items()):
+            if entity.is_empty():
+                del self._tracked[entity]
+                continue
+            position = entity.position
+            if state is None:        # registered during a tick
+                state = self._tracked[entity] = [position, position, position]
+            state[1] = position
+            previous = state[0]
+            entity.position = previous + (position - previous) * alpha
+            state[2] = entity.position
+
+    # ── Ticking ────────────────────────────────────────────
+
+    def advance(self, simulate) -> int:
+        """Run `simulate()` once per whole tick of frame time, then place tracked entities for display."""
+        frame_dt = time.dt
+        self.accumulator += frame_dt
+        # 1e-9: a frame of exactly one step must not miss its tick to rounding
+        ticks = min(int((self.accumulator + 1e-9) / self.step), self.max_steps)
+
+        self._restore()
+        try:
+            for _ in range(ticks):
+                for state in self._tracked.values():
+                    if state is not None:
+                        state[0] = state[1]
+                time.dt = self.step
+                simulate()
+                for entity, state in self._tracked.items():
+                    if state is not None and not entity.is_empty():
+                        state[1] = entity.position
+                self.accumulator -= self.step
+        finally:
+            time.dt = frame_dt
+
+        # a capped frame forgets the time it could not simulate
+        self.accumulator = min(max(self.accumulator, 0.0), self.step)
+        self.ticks = ticks
+        self.alpha = self.accumulator / self.step
+        self._show(self.alpha)
+        return ticks
+
+
+sim_clock = SimClock(rate=float(os.environ.get('ECHOES_SIM_HZ', 60)))
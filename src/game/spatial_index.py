@@ -0,0 +1,374 @@
+import math
+from ursina import Vec3, scene
+from ursina.hit_info import HitInfo
+from startup import lazy_import
+
+# optional: only needed for the batched queries, so it loads on first use
+np = lazy_import('numpy')
+
+
+def world_aabb(entity):
+    """
+    Return the world-space bounds of an entity's box collider as
+    ((min_x, min_y, min_z), (max_x, max_y, max_z)), or None if the entity
+    has no box collider.
+
+    The eight corners of the local collider box are transformed to world
+    space, so the result is exact for the 0/90 degree rotations used by
+    the arena pieces and a conservative fit for anything else.
+    """
+    collider = getattr(entity, 'collider', None)
+    if collider is None or not hasattr(collider, 'size'):
+        return None
+
+    cx, cy, cz = collider.center
+    hx, hy, hz = (s / 2 for s in collider.size)
+
+    xs, ys, zs = [], [], []
+    for dx in (-hx, hx):
+        for dy in (-hy, hy):
+            for dz in (-hz, hz):
+                p = scene.getRelativePoint(entity, Vec3(cx + dx, cy + dy, cz + dz))
+                xs.append(p[0])
+                ys.append(p[1])
+                zs.append(p[2])
+
+    return (min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs))
+
+
+def ray_aabb(origin, direction, lo, hi, max_t):
+    """
+    Slab test of a ray against an axis-aligned box.
+
+    Returns (t, axis, sign) for the entry point, where axis/sign give the
+    face normal, or None on a miss. A ray that starts inside the box hits
+    at t=0, matching Panda3D's CollisionBox behaviour.
+    """
+    t_near = -math.inf
+    t_far = max_t
+    axis = 0
+    sign = 0
+
+    for i in range(3):
+        o = origin[i]
+        d = direction[i]
+        if abs(d) < 1e-9:
+            if o < lo[i] or o > hi[i]:
+                return None
+            continue
+
+        inv = 1.0 / d
+        t1 = (lo[i] - o) * inv
+        t2 = (hi[i] - o) * inv
+        face = -1
+        if t1 > t2:
+            t1, t2 = t2, t1
+            face = 1
+        if t1 > t_near:
+            t_near = t1
+            axis = i
+            sign = face
+        if t2 < t_far:
+            t_far = t2
+        if t_near > t_far:
+            return None
+
+    if t_far < 0:
+        return None
+    if t_near < 0:
+        return 0.0, None, 0
+    return t_near, axis, sign
+
+
+def ray_aabb_batch(origins, directions, max_t, lo, hi):
+    """
+    Vectorized slab test of N rays against M boxes (requires NumPy).
+
+    origins, directions: (N, 3) arrays, directions normalized
+    max_t:               (N,) array of ray lengths
+    lo, hi:              (M, 3) arrays of box corners
+
+    Returns (t, box) arrays of shape (N,): the distance to the nearest box
+    hit (inf on a miss) and that box's index.
+    """
+    n = len(origins)
+    if n == 0 or len(lo) == 0:
+        return np.full(n, np.inf), np.zeros(n, dtype=int)
+
+    o = origins[:, None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1.0 / directions[:, None, :]
+        t1 = (lo[None] - o) * inv
+        t2 = (hi[None] - o) * inv
+
+    # Rays parallel to a slab either always or never overlap it
+    parallel = (directions == 0)[:, None, :]
+    inside = (o >= lo[None]) & (o <= hi[None])
+    t_min = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+    t_max = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+
+    t_near = t_min.max(axis=2)
+    t_far = t_max.min(axis=2)
+    hit = (t_near <= t_far) & (t_far >= 0) & (t_near <= max_t[:, None])
+    t = np.where(hit, np.maximum(t_near, 0), np.inf)
+
+    box = t.argmin(axis=1)
+    return t[np.arange(n), box], box
+
+
+class SpatialIndex:
+    """
+    A uniform XZ grid over the static box colliders of a level:
+      1. Built once from the non-moving arena pieces (ground, walls, houses).
+      2. Answers raycasts by walking only the cells the ray passes through.
+      3. Moving bodies (bots, the player) are bounded once per tick by
+         update_bodies() and bucketed into the same cells, so rays with
+         bodies=True meet them during the same walk instead of testing
+         every body on every ray.
+      4. Returns ursina HitInfo objects, so it is a drop-in replacement for
+         raycast(..., traverse_target=scene) at call sites that only need
+         world geometry (plus an optional short list of dynamic entities).
+    """
+    def __init__(self, entities=(), cell_size: float = 4.0, boxes=None):
+        """`boxes`, if given, are the entities' precomputed world_aabb()s (see level.py)."""
+        self.cell_size = cell_size
+        self.entities = []
+        self.boxes = []
+        self._box_arrays = None
+        self.bodies      = {}   # moving entity -> world bounds, as of the last update_bodies()
+        self.body_cells  = {}   # cell index -> [moving entity, ...]
+
+        entities = list(entities)
+        if boxes is None:
+            boxes = [world_aabb(e) for e in entities]
+        for e, box in zip(entities, boxes):
+            if box is None:
+                continue
+            self.entities.append(e)
+            self.boxes.append(box)
+
+        if self.boxes:
+            self.min_x = min(lo[0] for lo, hi in self.boxes)
+            self.min_z = min(lo[2] for lo, hi in self.boxes)
+            max_x = max(hi[0] for lo, hi in self.boxes)
+            max_z = max(hi[2] for lo, hi in self.boxes)
+        else:
+            self.min_x = self.min_z = 0.0
+            max_x = max_z = cell_size
+
+        self.nx = max(1, int(math.ceil((max_x - self.min_x) / cell_size)))
+        self.nz = max(1, int(math.ceil((max_z - self.min_z) / cell_size)))
+        self.max_x = self.min_x + self.nx * cell_size
+        self.max_z = self.min_z + self.nz * cell_size
+
+        # Each cell lists the indices of the boxes overlapping it
+        self.cells = [[] for _ in range(self.nx * self.nz)]
+        for i, (lo, hi) in enumerate(self.boxes):
+            ix0, iz0 = self.cell_of(lo[0], lo[2])
+            ix1, iz1 = self.cell_of(hi[0], hi[2])
+            for iz in range(iz0, iz1 + 1):
+                for ix in range(ix0, ix1 + 1):
+                    self.cells[iz * self.nx + ix].append(i)
+
+    def update_bodies(self, entities) -> None:
+        """
+        Bound every enabled entity in `entities` once and bucket it by cell.
+        Called once per simulation tick, after the player has moved.
+        """
+        bodies = {}
+        cells = {}
+        for e in entities:
+            if e is None or e.is_empty() or not getattr(e, 'enabled', False):
+                continue
+            box = world_aabb(e)
+            if box is None:
+                continue
+            bodies[e] = box
+            lo, hi = box
+            ix0, iz0 = self.cell_of(lo[0], lo[2])
+            ix1, iz1 = self.cell_of(hi[0], hi[2])
+            for iz in range(iz0, iz1 + 1):
+                for ix in range(ix0, ix1 + 1):
+                    cells.setdefault(iz * self.nx + ix, []).append(e)
+        self.bodies = bodies
+        self.body_cells = cells
+
+    def bodies_near(self, x: float, z: float, radius: float, ignore=None) -> bool:
+        """Whether any moving body's origin lies within `radius` of (x, z) on the XZ plane."""
+        ix0, iz0 = self.cell_of(x - radius, z - radius)
+        ix1, iz1 = self.cell_of(x + radius, z + radius)
+        for iz in range(iz0, iz1 + 1):
+            for ix in range(ix0, ix1 + 1):
+                for e in self.body_cells.get(iz * self.nx + ix, ()):
+                    if (ignore and e in ignore) or e.is_empty():
+                        continue
+                    p = e.world_position
+                    if (p[0] - x) ** 2 + (p[2] - z) ** 2 < radius ** 2:
+                        return True
+        return False
+
+    def box_arrays(self) -> tuple:
+        """(lo, hi) corner arrays of every static box, for ray_aabb_batch()."""
+        if self._box_arrays is None:
+            self._box_arrays = (
+                np.array([lo for lo, hi in self.boxes], dtype=float).reshape(-1, 3),
+                np.array([hi for lo, hi in self.boxes], dtype=float).reshape(-1, 3),
+            )
+        return self._box_arrays
+
+    def cell_of(self, x: float, z: float) -> tuple:
+        """Grid cell (ix, iz) containing a world XZ point, clamped to the grid."""
+        ix = int((x - self.min_x) // self.cell_size)
+        iz = int((z - self.min_z) // self.cell_size)
+        return min(max(ix, 0), self.nx - 1), min(max(iz, 0), self.nz - 1)
+
+    def boxes_in_rect(self, x0: float, z0: float, x1: float, z1: float) -> list:
+        """Indices of the static boxes whose XZ footprint overlaps the rectangle."""
+        ix0, iz0 = self.cell_of(x0, z0)
+        ix1, iz1 = self.cell_of(x1, z1)
+        found = set()
+        for iz in range(iz0, iz1 + 1):
+            for ix in range(ix0, ix1 + 1):
+                for i in self.cells[iz * self.nx + ix]:
+                    lo, hi = self.boxes[i]
+                    if lo[0] < x1 and hi[0] > x0 and lo[2] < z1 and hi[2] > z0:
+                        found.add(i)
+        return sorted(found)
+
+    def _walk_cells(self, ox, oz, dx, dz, max_t):
+        """
+        Yield (cell_index, t_exit) for every cell a ray crosses, in order,
+        using a 2D DDA over the XZ plane.
+        """
+        # 1) Clip the ray against the grid rectangle
+        t0, t1 = 0.0, max_t
+        for o, d, lo, hi in ((ox, dx, self.min_x, self.max_x), (oz, dz, self.min_z, self.max_z)):
+            if abs(d) < 1e-9:
+                if o < lo or o > hi:
+                    return
+                continue
+            a = (lo - o) / d
+            b = (hi - o) / d
+            if a > b:
+                a, b = b, a
+            t0 = max(t0, a)
+            t1 = min(t1, b)
+            if t0 > t1:
+                return
+
+        # 2) Starting cell
+        ix, iz = self.cell_of(ox + dx * t0, oz + dz * t0)
+        cs = self.cell_size
+
+        # 3) Distance along the ray to the next x / z cell boundary
+        if dx > 1e-9:
+            step_x, next_x, delta_x = 1, (self.min_x + (ix + 1) * cs - ox) / dx, cs / dx
+        elif dx < -1e-9:
+            step_x, next_x, delta_x = -1, (self.min_x + ix * cs - ox) / dx, -cs / dx
+        else:
+            step_x, next_x, delta_x = 0, math.inf, math.inf
+
+        if dz > 1e-9:
+            step_z, next_z, delta_z = 1, (self.min_z + (iz + 1) * cs - oz) / dz, cs / dz
+        elif dz < -1e-9:
+            step_z, next_z, delta_z = -1, (self.min_z + iz * cs - oz) / dz, -cs / dz
+        else:
+            step_z, next_z, delta_z = 0, math.inf, math.inf
+
+        while True:
+            t_exit = min(next_x, next_z, t1)
+            yield iz * self.nx + ix, t_exit
+            if t_exit >= t1:
+                return
+            if next_x < next_z:
+                ix += step_x
+                next_x += delta_x
+            else:
+                iz += step_z
+                next_z += delta_z
+            if not (0 <= ix < self.nx and 0 <= iz < self.nz):
+                return
+
+    def raycast(self, origin, direction=(0, 0, 1), distance=9999, ignore=None, dynamic=(), bodies=False) -> HitInfo:
+        """
+        Cast a ray against the static colliders, plus any entities in
+        `dynamic` (tested directly; meant for a short list such as a bullet's
+        targets) and, with bodies=True, the moving bodies bucketed by the
+        last update_bodies(). Entities in `ignore` are skipped. Same return
+        value as ursina's raycast.
+        """
+        ignore = ignore or ()
+        origin = (float(origin[0]), float(origin[1]), float(origin[2]))
+        length = math.sqrt(direction[0] ** 2 + direction[1] ** 2 + direction[2] ** 2)
+        if length == 0:
+            return HitInfo(hit=False, distance=distance)
+        direction = (direction[0] / length, direction[1] / length, direction[2] / length)
+
+        best_t = distance
+        best = None     # (entity, axis, sign)
+
+        # 1) Dynamic entities: brute force, there are only a handful
+        for e in dynamic:
+            if e is None or e in ignore or not getattr(e, 'enabled', False):
+                continue
+            box = self.bodies.get(e) or world_aabb(e)
+            if box is None:
+                continue
+            res = ray_aabb(origin, direction, box[0], box[1], best_t)
+            if res and res[0] <= best_t:
+                best_t = res[0]
+                best = (e, res[1], res[2])
+
+        # 2) Static colliders (and moving bodies): only the cells the ray touches
+        seen = set()
+        seen_bodies = set()
+        body_cells = self.body_cells if bodies else {}
+        for cell, t_exit in self._walk_cells(origin[0], origin[2], direction[0], direction[2], best_t):
+            for e in body_cells.get(cell, ()):
+                if e in seen_bodies:
+                    continue
+                seen_bodies.add(e)
+                if e in ignore or e.is_empty() or not e.enabled:
+                    continue
+                lo, hi = self.bodies[e]
+                res = ray_aabb(origin, direction, lo, hi, best_t)
+                if res and res[0] <= best_t:
+                    best_t = res[0]
+                    best = (e, res[1], res[2])
+            for i in self.cells[cell]:
+                if i in seen:
+                    continue
+                seen.add(i)
+                e = self.entities[i]
+                if e in ignore:
+                    continue
+                lo, hi = self.boxes[i]
+                res = ray_aabb(origin, direction, lo, hi, best_t)
+                if res and res[0] <= best_t:
+                    best_t = res[0]
+                    best = (e, res[1], res[2])
+            # Nothing further along the ray can be closer than a hit in this cell
+            if best is not None and best_t <= t_exit:
+                break
+
+        if best is None:
+            return HitInfo(hit=False, distance=distance)
+
+        entity, axis, sign = best
+        world_point = Vec3(*(origin[i] + direction[i] * best_t for i in range(3)))
+        if axis is None:
+            world_normal = Vec3(-direction[0], -direction[1], -direction[2])
+        else:
+            world_normal = Vec3(0, 0, 0)
+            world_normal[axis] = sign
+
+        return HitInfo(
+            hit=True,
+            entity=entity,
+            entities=[entity],
+            point=Vec3(*entity.getRelativePoint(scene, world_point)),
+            world_point=world_point,
+            distance=best_t,
+            normal=Vec3(*entity.getRelativeVector(scene, world_normal)).normalized(),
+            world_normal=world_normal,
+        )
@@ -0,0 +1,113 @@
+"""
+Startup phase timing and deferred initialisation.
+
+Imported first by __main__.py, so it must stay cheap (standard library only):
+  1. startup.mark('phase') timestamps the end of each startup phase; the
+     phases are contiguous and add up to the time to the first frame.
+  2. The first rendered frame closes the last phase and prints the report
+     (ECHOES_STARTUP_REPORT=<path> also writes it as JSON).
+  3. In lazy-init mode (the default, ECHOES_LAZY_INIT=0 turns it off)
+     gameplay-only work waits for start_singleplayer(), and NumPy is
+     imported by lazy_import() on first use instead of at startup.
+"""
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+
+_T0 = time.perf_counter()
+
+
+def process_age():
+    """Seconds the process ran before this call (Linux/Android /proc), or None."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """
+    Wall-clock time of each startup phase, up to the first rendered frame:
+      1. mark(name) closes the phase that ends now.
+      2. frame() is called from update(); the second call means one frame
+         has been drawn, which closes 'first frame' and prints the report.
+      3. before_python is how long the process existed before this module
+         was imported (interpreter and Panda3D start-up), where known.
+    """
+    def __init__(self, lazy: bool = True):
+        self.lazy          = lazy
+        self.phases        = []    # (name, seconds)
+        self.done          = False
+        self.frames        = 0
+        self.before_python = process_age()
+        self._last = _T0
+
+    def mark(self, name: str) -> None:
+        if self.done:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def frame(self) -> None:
+        if self.done:
+            return
+        self.frames += 1
+        if self.frames == 2:
+            self.mark('first frame')
+            self.done = True
+            self.print_report()
+            path = os.environ.get('ECHOES_STARTUP_REPORT')
+            if path:
+                self.write(path)
+
+    def report(self) -> dict:
+        return {
+            'lazy_init': self.lazy,
+            'before_python_ms': self.before_python * 1000 if self.before_python is not None else None,
+            'total_ms': sum(s for _, s in self.phases) * 1000,
+            'phases_ms': {name: s * 1000 for name, s in self.phases},
+        }
+
+    def print_report(self) -> None:
+        r = self.report()
+        before = f" (+{r['before_python_ms']:.0f} ms before Python)" if r['before_python_ms'] is not None else ''
+        print(f"Startup: {r['total_ms']:.1f} ms to first frame{before}, lazy init {'on' if self.lazy else 'off'}")
+        for name, ms in r['phases_ms'].items():
+            print(f"  {name:<24} {ms:8.1f} ms")
+
+    def write(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Startup: wrote report to {path}")
+
+
+startup = StartupTimer(lazy=os.environ.get('ECHOES_LAZY_INIT') != '0')
+
+
+def lazy_import(name: str):
+    """
+    The module `name`, or None if it isn't installed. In lazy-init mode the
+    module only executes on its first attribute access.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    if not startup.lazy:
+        return importlib.import_module(name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
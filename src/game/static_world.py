@@ -0,0 +1,42 @@
+from ursina import Entity, scene
+
+
+def _material_key(entity) -> tuple:
+    """Entities sharing a model file and texture land in the same group."""
+    texture = getattr(entity, 'texture', None)
+    return entity.model.name, getattr(texture, 'name', None)
+
+
+def flatten_static(entities, name: str = 'static_world') -> list:
+    """
+    Merge the visible geometry of non-moving entities into a few nodes:
+      1. Each entity's model is copied, with its world transform and render
+         state, under one group entity per material (model file + texture).
+      2. Every group is flattened with flattenStrong(), so geoms sharing a
+         render state are drawn as one.
+      3. The original entities keep their colliders (ursina raycasts and
+         the spatial index still use them); only their model is stashed,
+         so it is neither drawn nor traversed.
+
+    Returns the group entities; they are plain scene entities, so round
+    teardown destroys them like the pieces they were built from.
+    """
+    groups = {}
+    for e in entities:
+        model = getattr(e, 'model', None)
+        if not model:
+            continue
+        key = _material_key(e)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = Entity(name=f'{name}_{len(groups)}')
+
+        copy = model.copyTo(group)
+        copy.setTransform(model.getTransform(scene))
+        copy.setState(model.getState(scene))
+        model.stash()
+
+    for group in groups.values():
+        group.flattenStrong()
+
+    return list(groups.values())
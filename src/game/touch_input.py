@@ -0,0 +1,123 @@
+"""
+Touch control layer: layout on resize, input from every pointer.
+
+  1. Controls (joysticks, buttons, the pause button) register with the
+     layer. Their sizes and anchors are recomputed by layout() only when
+     the window reports a new size or orientation ('window-event'), never
+     per frame.
+  2. update() (called from the game's update()) reads the window's
+     pointers directly. Each new touch is captured by the control under
+     it and stays with that control until it lifts, so one finger can
+     steer while another looks. The mouse counts as a pointer while its
+     left button is held.
+
+A control implements:
+    layout(ratio)        window width / width at first layout
+    contains(point)      whether a ui-space point starts a touch on it
+    press(point)         a pointer was captured
+    drag(point)          the captured pointer moved
+    release()            the captured pointer lifted
+"""
+from panda3d.core import MouseButton, PointerType
+from direct.showbase.DirectObject import DirectObject
+from ursina import window
+
+
+class TouchLayer(DirectObject):
+    """
+    The touch controls and the pointers currently held on them:
+      1. captures maps a pointer id to the control it pressed; pointers
+         that went down anywhere else are ignored until they lift.
+      2. Disabled controls (touch mode off, pause menu up) neither capture
+         new pointers nor keep the ones they had.
+    """
+    def __init__(self):
+        self.controls = []
+        self.captures = {}       # pointer id -> control
+        self.ignored  = set()    # pointer ids pressed outside every control
+        self._init_width = None
+        self._size = None
+        self.accept('window-event', self._on_window_event)
+
+    # ── Controls ───────────────────────────────────────────
+
+    def add(self, control):
+        self.controls.append(control)
+        control.layout(self._ratio())
+        return control
+
+    def clear(self) -> None:
+        self.controls = []
+        self.captures = {}
+        self.ignored  = set()
+
+    # ── Layout ─────────────────────────────────────────────
+
+    def _ratio(self) -> float:
+        width = window.size[0]
+        if self._init_width is None:
+            self._init_width = width or 1
+        return (width or self._init_width) / self._init_width
+
+    def _on_window_event(self, win) -> None:
+        size = tuple(window.size)
+        if size == self._size:
+            return
+        self._size = size
+        self.layout()
+
+    def layout(self) -> None:
+        ratio = self._ratio()
+        for control in self.controls:
+            control.layout(ratio)
+
+    # ── Pointers ───────────────────────────────────────────
+
+    @staticmethod
+    def pointers() -> dict:
+        """Pointer id -> ui-space (x, y) of every pointer currently pressed."""
+        win = getattr(base, 'win', None)
+        if win is None:
+            return {}
+        width, height = win.getXSize(), win.getYSize()
+        if not width or not height:
+            return {}
+        aspect = width / height
+        mouse_down = base.mouseWatcherNode.is_button_down(MouseButton.one())
+
+        out = {}
+        for i in range(win.getNumPointers()):
+            p = win.getPointer(i)
+            if not p.in_window or (p.type == PointerType.mouse and not mouse_down):
+                continue
+            # pixels from the top-left -> ursina ui units (y from -.5 to .5)
+            out[p.id] = ((p.x / width - .5) * aspect, .5 - p.y / height)
+        return out
+
+    def update(self) -> None:
+        if not self.controls:
+            return
+        pointers = self.pointers()
+
+        # lifted pointers, and controls switched off while held
+        for pid, control in list(self.captures.items()):
+            if pid not in pointers or not control.enabled:
+                del self.captures[pid]
+                control.release()
+        self.ignored.intersection_update(pointers)
+
+        for pid, point in pointers.items():
+            control = self.captures.get(pid)
+            if control is not None:
+                control.drag(point)
+                continue
+            if pid in self.ignored:
+                continue
+            held = set(self.captures.values())
+            for control in self.controls:
+                if control.enabled and control not in held and control.contains(point):
+                    self.captures[pid] = control
+                    control.press(point)
+                    break
+            else:
+                self.ignored.add(pid)
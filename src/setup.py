@@ -43,9 +43,11 @@ setup(
                 '**/*.jpg',
                 '**/*.egg',
                 '**/*.bam',
+                '**/*.pz',
                 '**/*.gltf',
                 '**/*.bin',
                 '**/*.wav',
+                '**/*.lvl',
             ],
             'extra_prc_data': PRC_DATA,
 